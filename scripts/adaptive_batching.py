@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adaptive batch sizing for PostgREST bulk inserts.
+
+Rows are serialized once and grouped into batches by byte size rather than a
+fixed row count, so narrow tables (auth_attempts) get large batches and wide
+ones (envios_processados with long `produtos`) get small ones. The byte limit
+follows AIMD:
+
+  - additive increase: +INCREASE_BYTES after a batch that finished under the
+    target latency
+  - multiplicative decrease: halved after a slow batch, a 413 (payload too
+    large) or a timeout
+
+A batch rejected with 413/504 or a client timeout is split in half and each
+half retried, down to single rows.
+"""
+
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from supaclient import SupabaseTimeout
+
+INITIAL_BYTES = 256 * 1024
+MIN_BYTES = 16 * 1024
+MAX_BYTES = 4 * 1024 * 1024
+INCREASE_BYTES = 64 * 1024
+MAX_ROWS = 5000
+TARGET_LATENCY_S = 2.0
+
+# Responses that mean "this batch is too big for the server right now"
+OVERLOAD_STATUS = (413, 504)
+
+
+class EncodedBatch:
+    """Pre-serialized rows; `start` is the offset of the first row in the table"""
+
+    __slots__ = ("start", "rows", "nbytes")
+
+    def __init__(self, start: int, rows: List[bytes]):
+        self.start = start
+        self.rows = rows
+        self.nbytes = sum(len(r) for r in rows) + len(rows) + 1
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def body(self) -> bytes:
+        return b"[" + b",".join(self.rows) + b"]"
+
+    def split(self) -> Tuple["EncodedBatch", "EncodedBatch"]:
+        half = len(self.rows) // 2
+        return (EncodedBatch(self.start, self.rows[:half]),
+                EncodedBatch(self.start + half, self.rows[half:]))
+
+
+class AdaptiveBatcher:
+    """AIMD byte budget for one table; safe to share between threads"""
+
+    def __init__(
+        self,
+        initial_bytes: int = INITIAL_BYTES,
+        min_bytes: int = MIN_BYTES,
+        max_bytes: int = MAX_BYTES,
+        max_rows: int = MAX_ROWS,
+        target_latency: float = TARGET_LATENCY_S,
+    ):
+        self.limit_bytes = initial_bytes
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.target_latency = target_latency
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+        self.batches = 0
+        self.rows = 0
+        self.bytes = 0
+        self.splits = 0
+        self.failed_rows = 0
+
+    def batches_from(self, rows: Iterable[Dict[str, Any]]) -> Iterator[EncodedBatch]:
+        """Serialize rows once and cut batches at the current byte limit"""
+        pending: List[bytes] = []
+        size = 1
+        start = 0
+        for row in rows:
+            encoded = json.dumps(row, ensure_ascii=False, default=str).encode("utf-8")
+            if pending and (size + len(encoded) + 1 > self.limit_bytes or len(pending) >= self.max_rows):
+                yield EncodedBatch(start, pending)
+                start += len(pending)
+                pending, size = [], 1
+            pending.append(encoded)
+            size += len(encoded) + 1
+        if pending:
+            yield EncodedBatch(start, pending)
+
+    def on_success(self, batch: EncodedBatch, seconds: float) -> None:
+        with self._lock:
+            self.batches += 1
+            self.rows += len(batch)
+            self.bytes += batch.nbytes
+            if seconds > self.target_latency:
+                self.limit_bytes = max(self.min_bytes, self.limit_bytes // 2)
+            elif batch.nbytes >= self.limit_bytes // 2:
+                # Only grow when the batch actually used the budget
+                self.limit_bytes = min(self.max_bytes, self.limit_bytes + INCREASE_BYTES)
+
+    def on_overload(self) -> None:
+        with self._lock:
+            self.splits += 1
+            self.limit_bytes = max(self.min_bytes, self.limit_bytes // 2)
+
+    def on_failure(self, batch: EncodedBatch) -> None:
+        with self._lock:
+            self.failed_rows += len(batch)
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "rows": self.rows,
+                "avg_rows": self.rows / self.batches if self.batches else 0.0,
+                "avg_kb": self.bytes / self.batches / 1024 if self.batches else 0.0,
+                "limit_kb": self.limit_bytes / 1024,
+                "splits": self.splits,
+                "failed_rows": self.failed_rows,
+                "rows_per_s": self.rows / elapsed if elapsed > 0 else 0.0,
+            }
+
+
+def send_adaptive(
+    post: Callable[[bytes], Any],
+    batcher: AdaptiveBatcher,
+    batch: EncodedBatch,
+    on_error: Callable[[EncodedBatch, str], None],
+) -> int:
+    """
+    Post a batch, splitting it in half on 413/504/timeouts. `post` returns an
+    unchecked response (supaclient, check=False). Other failures are passed
+    to on_error(batch, message). Returns the rows accepted.
+    """
+    started = time.monotonic()
+    try:
+        response = post(batch.body)
+        overloaded = response.status_code in OVERLOAD_STATUS
+        reason = f"HTTP {response.status_code}"
+    except SupabaseTimeout as e:
+        response = None
+        overloaded = True
+        reason = f"timeout ({e})"
+
+    if overloaded:
+        batcher.on_overload()
+        if len(batch) > 1:
+            first, second = batch.split()
+            return (send_adaptive(post, batcher, first, on_error)
+                    + send_adaptive(post, batcher, second, on_error))
+        batcher.on_failure(batch)
+        on_error(batch, f"{reason} for a single row")
+        return 0
+
+    if response.status_code >= 400:
+        batcher.on_failure(batch)
+        on_error(batch, f"HTTP {response.status_code} {response.reason_phrase} | Response: {response.text[:200]}")
+        return 0
+
+    batcher.on_success(batch, time.monotonic() - started)
+    return len(batch)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Arrow IPC snapshots for migration_data (`migrate_supabase.py --format arrow`).
+
+A table is stored as migration_data/{table}.arrow: an Arrow IPC file of record
+batches that can be memory-mapped and read one batch at a time. Column types
+come from the PostgREST definitions in openapi_spec.json:
+
+    uuid, text, enums             -> string
+    timestamp with time zone      -> timestamp[us, UTC]
+    timestamp without time zone   -> timestamp[us]
+    integer / bigint              -> int64
+    numeric                       -> float64
+    boolean                       -> bool
+    json / jsonb                  -> string holding the JSON document
+                                     (field metadata pg_type=jsonb)
+
+Columns missing from the spec are kept as jsonb-encoded strings so nothing is
+lost. Reading converts back to the JSON-ready dicts PostgREST expects.
+
+Requires pyarrow (pip install pyarrow).
+"""
+
+import json
+import re
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# Imported on first use so the NDJSON path doesn't pay for pyarrow
+pa = None
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+OPENAPI_SPEC = SCRIPT_DIR / "openapi_spec.json"
+
+ARROW_EXTENSION = ".arrow"
+RECORD_BATCH_ROWS = 10_000
+
+_TIMESTAMP = re.compile(
+    r"^(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})(?:\.(\d{1,6})\d*)?(Z|[+-]\d{2}(?::?\d{2})?)?$"
+)
+
+
+def require_pyarrow() -> None:
+    global pa
+    if pa is not None:
+        return
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("pyarrow is required for --format arrow (pip install pyarrow)")
+    pa = pyarrow
+
+
+def _pg_field(name: str, pg_format: str) -> "pa.Field":
+    if pg_format == "timestamp with time zone":
+        arrow_type = pa.timestamp("us", tz="UTC")
+    elif pg_format == "timestamp without time zone":
+        arrow_type = pa.timestamp("us")
+    elif pg_format in ("integer", "bigint", "smallint"):
+        arrow_type = pa.int64()
+    elif pg_format in ("numeric", "double precision", "real"):
+        arrow_type = pa.float64()
+    elif pg_format == "boolean":
+        arrow_type = pa.bool_()
+    else:
+        arrow_type = pa.string()
+    metadata = {"pg_type": pg_format} if pg_format else None
+    return pa.field(name, arrow_type, nullable=True, metadata=metadata)
+
+
+@lru_cache(maxsize=None)
+def load_definitions(spec_path: Path = OPENAPI_SPEC) -> Dict[str, Any]:
+    with open(spec_path, "r", encoding="utf-8") as f:
+        return json.load(f).get("definitions", {})
+
+
+def schema_for(table: str, columns: Iterable[str], definitions: Dict[str, Any]) -> "pa.Schema":
+    """
+    Arrow schema for `table` covering `columns` (in the order they appear in the
+    data). Unknown columns are stored as JSON text.
+    """
+    require_pyarrow()
+    properties = definitions.get(table, {}).get("properties", {})
+    fields = [_pg_field(col, properties.get(col, {}).get("format", "jsonb")) for col in columns]
+    return pa.schema(fields, metadata={"table": table, "types": "openapi_spec.json"})
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """PostgREST timestamp text -> datetime (works on Python < 3.11 as well)"""
+    if value is None or isinstance(value, datetime):
+        return value
+    match = _TIMESTAMP.match(str(value).strip())
+    if not match:
+        raise ValueError(f"invalid timestamp: {value!r}")
+    date, time_part, fraction, offset = match.groups()
+    text = f"{date}T{time_part}.{(fraction or '0').ljust(6, '0')}"
+    if offset:
+        if offset == "Z":
+            offset = "+00:00"
+        elif len(offset) == 3:
+            offset += ":00"
+        elif ":" not in offset:
+            offset = f"{offset[:3]}:{offset[3:]}"
+        text += offset
+    return datetime.fromisoformat(text)
+
+
+def _encoder(field: "pa.Field") -> Callable[[Any], Any]:
+    pg_type = (field.metadata or {}).get(b"pg_type", b"").decode()
+    if pa.types.is_timestamp(field.type):
+        return _parse_timestamp
+    if pa.types.is_string(field.type) and pg_type in ("jsonb", "json"):
+        return lambda v: None if v is None else json.dumps(v, ensure_ascii=False, default=str)
+    if pa.types.is_string(field.type):
+        return lambda v: None if v is None else (v if isinstance(v, str) else str(v))
+    return lambda v: v
+
+
+def _decoder(field: "pa.Field") -> Optional[Callable[[Any], Any]]:
+    pg_type = (field.metadata or {}).get(b"pg_type", b"").decode()
+    if pa.types.is_timestamp(field.type):
+        return lambda v: None if v is None else v.isoformat()
+    if pa.types.is_string(field.type) and pg_type in ("jsonb", "json"):
+        return lambda v: None if v is None else json.loads(v)
+    return None
+
+
+def write_arrow(
+    rows: Iterable[Dict[str, Any]],
+    path: Path,
+    table: str,
+    definitions: Optional[Dict[str, Any]] = None,
+    batch_rows: int = RECORD_BATCH_ROWS,
+) -> int:
+    """
+    Write rows to an Arrow IPC file in record batches of `batch_rows`.
+    The schema is fixed by the first batch; returns the number of rows.
+    """
+    require_pyarrow()
+    definitions = load_definitions() if definitions is None else definitions
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+
+    writer = None
+    schema = None
+    encoders: List[Callable[[Any], Any]] = []
+    total = 0
+
+    def flush(chunk: List[Dict[str, Any]]):
+        nonlocal writer, schema, encoders
+        if schema is None:
+            columns: Dict[str, None] = {}
+            for row in chunk:
+                columns.update(dict.fromkeys(row))
+            schema = schema_for(table, columns, definitions)
+            encoders = [_encoder(field) for field in schema]
+            writer = pa.ipc.new_file(str(tmp), schema)
+        extra = set().union(*chunk) - set(schema.names)
+        if extra:
+            raise ValueError(f"{table}: columns {sorted(extra)} not present in the first batch")
+        arrays = []
+        for field, encode in zip(schema, encoders):
+            values = [encode(row.get(field.name)) for row in chunk]
+            arrays.append(pa.array(values, type=field.type))
+        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+
+    chunk: List[Dict[str, Any]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= batch_rows:
+            flush(chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+        total += len(chunk)
+    if writer is None:
+        # Empty table: still write a file with the spec columns
+        schema = schema_for(table, definitions.get(table, {}).get("properties", {}), definitions)
+        writer = pa.ipc.new_file(str(tmp), schema)
+
+    writer.close()
+    tmp.replace(path)
+    return total
+
+
+def iter_arrow_batches(path: Path) -> Iterator["pa.RecordBatch"]:
+    """Memory-map an Arrow IPC file and yield its record batches"""
+    require_pyarrow()
+    with pa.memory_map(str(path), "r") as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+
+def arrow_row_count(path: Path) -> int:
+    return sum(batch.num_rows for batch in iter_arrow_batches(path))
+
+
+def iter_arrow_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield JSON-ready rows, one record batch in memory at a time"""
+    for batch in iter_arrow_batches(path):
+        decoders = [_decoder(field) for field in batch.schema]
+        names = batch.schema.names
+        columns = []
+        for column, decode in zip(batch.columns, decoders):
+            values = column.to_pylist()
+            columns.append([decode(v) for v in values] if decode else values)
+        for values in zip(*columns):
+            yield dict(zip(names, values))
@@ -19,11 +19,11 @@ if errorlevel 1 (
 )
 
 REM Verificar se as dependências estão instaladas
-python -c "import pandas, openpyxl, supabase" >nul 2>&1
+python -c "import pandas, openpyxl, httpx" >nul 2>&1
 if errorlevel 1 (
     echo [AVISO] Dependencias nao instaladas. Instalando...
     echo.
-    pip install pandas openpyxl supabase
+    pip install pandas openpyxl "httpx[http2]"
     if errorlevel 1 (
         echo [ERRO] Falha ao instalar dependencias
         pause
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Resultados da auditoria de cargas em SQLite (SNT-16)
+
+Cada execução do audit_cargo_data.py grava uma run com as cargas auditadas
+e, para cada SO, a classificação (faltante, divergente, ok, nao_encontrada),
+a Ship Date da planilha, a data_envio do DB e a diferença em dias. O
+audit_report.csv é gerado a partir da view `issues` deste banco.
+
+Uso:
+    python audit_results.py runs                      # Runs gravadas e totais
+    python audit_results.py diff                      # Issues novas/resolvidas (últimas 2 runs)
+    python audit_results.py diff 12 15                # Entre duas runs
+    python audit_results.py so 23205545               # Histórico de uma SO
+    python audit_results.py csv 15 --output r15.csv   # CSV de uma run antiga
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import pandas as pd
+except ImportError as e:
+    print(f"Erro: Biblioteca necessaria nao instalada: {e}")
+    print("\nInstale as dependencias:")
+    print("  pip install pandas")
+    sys.exit(1)
+
+
+DEFAULT_PATH = Path(__file__).parent / 'audit_results.sqlite'
+
+# Classificação de cada SO da planilha na comparação com o DB
+STATUS_NOT_FOUND = 'nao_encontrada'
+STATUS_MISSING = 'faltante'
+STATUS_DIVERGENT = 'divergente'
+STATUS_OK = 'ok'
+
+REPORT_COLUMNS = ['Carga', 'SO', 'Tipo', 'Data_Planilha', 'Data_DB', 'Diferenca_Dias', 'Status']
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at  TEXT NOT NULL,
+    finished_at TEXT,
+    base_path   TEXT,
+    stats       TEXT
+);
+CREATE TABLE IF NOT EXISTS cargos (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id      INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    cargo       TEXT NOT NULL,
+    folder      TEXT,
+    spreadsheet TEXT,
+    total_sos   INTEGER,
+    found_in_db INTEGER,
+    not_found   INTEGER,
+    reused      INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS cargos_run ON cargos (run_id, cargo);
+CREATE TABLE IF NOT EXISTS sos (
+    cargo_id    INTEGER NOT NULL REFERENCES cargos (id) ON DELETE CASCADE,
+    run_id      INTEGER NOT NULL,
+    seq         INTEGER NOT NULL,
+    sales_order TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    ship_date   TEXT,
+    db_date     TEXT,
+    diff_days   INTEGER,
+    filled      INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sos_run_status ON sos (run_id, status);
+CREATE INDEX IF NOT EXISTS sos_sales_order ON sos (sales_order, run_id);
+
+-- Linhas do audit_report.csv: faltantes e divergências de cada carga
+CREATE VIEW IF NOT EXISTS issues AS
+SELECT
+    s.run_id,
+    s.cargo_id,
+    s.seq,
+    c.cargo AS Carga,
+    s.sales_order AS SO,
+    CASE s.status WHEN '{STATUS_MISSING}' THEN 'FALTANTE' ELSE 'DIVERGENCIA' END AS Tipo,
+    CASE s.status WHEN '{STATUS_MISSING}' THEN s.ship_date
+         ELSE strftime('%d/%m/%Y', s.ship_date) END AS Data_Planilha,
+    CASE s.status WHEN '{STATUS_MISSING}' THEN 'N/A'
+         ELSE strftime('%d/%m/%Y', s.db_date) END AS Data_DB,
+    CASE s.status WHEN '{STATUS_MISSING}' THEN 'N/A' ELSE s.diff_days END AS Diferenca_Dias,
+    CASE WHEN s.status = '{STATUS_DIVERGENT}' THEN 'Revisar'
+         WHEN s.filled THEN 'Preenchido' ELSE 'Pendente' END AS Status
+FROM sos s
+JOIN cargos c ON c.id = s.cargo_id
+WHERE s.status IN ('{STATUS_MISSING}', '{STATUS_DIVERGENT}');
+"""
+
+
+def _iso_from_br(value: Optional[str]) -> Optional[str]:
+    """dd/mm/YYYY (resultados antigos do cache de planilhas) -> YYYY-MM-DD"""
+    if not value:
+        return None
+    return datetime.strptime(value, '%d/%m/%Y').date().isoformat()
+
+
+def _nullable(series: 'pd.Series') -> List:
+    """Valores de uma Series com NaN/NaT como None (para o sqlite3)"""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+class AuditResults:
+    """
+    Banco SQLite com os resultados das auditorias, uma run por execução.
+
+    Tabelas runs, cargos e sos (indexadas por run e por sales_order) e a view
+    issues, de onde sai o CSV. Sem caminho, o banco fica só em memória.
+    Os dados de uma run são gravados numa transação, confirmada em finish_run.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path is not None else None
+        self._db = sqlite3.connect(str(self.path) if self.path else ':memory:')
+        self._db.execute("PRAGMA foreign_keys=ON")
+        if self.path:
+            self._db.execute("PRAGMA journal_mode=WAL")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, self.VERSION):
+            raise sqlite3.DatabaseError(
+                f"{self.path}: versao {version} do banco de resultados (esperada {self.VERSION})"
+            )
+        self._db.executescript(_SCHEMA)
+        self._db.execute(f"PRAGMA user_version = {self.VERSION}")
+        self._db.commit()
+
+    def start_run(self, base_path: str) -> int:
+        cursor = self._db.execute(
+            "INSERT INTO runs (started_at, base_path) VALUES (?, ?)",
+            (datetime.now(timezone.utc).isoformat(timespec='seconds'), base_path),
+        )
+        return cursor.lastrowid
+
+    def add_cargo(self, run_id: int, cargo_report: Dict, comparison: Optional['pd.DataFrame'] = None):
+        """
+        Grava uma carga auditada. `comparison` é o frame de compare_dates (todas
+        as SOs da planilha); sem ele (resultado reaproveitado do cache de
+        planilhas) só as faltantes e divergências do cargo_report são gravadas.
+        """
+        cursor = self._db.execute(
+            "INSERT INTO cargos (run_id, cargo, folder, spreadsheet, total_sos, found_in_db, not_found, reused) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                run_id, cargo_report['cargo'], cargo_report.get('folder'), cargo_report.get('spreadsheet'),
+                cargo_report.get('total_sos'), cargo_report.get('found_in_db'), cargo_report.get('not_found'),
+                int(comparison is None),
+            ),
+        )
+        cargo_id = cursor.lastrowid
+        filled = set(cargo_report.get('filled', []))
+
+        if comparison is not None:
+            ship = comparison['ship_date'].map(lambda t: t.isoformat(), na_action='ignore')
+            db = comparison['db_date'].map(lambda t: t.isoformat(), na_action='ignore')
+            rows = zip(
+                comparison['so'], comparison['status'], _nullable(ship), _nullable(db),
+                _nullable(comparison['diff_days'].astype('Int64')),
+            )
+        else:
+            missing = [
+                (m['so'], STATUS_MISSING, m.get('ship_date_planilha'), None, None)
+                for m in cargo_report.get('missing_data_envio', [])
+            ]
+            divergent = [
+                (d['so'], STATUS_DIVERGENT, _iso_from_br(d['planilha_date']), _iso_from_br(d['db_date']),
+                 d['diff_days'])
+                for d in cargo_report.get('divergences', [])
+            ]
+            rows = missing + divergent
+
+        self._db.executemany(
+            "INSERT INTO sos (cargo_id, run_id, seq, sales_order, status, ship_date, db_date, diff_days, filled) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (cargo_id, run_id, seq, so, status, ship_date, db_date, diff_days, int(so in filled))
+                for seq, (so, status, ship_date, db_date, diff_days) in enumerate(rows)
+            ],
+        )
+
+    def unmark_filled(self, run_id: int, cargo: str, sales_orders: Iterable[str]):
+        """Desmarca SOs cujo preenchimento automático falhou no update-envio-data"""
+        self._db.executemany(
+            "UPDATE sos SET filled = 0 WHERE run_id = ? AND sales_order = ? "
+            "AND cargo_id IN (SELECT id FROM cargos WHERE run_id = ? AND cargo = ?)",
+            [(run_id, so, run_id, cargo) for so in sales_orders],
+        )
+
+    def finish_run(self, run_id: int, stats: Dict):
+        self._db.execute(
+            "UPDATE runs SET finished_at = ?, stats = ? WHERE run_id = ?",
+            (datetime.now(timezone.utc).isoformat(timespec='seconds'), json.dumps(stats), run_id),
+        )
+        self._db.commit()
+
+    def issues(self, run_id: int) -> 'pd.DataFrame':
+        """Linhas do relatório (REPORT_COLUMNS): por carga, faltantes e depois divergências"""
+        return pd.read_sql_query(
+            f"SELECT {', '.join(REPORT_COLUMNS)} FROM issues WHERE run_id = ? "
+            f"ORDER BY cargo_id, Tipo = 'DIVERGENCIA', seq",
+            self._db, params=(run_id,),
+        )
+
+    def export_csv(self, run_id: int, output_path: str) -> int:
+        """Grava o CSV de uma run (só se houver issues) e devolve o número de linhas"""
+        df = self.issues(run_id)
+        if len(df):
+            df.to_csv(output_path, index=False, encoding='utf-8-sig')
+        return len(df)
+
+    def runs(self, limit: int = 20) -> 'pd.DataFrame':
+        """Runs mais recentes com os totais de cada classificação"""
+        return pd.read_sql_query(
+            f"""
+            SELECT r.run_id, r.started_at, r.finished_at,
+                   (SELECT COUNT(*) FROM cargos c WHERE c.run_id = r.run_id) AS cargas,
+                   COUNT(s.run_id) AS sos,
+                   SUM(s.status = '{STATUS_MISSING}') AS faltantes,
+                   SUM(s.status = '{STATUS_MISSING}' AND s.filled) AS preenchidas,
+                   SUM(s.status = '{STATUS_DIVERGENT}') AS divergencias,
+                   SUM(s.status = '{STATUS_NOT_FOUND}') AS nao_encontradas
+            FROM runs r
+            LEFT JOIN sos s ON s.run_id = r.run_id
+            GROUP BY r.run_id
+            ORDER BY r.run_id DESC
+            LIMIT ?
+            """,
+            self._db, params=(limit,),
+        )
+
+    def last_runs(self, count: int = 2) -> List[int]:
+        rows = self._db.execute(
+            "SELECT run_id FROM runs WHERE finished_at IS NOT NULL ORDER BY run_id DESC LIMIT ?", (count,)
+        ).fetchall()
+        return [run_id for run_id, in reversed(rows)]
+
+    def diff(self, old_run: int, new_run: int) -> 'pd.DataFrame':
+        """
+        Issues que mudaram entre duas runs, por (Carga, SO): Mudanca = nova,
+        resolvida ou alterada (tipo, datas ou status diferentes).
+        """
+        keys = ['Carga', 'SO']
+        old = self.issues(old_run)
+        new = self.issues(new_run)
+        merged = old.merge(new, on=keys, how='outer', suffixes=('_antes', '_depois'), indicator=True)
+        values = [c for c in REPORT_COLUMNS if c not in keys]
+        before = merged[[f'{c}_antes' for c in values]].fillna('').astype(str).to_numpy()
+        after = merged[[f'{c}_depois' for c in values]].fillna('').astype(str).to_numpy()
+        changed = (merged['_merge'] == 'both') & (before != after).any(axis=1)
+        merged['Mudanca'] = merged['_merge'].map({'left_only': 'resolvida', 'right_only': 'nova'})
+        merged.loc[changed, 'Mudanca'] = 'alterada'
+        merged = merged[merged['Mudanca'].notna()].drop(columns='_merge')
+        return merged[['Mudanca'] + keys + [c for c in merged.columns if c not in keys + ['Mudanca']]]
+
+    def so_history(self, sales_order: str) -> 'pd.DataFrame':
+        """Classificação de uma SO em cada run"""
+        return pd.read_sql_query(
+            "SELECT s.run_id, r.started_at, c.cargo, s.status, s.ship_date, s.db_date, s.diff_days, s.filled "
+            "FROM sos s JOIN cargos c ON c.id = s.cargo_id JOIN runs r ON r.run_id = s.run_id "
+            "WHERE s.sales_order = ? ORDER BY s.run_id, c.cargo",
+            self._db, params=(sales_order,),
+        )
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Consulta os resultados das auditorias de cargas')
+    parser.add_argument('--db', default=str(DEFAULT_PATH), help='Banco de resultados (SQLite)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    runs_parser = sub.add_parser('runs', help='Runs gravadas e totais por classificacao')
+    runs_parser.add_argument('--limit', type=int, default=20)
+
+    diff_parser = sub.add_parser('diff', help='Issues novas, resolvidas ou alteradas entre duas runs')
+    diff_parser.add_argument('runs', nargs='*', type=int, help='RUN_ANTES RUN_DEPOIS (padrao: as duas ultimas)')
+    diff_parser.add_argument('--output', help='Grava o diff em CSV')
+
+    so_parser = sub.add_parser('so', help='Historico de uma SO')
+    so_parser.add_argument('sales_order')
+
+    csv_parser = sub.add_parser('csv', help='Gera o audit_report.csv de uma run')
+    csv_parser.add_argument('run', nargs='?', type=int, help='Run (padrao: a ultima)')
+    csv_parser.add_argument('--output', default='audit_report.csv')
+
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"  Banco de resultados nao encontrado: {args.db}")
+        sys.exit(1)
+    results = AuditResults(Path(args.db))
+
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        if args.command == 'runs':
+            print(results.runs(args.limit).to_string(index=False))
+
+        elif args.command == 'diff':
+            if len(args.runs) not in (0, 2):
+                parser.error("diff: informe duas runs ou nenhuma")
+            runs = args.runs or results.last_runs(2)
+            if len(runs) < 2:
+                print("  Menos de duas runs gravadas")
+                sys.exit(1)
+            df = results.diff(*runs)
+            print(f"  Run {runs[0]} -> {runs[1]}: {len(df)} issues mudaram")
+            for kind, count in df['Mudanca'].value_counts().items():
+                print(f"    {kind}: {count}")
+            if args.output:
+                df.to_csv(args.output, index=False, encoding='utf-8-sig')
+                print(f"  Diff gravado: {args.output}")
+            elif len(df):
+                print()
+                print(df.to_string(index=False))
+
+        elif args.command == 'so':
+            df = results.so_history(args.sales_order)
+            print(df.to_string(index=False) if len(df) else f"  SO {args.sales_order} nao aparece em nenhuma run")
+
+        elif args.command == 'csv':
+            run = args.run or next(iter(results.last_runs(1)), None)
+            if run is None:
+                print("  Nenhuma run gravada")
+                sys.exit(1)
+            count = results.export_csv(run, args.output)
+            print(f"  Run {run}: {count} issues" + (f" -> {args.output}" if count else ""))
+
+    results.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste de carga do bulk-update-cargas: loop por carga vs RPC set-based.
+
+Semeia o stub (supabase_stub.py) com cargas, SOs vinculadas e histórico e
+aplica a mesma planilha do BulkCargoUpload de dois jeitos:
+
+  - loop: port fiel do loop anterior da Edge Function (uma requisição PostgREST
+    por select/update/delete/insert, carga por carga, SO por SO)
+  - rpc:  POST /rest/v1/rpc/bulk_update_cargas em lotes de --batch-size linhas
+    (como o BulkCargoUpload envia agora)
+
+A latência do stub representa o round trip Edge Function -> banco. No fim as
+tabelas resultantes dos dois caminhos são comparadas (ignorando ids e
+timestamps de "agora") e o script sai com 1 se divergirem.
+
+Uso:
+    python scripts/benchmarks/bench_bulk_update_cargas.py
+    python scripts/benchmarks/bench_bulk_update_cargas.py --cargas 500 --sos-per-carga 15 --latency-ms 10
+
+A RPC do stub reimplementa em Python as regras da migração SQL; o teste confere
+essa semântica contra o loop, não o SQL em si.
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from supaclient import SupabaseClient, in_filter  # noqa: E402
+from supabase_stub import SupabaseStub  # noqa: E402
+from synthetic_data import FIRST_CARGO, FIRST_SO, build_tables, make_bulk_cargas_payload  # noqa: E402
+
+TABLES = ["cargas", "carga_historico", "envios_processados", "shipment_history"]
+
+# Colunas que recebem "agora" ou ids novos: diferem entre execuções
+VOLATILE_COLUMNS = {"id", "created_at", "updated_at", "data_ultima_atualizacao"}
+
+
+# ----------------------------------------------------------------------
+# Port do loop anterior (supabase/functions/bulk-update-cargas/index.ts)
+# ----------------------------------------------------------------------
+
+def infer_status_from_dates(update: Dict) -> Tuple[str, str]:
+    if update.get("data_entrega"):
+        return "Entregue", "Destino Final"
+    if update.get("data_desembaraco"):
+        return "Liberado", "Brasil - Liberado"
+    if update.get("data_chegada"):
+        return "Em Desembaraço", "Alfândega Brasil"
+    if update.get("data_embarque"):
+        return "Em Trânsito", "Em Voo"
+    if update.get("data_armazem"):
+        return "No Armazém", "Miami - Armazém FedEx"
+    return "Em Consolidação", "Fornecedor"
+
+
+EVENT_NAMES = {
+    "data_armazem": "Chegada no Armazém",
+    "data_embarque": "Embarque Confirmado",
+    "data_chegada": "Chegada no Brasil",
+    "data_desembaraco": "Desembaraço Concluído",
+    "data_entrega": "Entrega Realizada",
+}
+
+EVENT_LOCATIONS = {
+    "data_armazem": "Miami - Armazém FedEx",
+    "data_embarque": "Aeroporto de Origem",
+    "data_chegada": "Aeroporto Brasil",
+    "data_desembaraco": "Alfândega Brasil",
+    "data_entrega": "Destino Final",
+}
+
+SHIPMENT_STATUS = {
+    "data_armazem": "No Armazém",
+    "data_embarque": "Em Trânsito",
+    "data_chegada": "Em Desembaraço",
+    "data_desembaraco": "Liberado",
+    "data_entrega": "Entregue",
+}
+
+CARGA_COLUMNS = {
+    "data_armazem": "data_armazem",
+    "data_embarque": "data_embarque",
+    "data_chegada": "data_chegada_prevista",
+    "data_desembaraco": "data_autorizacao",
+    "data_entrega": "data_entrega",
+}
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+async def legacy_loop(client: SupabaseClient, cargas: List[Dict]) -> List[Dict]:
+    """Mesmas requisições, na mesma ordem, que o loop da Edge Function"""
+    results = []
+    for carga in cargas:
+        numero = str(carga.get("numero_carga")).strip()
+        if not numero:
+            results.append({"success": False, "numero_carga": numero,
+                            "message": "numero_carga é obrigatório", "sos_updated": 0})
+            continue
+
+        existing = await client.aselect("cargas", "*", [("numero_carga", f"eq.{numero}")])
+        if len(existing) != 1:
+            results.append({"success": False, "numero_carga": numero,
+                            "message": f"Carga {numero} não encontrada", "sos_updated": 0})
+            continue
+
+        update_data = {"updated_at": now_iso()}
+        updated_dates = []
+        for tipo, column in CARGA_COLUMNS.items():
+            if carga.get(tipo) is not None:
+                update_data[column] = carga[tipo]
+                updated_dates.append((tipo, carga[tipo]))
+
+        inferred_status, ultima_localizacao = infer_status_from_dates(carga)
+        status = carga.get("status") or inferred_status
+        update_data.update(status=status, ultima_localizacao=ultima_localizacao)
+        await client.aupdate("cargas", [("numero_carga", f"eq.{numero}")], update_data)
+
+        for tipo, date in updated_dates:
+            await client.adelete("carga_historico", [("numero_carga", f"eq.{numero}"),
+                                                     ("evento", f"eq.{EVENT_NAMES[tipo]}")])
+            await client.ainsert("carga_historico", {
+                "numero_carga": numero, "evento": EVENT_NAMES[tipo], "data_evento": date,
+                "localizacao": EVENT_LOCATIONS[tipo], "descricao": "Atualizado via importação em massa",
+            })
+
+        linked = await client.aselect("carga_sales_orders", "so_number", [("numero_carga", f"eq.{numero}")])
+        so_numbers = [link["so_number"] for link in linked]
+
+        if so_numbers:
+            envio_update = {
+                "status_atual": status, "status": status, "status_cliente": status,
+                "ultima_localizacao": ultima_localizacao, "data_ultima_atualizacao": now_iso(),
+            }
+            if status == "Entregue":
+                envio_update["is_delivered"] = True
+            if carga.get("data_embarque"):
+                envio_update["data_envio"] = carga["data_embarque"]
+            await client.aupdate("envios_processados", [("sales_order", in_filter(so_numbers))], envio_update)
+
+            for so in so_numbers:
+                for tipo, date in updated_dates:
+                    await client.adelete("shipment_history", [("sales_order", f"eq.{so}"),
+                                                              ("status", f"eq.{SHIPMENT_STATUS[tipo]}")])
+                    await client.ainsert("shipment_history", {
+                        "sales_order": so, "status": SHIPMENT_STATUS[tipo], "location": EVENT_LOCATIONS[tipo],
+                        "timestamp": date, "description": f"Importação em massa - Carga {numero}",
+                    })
+
+        results.append({"success": True, "numero_carga": numero,
+                        "message": "Atualizado com sucesso", "sos_updated": len(so_numbers)})
+    return results
+
+
+async def rpc_batches(client: SupabaseClient, cargas: List[Dict], batch_size: int) -> List[Dict]:
+    results = []
+    for start in range(0, len(cargas), batch_size):
+        response = await client.arpc("bulk_update_cargas", {"payload": cargas[start:start + batch_size]})
+        results.extend(response["results"])
+    return results
+
+
+# ----------------------------------------------------------------------
+# Execução e comparação
+# ----------------------------------------------------------------------
+
+def snapshot(stub: SupabaseStub) -> Dict[str, List[Tuple]]:
+    """Tabelas relevantes sem colunas voláteis, em ordem canônica"""
+    with stub.state.lock:
+        return {
+            table: sorted(
+                tuple(sorted((k, str(v)) for k, v in row.items() if k not in VOLATILE_COLUMNS and v is not None))
+                for row in stub.state.tables.get(table, [])
+            )
+            for table in TABLES
+        }
+
+
+def run_mode(mode: str, tables: Dict[str, List[Dict]], payload: List[Dict], args) -> Dict:
+    with SupabaseStub(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed) as stub:
+        for table, rows in tables.items():
+            stub.state.seed_table(table, rows)
+        stub.state.reset_metrics()
+
+        client = SupabaseClient(stub.url, "stub-key", concurrency=1)
+        started = time.perf_counter()
+        if mode == "loop":
+            results = client.run(legacy_loop(client, payload))
+        else:
+            results = client.run(rpc_batches(client, payload, args.batch_size))
+        elapsed = time.perf_counter() - started
+        client.close()
+
+        return {"elapsed": elapsed, "results": results, "tables": snapshot(stub),
+                "latency": stub.state.latency_summary()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do bulk-update-cargas (loop vs RPC)")
+    parser.add_argument("--cargas", type=int, default=200, help="Linhas da planilha (default: 200)")
+    parser.add_argument("--sos-per-carga", type=int, default=5, help="SOs vinculadas por carga (default: 5)")
+    parser.add_argument("--batch-size", type=int, default=50,
+                        help="Linhas por chamada da RPC, como o BulkCargoUpload (default: 50)")
+    parser.add_argument("--latency-ms", type=float, default=5.0,
+                        help="Round trip Edge Function -> banco por requisicao (default: 5)")
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    numeros = [str(FIRST_CARGO + i) for i in range(args.cargas)]
+    layout = {numero: [str(FIRST_SO + i * args.sos_per_carga + k) for k in range(args.sos_per_carga)]
+              for i, numero in enumerate(numeros)}
+    tables = build_tables(layout, history_per_so=2)
+    tables = {table: tables[table] for table in TABLES + ["carga_sales_orders"]}
+    payload = make_bulk_cargas_payload(numeros)
+    links = len(tables["carga_sales_orders"])
+    print(f"Planilha: {len(payload)} linhas, {args.cargas} cargas, {links} SOs vinculadas "
+          f"(latencia {args.latency_ms}ms + jitter {args.jitter_ms}ms)\n")
+
+    runs = {}
+    for mode in ("loop", "rpc"):
+        runs[mode] = run_mode(mode, tables, payload, args)
+        run = runs[mode]
+        latency = run["latency"]
+        ok = sum(r["success"] for r in run["results"])
+        print(f"{mode:<5} {run['elapsed']:>8.2f}s  {latency['requests']:>6} requisicoes  "
+              f"p50 {latency['p50_ms']:.1f}ms  {ok}/{len(run['results'])} cargas, "
+              f"{sum(r['sos_updated'] for r in run['results'])} SOs")
+
+    loop, rpc = runs["loop"], runs["rpc"]
+    speedup = loop["elapsed"] / rpc["elapsed"] if rpc["elapsed"] else float("inf")
+    print(f"\nRPC {speedup:.1f}x mais rapida, "
+          f"{loop['latency']['requests'] / max(rpc['latency']['requests'], 1):.0f}x menos requisicoes")
+
+    mismatched = [t for t in TABLES if loop["tables"][t] != rpc["tables"][t]]
+    if loop["results"] != rpc["results"]:
+        mismatched.append("results")
+    if mismatched:
+        print(f"❌ Resultados divergentes entre loop e RPC: {', '.join(mismatched)}")
+        sys.exit(1)
+    print("✅ Tabelas e resultados identicos nos dois caminhos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste de carga do rate limiter das Edge Functions: modo db vs modo memory.
+
+Port do supabase/functions/_shared/rate-limiter.ts nos dois modos, rodando
+contra o auth_attempts do stub (supabase_stub.py):
+
+  - db:     checkRateLimit consulta auth_attempts a cada chamada e
+            recordSuccessfulAttempt grava uma linha por chamada autenticada
+  - memory: decisões de bloqueio em cache por --cache-ttl-s, horários das
+            falhas da última hora por IP+endpoint; só falhas e bloqueios vão
+            para o banco
+
+Dois tráfegos, com relógio virtual para o segundo:
+
+  - rajada:   o n8n (um IP, token válido) intercalado com --attackers IPs
+              mandando token errado
+  - espacado: para cada --spacing-min (padrão 20 e 6), cada atacante erra o
+              token a esse intervalo por --spaced-hours horas. São tentativas
+              lentas que ainda precisam cair nos bloqueios de 3 falhas/15 min
+              e 10 falhas/24h
+
+Para cada modo reporta leituras e escritas em auth_attempts por chamada,
+linhas criadas e bloqueios gravados; as respostas (200/401/429) e os
+bloqueios dos dois modos são comparados e o script sai com 1 se divergirem
+em qualquer dos tráfegos.
+
+Uso:
+    python scripts/benchmarks/bench_rate_limiter.py
+    python scripts/benchmarks/bench_rate_limiter.py --requests 5000 --attackers 20 --latency-ms 10
+    python scripts/benchmarks/bench_rate_limiter.py --spacing-min 7 --spaced-hours 48
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from supaclient import SupabaseClient  # noqa: E402
+from supabase_stub import SupabaseStub  # noqa: E402
+
+ENDPOINT = "/functions/update-tracking"
+N8N_IP = "203.0.113.10"
+
+# (maxAttempts, blockDurationMinutes), do mais severo para o mais leve
+RATE_LIMITS_DESC = [(10, 1440), (5, 60), (3, 15)]
+FAILURE_WINDOW_MINUTES = 60
+MAX_TRACKED_FAILURES = max(limit for limit, _ in RATE_LIMITS_DESC)
+
+# Chamada: (ip, token válido, segundos somados ao relógio real)
+Call = Tuple[str, bool, float]
+
+
+def iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+class RateLimiter:
+    """Mesmas consultas e decisões do rate-limiter.ts para um isolate"""
+
+    def __init__(self, client: SupabaseClient, mode: str, cache_ttl_s: float):
+        self.client = client
+        self.mode = mode
+        self.cache_ttl_s = cache_ttl_s
+        self.failures: Dict[str, List[float]] = {}  # chave -> horários das falhas na janela
+        self.block_cache: Dict[str, Tuple[Optional[str], float]] = {}  # ip -> (blocked_until, expira em)
+        self.offset = 0.0  # avanço do relógio virtual
+        self.blocks = 0
+
+    def now(self) -> float:
+        return time.time() + self.offset
+
+    async def check(self, ip: str) -> Optional[str]:
+        now = self.now()
+        cached = self.block_cache.get(ip) if self.mode == "memory" else None
+        if cached and cached[1] > now:
+            blocked_until = cached[0]
+        else:
+            rows = await self.client.aselect("auth_attempts", "blocked_until",
+                                             [("ip_address", f"eq.{ip}"), ("blocked_until", f"gt.{iso(now)}")],
+                                             order="blocked_until.desc", limit=1)
+            blocked_until = rows[0]["blocked_until"] if rows else None
+            if self.mode == "memory":
+                self.block_cache[ip] = (blocked_until, now + self.cache_ttl_s)
+        if blocked_until and datetime.fromisoformat(blocked_until).timestamp() > now:
+            return blocked_until
+        return None
+
+    async def count_recent_failures(self, ip: str) -> int:
+        since = iso(self.now() - FAILURE_WINDOW_MINUTES * 60)
+        rows = await self.client.aselect("auth_attempts", "id",
+                                         [("ip_address", f"eq.{ip}"), ("endpoint", f"eq.{ENDPOINT}"),
+                                          ("success", "eq.false"), ("attempted_at", f"gte.{since}")])
+        return len(rows)
+
+    async def recent_failure_times(self, ip: str) -> List[float]:
+        since = iso(self.now() - FAILURE_WINDOW_MINUTES * 60)
+        rows = await self.client.aselect("auth_attempts", "attempted_at",
+                                         [("ip_address", f"eq.{ip}"), ("endpoint", f"eq.{ENDPOINT}"),
+                                          ("success", "eq.false"), ("attempted_at", f"gte.{since}")],
+                                         order="attempted_at.asc")
+        return [datetime.fromisoformat(r["attempted_at"]).timestamp() for r in rows][-MAX_TRACKED_FAILURES:]
+
+    async def count_failure_in_memory(self, ip: str) -> int:
+        key = f"{ip}|{ENDPOINT}"
+        if key not in self.failures:
+            self.failures[key] = await self.recent_failure_times(ip)
+        now = self.now()
+        window_start = now - FAILURE_WINDOW_MINUTES * 60
+        times = [t for t in self.failures[key] if t >= window_start] + [now]
+        self.failures[key] = times[-MAX_TRACKED_FAILURES:]
+        return len(self.failures[key])
+
+    async def record_failure(self, ip: str) -> Optional[str]:
+        if self.mode == "memory":
+            failures = await self.count_failure_in_memory(ip)
+        else:
+            failures = await self.count_recent_failures(ip) + 1
+        blocked_until = None
+        for max_attempts, minutes in RATE_LIMITS_DESC:
+            if failures >= max_attempts:
+                blocked_until = iso(self.now() + minutes * 60)
+                break
+        # attempted_at é default now() no banco; o stub não aplica defaults
+        await self.client.ainsert("auth_attempts", {"ip_address": ip, "endpoint": ENDPOINT, "success": False,
+                                                    "blocked_until": blocked_until,
+                                                    "attempted_at": iso(self.now())})
+        if blocked_until:
+            self.blocks += 1
+        if self.mode == "memory" and blocked_until:
+            self.block_cache[ip] = (blocked_until, self.now() + self.cache_ttl_s)
+        return blocked_until
+
+    async def record_success(self, ip: str):
+        if self.mode == "memory":
+            return
+        await self.client.ainsert("auth_attempts", {"ip_address": ip, "endpoint": ENDPOINT, "success": True,
+                                                    "blocked_until": None, "attempted_at": iso(self.now())})
+
+
+async def handle(limiter: RateLimiter, ip: str, valid_token: bool) -> int:
+    """Fluxo de autenticação das Edge Functions; devolve o status HTTP"""
+    if await limiter.check(ip):
+        return 429
+    if not valid_token:
+        await limiter.record_failure(ip)
+        return 401
+    await limiter.record_success(ip)
+    return 200
+
+
+def make_traffic(requests: int, attackers: int, attack_ratio: float, seed: int) -> List[Call]:
+    rng = random.Random(seed)
+    ips = [f"198.51.100.{i + 1}" for i in range(attackers)]
+    return [(rng.choice(ips), False, 0.0) if ips and rng.random() < attack_ratio else (N8N_IP, True, 0.0)
+            for _ in range(requests)]
+
+
+def make_spaced_traffic(attackers: int, spacing_min: float, hours: float) -> List[Call]:
+    """Uma falha por atacante a cada spacing_min minutos, com o n8n entre elas"""
+    ips = [f"198.51.100.{i + 1}" for i in range(attackers)]
+    calls = []
+    for step in range(int(hours * 60 / spacing_min) + 1):
+        offset = step * spacing_min * 60
+        calls.append((N8N_IP, True, offset))
+        calls.extend((ip, False, offset) for ip in ips)
+    return calls
+
+
+def run_mode(mode: str, traffic: List[Call], args) -> Dict:
+    with SupabaseStub(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed) as stub:
+        stub.state.seed_table("auth_attempts", [])
+        stub.state.reset_metrics()
+        client = SupabaseClient(stub.url, "stub-key", concurrency=1)
+        limiter = RateLimiter(client, mode, args.cache_ttl_s)
+
+        async def replay():
+            statuses = []
+            for ip, valid, offset in traffic:
+                limiter.offset = offset
+                statuses.append(await handle(limiter, ip, valid))
+            return statuses
+
+        started = time.perf_counter()
+        statuses = client.run(replay())
+        elapsed = time.perf_counter() - started
+        client.close()
+
+        endpoints = stub.state.latency_summary()["endpoints"]
+        reads = sum(n for endpoint, n in endpoints.items() if endpoint.startswith("GET"))
+        writes = sum(n for endpoint, n in endpoints.items() if endpoint.startswith("POST"))
+        rows = len(stub.state.tables["auth_attempts"])
+        return {"elapsed": elapsed, "statuses": statuses, "reads": reads, "writes": writes, "rows": rows,
+                "blocks": limiter.blocks}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do rate limiter (modo db vs memory)")
+    parser.add_argument("--requests", type=int, default=2000, help="Chamadas autenticadas (default: 2000)")
+    parser.add_argument("--attackers", type=int, default=5, help="IPs mandando token errado (default: 5)")
+    parser.add_argument("--attack-ratio", type=float, default=0.02,
+                        help="Fracao das chamadas vinda dos atacantes (default: 0.02)")
+    parser.add_argument("--cache-ttl-s", type=float, default=30.0,
+                        help="TTL do cache de decisoes (RATE_LIMIT_CACHE_TTL_SECONDS, default: 30)")
+    parser.add_argument("--latency-ms", type=float, default=2.0,
+                        help="Round trip Edge Function -> banco por requisicao (default: 2)")
+    parser.add_argument("--jitter-ms", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spacing-min", type=float, nargs="+", default=[20, 6],
+                        help="Minutos entre as falhas de cada atacante nos trafegos espacados (default: 20 6)")
+    parser.add_argument("--spaced-hours", type=float, default=30,
+                        help="Duracao do trafego espacado em horas de relogio virtual (default: 30)")
+    args = parser.parse_args()
+
+    scenarios = {"rajada": make_traffic(args.requests, args.attackers, args.attack_ratio, args.seed)}
+    for spacing in args.spacing_min:
+        scenarios[f"espacado {spacing:g} min"] = make_spaced_traffic(args.attackers, spacing, args.spaced_hours)
+    ok = True
+    for name, traffic in scenarios.items():
+        failures = sum(not valid for _, valid, _ in traffic)
+        print(f"Trafego {name}: {len(traffic)} chamadas, {failures} com token errado de {args.attackers} IPs "
+              f"(latencia {args.latency_ms}ms + jitter {args.jitter_ms}ms)")
+
+        runs = {}
+        for mode in ("db", "memory"):
+            runs[mode] = run = run_mode(mode, traffic, args)
+            n = len(traffic)
+            print(f"  {mode:<7} {run['elapsed']:>7.2f}s  leituras {run['reads']:>6} ({run['reads'] / n:.3f}/chamada)  "
+                  f"escritas {run['writes']:>6} ({run['writes'] / n:.3f}/chamada)  "
+                  f"linhas novas em auth_attempts {run['rows']:>6}  "
+                  f"200/401/429 = {run['statuses'].count(200)}/{run['statuses'].count(401)}/"
+                  f"{run['statuses'].count(429)}  bloqueios {run['blocks']}")
+
+        db, memory = runs["db"], runs["memory"]
+        print(f"  memory: {db['reads'] - memory['reads']} leituras e {db['writes'] - memory['writes']} escritas "
+              f"a menos em auth_attempts")
+        if db["statuses"] != memory["statuses"] or db["blocks"] != memory["blocks"]:
+            diverged = sum(a != b for a, b in zip(db["statuses"], memory["statuses"]))
+            print(f"  ❌ Respostas divergentes entre os modos em {diverged} chamadas, "
+                  f"bloqueios {db['blocks']} vs {memory['blocks']}\n")
+            ok = False
+        else:
+            print("  ✅ Mesmas respostas (200/401/429) e bloqueios nos dois modos\n")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
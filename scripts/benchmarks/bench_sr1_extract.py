@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do extrator da aba SR1 (audit_cargo_data.parse_sr1_sheet).
+
+Gera uma planilha "Dados" grande e sintética, roda o extrator streaming atual e
+a implementação anterior (pandas.read_excel + iterrows), confere que os dois
+devolvem exatamente a mesma lista e imprime os tempos.
+
+Uso:
+    python scripts/benchmarks/bench_sr1_extract.py
+    python scripts/benchmarks/bench_sr1_extract.py --rows 200000 --repeat 3
+    python scripts/benchmarks/bench_sr1_extract.py --workbook "C:\\IMPORTAÇÕES\\...\\Dados 930.xlsx"
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import pandas as pd  # noqa: E402
+from openpyxl import Workbook  # noqa: E402
+
+from audit_cargo_data import parse_sr1_sheet  # noqa: E402
+
+
+def legacy_parse_sr1_sheet(spreadsheet_path: Path) -> List[Dict]:
+    """Implementação anterior (pandas + iterrows), usada como referência"""
+    df = pd.read_excel(spreadsheet_path, sheet_name='SR1', engine='openpyxl')
+
+    if len(df.columns) < 5:
+        return []
+
+    ship_date_col = df.columns[2]
+    so_col = df.columns[4]
+    so_map: Dict[str, Optional[datetime]] = {}
+
+    for idx, row in df.iterrows():
+        ship_date = row[ship_date_col]
+        so_number = row[so_col]
+
+        if pd.isna(so_number) or str(so_number).strip() == '':
+            continue
+
+        if isinstance(so_number, float):
+            so_str = str(int(so_number))
+        else:
+            so_str = str(so_number).strip()
+
+        if so_str in so_map and so_map[so_str] is not None:
+            continue
+
+        parsed_date = None
+        if not pd.isna(ship_date):
+            if isinstance(ship_date, datetime):
+                parsed_date = ship_date
+            elif isinstance(ship_date, str):
+                for fmt in ['%m/%d/%Y %I:%M:%S %p', '%d/%m/%Y', '%Y-%m-%d']:
+                    try:
+                        parsed_date = datetime.strptime(ship_date.strip(), fmt)
+                        break
+                    except ValueError:
+                        continue
+
+        if so_str not in so_map or (parsed_date is not None and so_map[so_str] is None):
+            so_map[so_str] = parsed_date
+
+    return [{'so': so, 'ship_date': date} for so, date in so_map.items()]
+
+
+def generate_workbook(path: Path, rows: int, seed: int = 42) -> None:
+    """
+    Planilha no layout do SR1 exportado pela FedEx: Ship Date na coluna C e SO
+    na coluna E, com SOs repetidas, datas em célula de data e em texto nos três
+    formatos aceitos, além de linhas vazias e valores NA.
+    """
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('SR1')
+    ws.append(['Tracking', 'Service', 'Ship Date', 'Recipient', 'Sales Order', 'Weight', 'Reference'])
+
+    base = datetime(2026, 1, 1)
+    so_pool = [23200000 + i for i in range(max(rows // 4, 1))]
+
+    for i in range(rows):
+        dt = base + timedelta(days=rng.randint(0, 120), seconds=rng.randint(0, 86399))
+        kind = rng.random()
+        if kind < 0.45:
+            ship_date = dt
+        elif kind < 0.65:
+            ship_date = dt.strftime('%m/%d/%Y %I:%M:%S %p')
+        elif kind < 0.80:
+            ship_date = dt.strftime('%d/%m/%Y')
+        elif kind < 0.90:
+            ship_date = dt.strftime('%Y-%m-%d')
+        elif kind < 0.95:
+            ship_date = 'N/A'
+        else:
+            ship_date = None
+
+        so = rng.choice(so_pool)
+        so_kind = rng.random()
+        if so_kind < 0.97:
+            so_value = so
+        elif so_kind < 0.99:
+            so_value = None
+        else:
+            so_value = 'NA'
+
+        ws.append([
+            f'7{rng.randint(10**10, 10**11 - 1)}', 'INTL PRIORITY', ship_date,
+            'SINTESE BIOTECNOLOGIA', so_value, round(rng.uniform(0.5, 40), 2), f'REF{i}',
+        ])
+
+    wb.save(path)
+
+
+def timed(fn, path: Path, repeat: int):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do extrator SR1')
+    parser.add_argument('--rows', type=int, default=50000, help='Linhas da planilha sintetica (default: 50000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticoes por implementacao (melhor tempo)')
+    parser.add_argument('--workbook', help='Usa uma planilha existente em vez de gerar uma')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.workbook:
+            path = Path(args.workbook)
+        else:
+            path = Path(tmp) / 'Dados 999.xlsx'
+            print(f"Gerando planilha sintetica com {args.rows:,} linhas...")
+            generate_workbook(path, args.rows)
+
+        size_mb = path.stat().st_size / 1024 / 1024
+        print(f"Planilha: {path.name} ({size_mb:.1f} MB)")
+
+        legacy_time, legacy_result = timed(legacy_parse_sr1_sheet, path, args.repeat)
+        stream_time, stream_result = timed(parse_sr1_sheet, path, args.repeat)
+
+    if stream_result != legacy_result:
+        print("ERRO: resultado do extrator streaming difere da implementacao pandas")
+        sys.exit(1)
+
+    print(f"SOs unicas:        {len(stream_result):,}")
+    print(f"pandas + iterrows: {legacy_time:8.3f}s")
+    print(f"streaming:         {stream_time:8.3f}s")
+    print(f"Speedup:           {legacy_time / stream_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Paridade e micro-benchmark de translate_fedex_status (scripts/translations.py).
+
+Compara com a busca linear original do translateFedExStatus (lowercase de
+cada chave a cada chamada) sobre os status de fedex_statuses.txt:
+
+  - paridade: corpus, variações de caixa, status com prefixo/sufixo e pares
+    de chaves (a ordem de STATUS_TRANSLATIONS decide quem vence); sai com 1
+    se algum resultado divergir
+  - stream: --calls chamadas sorteadas do corpus com peso 1/posição (poucos
+    status muito repetidos, como nas 4 chamadas por SO do update-tracking)
+  - unicos: o mesmo stream com um sufixo diferente em cada chamada, sem
+    acerto no cache (custo do matcher em si)
+
+O equivalente para o TS das Edge Functions é bench_status_translation.ts
+(deno run --allow-read).
+
+Uso:
+    python scripts/benchmarks/bench_status_translation.py
+    python scripts/benchmarks/bench_status_translation.py --calls 1000000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from translations import STATUS_TRANSLATIONS, _translate, translate_fedex_status  # noqa: E402
+
+CORPUS_FILE = Path(__file__).resolve().parent / "fedex_statuses.txt"
+
+
+def legacy_translate(status):
+    """translateFedExStatus antes do matcher compilado"""
+    if not status:
+        return status
+    if STATUS_TRANSLATIONS.get(status):
+        return STATUS_TRANSLATIONS[status]
+    status_lower = status.lower()
+    for key, value in STATUS_TRANSLATIONS.items():
+        if key.lower() in status_lower:
+            return value
+    return status
+
+
+def load_corpus(path: Path) -> List[str]:
+    lines = (line.strip() for line in path.read_text(encoding="utf-8").splitlines())
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def parity_cases(corpus: List[str]) -> List[str]:
+    keys = list(STATUS_TRANSLATIONS)
+    cases = ["", " ", "Status desconhecido"]
+    for text in corpus + keys:
+        cases += [text, text.lower(), text.upper(), f"{text} - MEMPHIS, TN", f"Shipment: {text}"]
+    cases += [f"{a} / {b}" for a in keys for b in keys]
+    return cases
+
+
+def timed(fn: Callable, stream: List[str]) -> float:
+    started = time.perf_counter()
+    for status in stream:
+        fn(status)
+    return (time.perf_counter() - started) / len(stream) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridade e micro-benchmark do translate_fedex_status")
+    parser.add_argument("--calls", type=int, default=200_000, help="Chamadas por medicao (default: 200000)")
+    parser.add_argument("--corpus", type=Path, default=CORPUS_FILE, help="Um status por linha")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    cases = parity_cases(corpus)
+    diverged = [(c, legacy_translate(c), translate_fedex_status(c)) for c in cases
+                if legacy_translate(c) != translate_fedex_status(c)]
+    print(f"Paridade: {len(cases)} casos, {len(diverged)} divergencias")
+    for case, old, new in diverged[:10]:
+        print(f"  {case!r}: {old!r} -> {new!r}")
+    if diverged:
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    weights = [1 / (rank + 1) for rank in range(len(corpus))]
+    ranked = rng.sample(corpus, len(corpus))
+    stream = rng.choices(ranked, weights=weights, k=args.calls)
+    unique = [f"{status} #{i}" for i, status in enumerate(stream)]
+    print(f"{len(corpus)} status no corpus, {args.calls} chamadas, "
+          f"{len(set(stream))} distintos no stream\n")
+
+    print(f"{'':<20}{'stream':>12}{'unicos':>12}")
+    results = {}
+    for name, fn in (("linear (anterior)", legacy_translate), ("compilado + LRU", translate_fedex_status)):
+        _translate.cache_clear()
+        on_stream = timed(fn, stream)
+        info = _translate.cache_info()
+        _translate.cache_clear()
+        results[name] = (on_stream, timed(fn, unique))
+        print(f"{name:<20}{results[name][0]:>9.0f} ns{results[name][1]:>9.0f} ns")
+    print(f"\nLRU no stream: {info.hits / args.calls:.1%} acertos (maxsize {info.maxsize})")
+    old, new = results["linear (anterior)"], results["compilado + LRU"]
+    print(f"stream {old[0] / new[0]:.1f}x mais rapido, unicos {old[1] / new[1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+// Paridade e micro-benchmark do translateFedExStatus das Edge Functions
+// (supabase/functions/_shared/translations.ts) contra a busca linear anterior,
+// com os mesmos casos e streams de bench_status_translation.py.
+//
+// Uso:
+//   deno run --allow-read scripts/benchmarks/bench_status_translation.ts
+//   deno run --allow-read scripts/benchmarks/bench_status_translation.ts 1000000
+
+import { STATUS_TRANSLATIONS, translateFedExStatus } from '../../supabase/functions/_shared/translations.ts';
+
+// translateFedExStatus antes do matcher compilado
+function legacyTranslate(status: string): string {
+  if (!status) return status;
+  if (STATUS_TRANSLATIONS[status]) {
+    return STATUS_TRANSLATIONS[status];
+  }
+  const statusLower = status.toLowerCase();
+  for (const [key, value] of Object.entries(STATUS_TRANSLATIONS)) {
+    if (statusLower.includes(key.toLowerCase())) {
+      return value;
+    }
+  }
+  return status;
+}
+
+function loadCorpus(): string[] {
+  const text = Deno.readTextFileSync(new URL('./fedex_statuses.txt', import.meta.url));
+  return text.split('\n').map((line) => line.trim()).filter((line) => line && !line.startsWith('#'));
+}
+
+function parityCases(corpus: string[]): string[] {
+  const keys = Object.keys(STATUS_TRANSLATIONS);
+  const cases = ['', ' ', 'Status desconhecido'];
+  for (const text of [...corpus, ...keys]) {
+    cases.push(text, text.toLowerCase(), text.toUpperCase(), `${text} - MEMPHIS, TN`, `Shipment: ${text}`);
+  }
+  for (const a of keys) {
+    for (const b of keys) cases.push(`${a} / ${b}`);
+  }
+  return cases;
+}
+
+// PRNG determinístico (mulberry32) para o stream ser o mesmo a cada execução
+function random(seed: number): () => number {
+  return () => {
+    seed = (seed + 0x6d2b79f5) | 0;
+    let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+    t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+// Chamadas sorteadas do corpus com peso 1/posição
+function makeStream(corpus: string[], calls: number, rng: () => number): string[] {
+  const cumulative: number[] = [];
+  let total = 0;
+  corpus.forEach((_, rank) => cumulative.push(total += 1 / (rank + 1)));
+  const stream: string[] = [];
+  for (let i = 0; i < calls; i++) {
+    const target = rng() * total;
+    stream.push(corpus[cumulative.findIndex((value) => value >= target)]);
+  }
+  return stream;
+}
+
+function timed(fn: (status: string) => string, stream: string[]): number {
+  for (let i = 0; i < Math.min(stream.length, 10000); i++) fn(stream[i]); // aquecimento do JIT
+  const started = performance.now();
+  for (const status of stream) fn(status);
+  return ((performance.now() - started) * 1e6) / stream.length;
+}
+
+const calls = Number(Deno.args[0] ?? '200000');
+const corpus = loadCorpus();
+
+const cases = parityCases(corpus);
+const diverged = cases.filter((c) => legacyTranslate(c) !== translateFedExStatus(c));
+console.log(`Paridade: ${cases.length} casos, ${diverged.length} divergencias`);
+for (const c of diverged.slice(0, 10)) {
+  console.log(`  ${JSON.stringify(c)}: ${legacyTranslate(c)} -> ${translateFedExStatus(c)}`);
+}
+if (diverged.length) Deno.exit(1);
+
+const stream = makeStream(corpus, calls, random(0));
+const unique = stream.map((status, i) => `${status} #${i}`);
+console.log(`${corpus.length} status no corpus, ${calls} chamadas\n`);
+
+console.log(`${''.padEnd(20)}${'stream'.padStart(12)}${'unicos'.padStart(12)}`);
+const results: Record<string, number[]> = {};
+for (const [name, fn] of [['linear (anterior)', legacyTranslate], ['compilado + LRU', translateFedExStatus]] as const) {
+  results[name] = [timed(fn, stream), timed(fn, unique)];
+  console.log(`${name.padEnd(20)}${results[name][0].toFixed(0).padStart(9)} ns${results[name][1].toFixed(0).padStart(9)} ns`);
+}
+const [old, compiled] = [results['linear (anterior)'], results['compilado + LRU']];
+console.log(`\nstream ${(old[0] / compiled[0]).toFixed(1)}x mais rapido, unicos ${(old[1] / compiled[1]).toFixed(1)}x`);
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Simulação da agenda de tracking: a cada 4h (workflow) vs agenda adaptativa.
+
+Gera --sos SOs que entram na fila ao longo de --days dias e percorrem os
+estágios de uma importação (trânsito -> armazém em Miami -> trânsito ->
+desembaraço -> entregue). A duração de cada estágio é lognormal com mediana
+em 80% do SLA (tracking_scheduler.STAGE_SLA_BUSINESS_DAYS) e --stuck das SOs
+(padrão 10%) ficam presas no desembaraço por semanas. Uma SO sai da fila
+quando a consulta vê "Delivered", como acontece com
+v_envios_pendentes_tracking.
+
+  - fixed:    todas as SOs pendentes a cada 4h (Schedule Trigger)
+  - adaptive: worker acordando a cada --tick-min minutos e consultando só as
+              SOs vencidas no TrackingSchedule (SQLite em memória)
+
+Não há HTTP: o relógio é simulado e cada consulta devolve o status
+verdadeiro naquele instante. Reporta consultas por dia e o atraso entre cada
+mudança de estágio e a consulta que a detectou (médio e p95).
+
+Uso:
+    python scripts/benchmarks/bench_tracking_scheduler.py
+    python scripts/benchmarks/bench_tracking_scheduler.py --sos 3000 --days 60 --stuck 0.2
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from supabase_stub import percentile  # noqa: E402
+from tracking_scheduler import (HOUR, LEGACY_INTERVAL, STALE_INTERVAL, TrackingSchedule,  # noqa: E402
+                                sla_seconds)
+from translations import (STAGE_CLEARANCE, STAGE_DELIVERED, STAGE_IN_TRANSIT,  # noqa: E402
+                          STAGE_WAREHOUSE, map_to_logical_stage)
+
+DAY = 24 * HOUR
+START = 1_790_000_000.0  # epoch arbitrário (out/2026)
+
+# (estágio, status FedEx, localização) na ordem da jornada
+JOURNEY = [
+    (STAGE_IN_TRANSIT, "Departed FedEx location", "SHANGHAI, CN"),
+    (STAGE_WAREHOUSE, "Arrived at FedEx location", "MIAMI, FL, US"),
+    (STAGE_IN_TRANSIT, "In transit", "ANCHORAGE, AK, US"),
+    (STAGE_CLEARANCE, "In clearance", "CAMPINAS, SP, BR"),
+    (STAGE_DELIVERED, "Delivered", "SAO PAULO, SP, BR"),
+]
+
+# Timeline de uma SO: [(início, status, localização), ...]
+Timeline = List[Tuple[float, str, str]]
+
+
+def make_timelines(sos: int, days: float, stuck: float, seed: int) -> Dict[str, Timeline]:
+    rng = random.Random(seed)
+    timelines = {}
+    for i in range(sos):
+        t = START + rng.uniform(0, days * DAY)
+        events = []
+        for k, (stage, status, location) in enumerate(JOURNEY):
+            events.append((t, status, location))
+            if stage == STAGE_DELIVERED:
+                break
+            duration = sla_seconds(stage) * rng.lognormvariate(math.log(0.8), 0.5)
+            if stage == STAGE_CLEARANCE and rng.random() < stuck:
+                duration *= rng.uniform(4, 10)
+            t += duration
+        timelines[str(23_000_000 + i)] = events
+    return timelines
+
+
+def status_at(timeline: Timeline, now: float) -> Tuple[int, float, str, str]:
+    """(índice do evento, início, status, localização) vigente em `now`"""
+    index = 0
+    for k, event in enumerate(timeline):
+        if event[0] <= now:
+            index = k
+    start, status, location = timeline[index]
+    return index, start, status, location
+
+
+class Simulation:
+    """Conta consultas e atrasos de detecção de uma política"""
+
+    def __init__(self, timelines: Dict[str, Timeline]):
+        self.timelines = timelines
+        self.polls = 0
+        self.seen: Dict[str, int] = {}          # último evento visto por SO
+        self.delays: Dict[str, List[float]] = {}
+        self.done = set()
+
+    def pending(self, now: float) -> List[Dict]:
+        return [{"sales_order": so, "tracking_numbers": so, "created_at": tl[0][0]}
+                for so, tl in self.timelines.items() if tl[0][0] <= now and so not in self.done]
+
+    def poll(self, so: str, now: float) -> Tuple[str, str, float]:
+        self.polls += 1
+        timeline = self.timelines[so]
+        index, start, status, location = status_at(timeline, now)
+        previous = self.seen.get(so, -1)
+        for k in range(previous + 1, index + 1):
+            if k > 0:  # o primeiro evento é a entrada na fila
+                stage = map_to_logical_stage(timeline[k][1], timeline[k][2])
+                self.delays.setdefault(stage, []).append(now - timeline[k][0])
+        self.seen[so] = index
+        if map_to_logical_stage(status, location) == STAGE_DELIVERED:
+            self.done.add(so)
+        return status, location, start
+
+
+def run_fixed(timelines: Dict[str, Timeline], horizon: float) -> Simulation:
+    sim = Simulation(timelines)
+    now = START
+    while now <= horizon:
+        for row in sim.pending(now):
+            sim.poll(row["sales_order"], now)
+        now += LEGACY_INTERVAL
+    return sim
+
+
+def run_adaptive(timelines: Dict[str, Timeline], horizon: float, tick: float) -> Simulation:
+    sim = Simulation(timelines)
+    schedule = TrackingSchedule(None)
+    now = START
+    while now <= horizon:
+        schedule.sync(sim.pending(now), now)
+        for entry in schedule.due(now):
+            status, location, changed_at = sim.poll(entry["sales_order"], now)
+            schedule.record(entry["sales_order"], status, location, changed_at=changed_at, now=now)
+        schedule.commit()
+        now += tick
+    schedule.close()
+    return sim
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulacao da agenda de tracking (4h fixas vs adaptativa)")
+    parser.add_argument("--sos", type=int, default=1000, help="SOs simuladas (default: 1000)")
+    parser.add_argument("--days", type=float, default=30, help="Dias ao longo dos quais as SOs entram na fila")
+    parser.add_argument("--stuck", type=float, default=0.1,
+                        help="Fracao das SOs presas no desembaraco por 4-10x o SLA (default: 0.1)")
+    parser.add_argument("--tick-min", type=float, default=15, help="Intervalo do worker adaptativo em minutos")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    timelines = make_timelines(args.sos, args.days, args.stuck, args.seed)
+    horizon = max(tl[-1][0] for tl in timelines.values()) + STALE_INTERVAL
+    sim_days = (horizon - START) / DAY
+    print(f"{args.sos} SOs entrando ao longo de {args.days:g} dias, {args.stuck:.0%} presas no desembaraco; "
+          f"{sim_days:.0f} dias simulados\n")
+
+    results = {}
+    for name, runner in (("fixed", lambda: run_fixed(timelines, horizon)),
+                         ("adaptive", lambda: run_adaptive(timelines, horizon, args.tick_min * 60))):
+        started = time.perf_counter()
+        sim = runner()
+        results[name] = sim
+        all_delays = [d for values in sim.delays.values() for d in values]
+        print(f"{name:<9} consultas {sim.polls:>8} ({sim.polls / sim_days:>7.0f}/dia)  "
+              f"atraso de deteccao medio {sum(all_delays) / len(all_delays) / HOUR:>5.1f}h  "
+              f"p95 {percentile(all_delays, 95) / HOUR:>5.1f}h  ({time.perf_counter() - started:.1f}s)")
+        for stage, values in sorted(sim.delays.items()):
+            print(f"    {stage:<16} {len(values):>6} mudancas  medio {sum(values) / len(values) / HOUR:>5.1f}h  "
+                  f"p95 {percentile(values, 95) / HOUR:>5.1f}h")
+
+    fixed, adaptive = results["fixed"], results["adaptive"]
+    print(f"\nadaptive: {1 - adaptive.polls / fixed.polls:.0%} menos consultas que a cada 4h")
+    if len(adaptive.done) != len(timelines):
+        print(f"❌ {len(timelines) - len(adaptive.done)} SOs entregues nao detectadas pela agenda")
+        sys.exit(1)
+    print("✅ Todas as entregas detectadas nas duas politicas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stub HTTP local da API da FedEx para testar o fedex_tracking_worker offline.
+
+Implementa:
+  - POST /oauth/token (client_credentials, form-urlencoded): access_token com
+    expires_in = token_ttl_s
+  - POST /track/v1/trackingnumbers: até MAX_TRACKING_NUMBERS números por
+    chamada (400 acima disso), Bearer obrigatório e válido (401 se ausente ou
+    expirado); resposta no formato completeTrackResults da API real
+
+O status de cada tracking number é determinístico (hash do número), então
+rodadas repetidas dão o mesmo resultado. Números começando com "000" não
+existem (erro TRACKING.TRACKINGNUMBER.NOTFOUND no trackResult, como a API).
+Com rate_per_s, chamadas acima do limite recebem 429 com Retry-After.
+
+Uso standalone:
+    python scripts/benchmarks/fedex_stub.py --port 54330 --latency-ms 150
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from supabase_stub import percentile
+
+MAX_TRACKING_NUMBERS = 30
+
+# (code, derivedCode, descrição, cidade, estado, país), na ordem da jornada
+STAGES = [
+    ("PU", "PU", "Picked up", "SHANGHAI", "", "CN"),
+    ("IT", "IT", "In transit", "ANCHORAGE", "AK", "US"),
+    ("AR", "IT", "Arrived at FedEx location", "MEMPHIS", "TN", "US"),
+    ("DP", "IT", "Departed FedEx location", "MEMPHIS", "TN", "US"),
+    ("OD", "OD", "On FedEx vehicle for delivery", "MIAMI", "FL", "US"),
+    ("DL", "DL", "Delivered", "MIAMI", "FL", "US"),
+]
+
+BASE_DATE = datetime(2026, 10, 1, 8, 0, 0, tzinfo=timezone(timedelta(hours=-4)))
+
+
+def tracking_stage(number: str) -> Optional[int]:
+    """Índice em STAGES do status atual do número (None = não encontrado)"""
+    if number.startswith("000"):
+        return None
+    return zlib.crc32(number.encode("utf-8")) % len(STAGES)
+
+
+def track_result(number: str) -> Dict:
+    stage = tracking_stage(number)
+    info = {"trackingNumberInfo": {"trackingNumber": number, "carrierCode": "FDXE"}}
+    if stage is None:
+        info["error"] = {"code": "TRACKING.TRACKINGNUMBER.NOTFOUND",
+                         "message": "Tracking number cannot be found. Please correct the tracking number and try again."}
+        return info
+
+    start = BASE_DATE + timedelta(hours=zlib.crc32(number[::-1].encode("utf-8")) % 240)
+    events = []
+    for k in range(stage, -1, -1):  # mais recente primeiro, como a API
+        code, derived, description, city, state, country = STAGES[k]
+        events.append({
+            "date": (start + timedelta(hours=18 * k)).isoformat(),
+            "eventType": code,
+            "eventDescription": description,
+            "derivedStatus": description if code in ("PU", "DL") else "In transit",
+            "scanLocation": {"city": city, "stateOrProvinceCode": state, "countryCode": country},
+        })
+    code, derived, description, city, state, country = STAGES[stage]
+    info.update({
+        "latestStatusDetail": {
+            "code": code,
+            "derivedCode": derived,
+            "statusByLocale": description,
+            "description": description,
+            "scanLocation": {"city": city, "stateOrProvinceCode": state, "countryCode": country},
+        },
+        "scanEvents": events,
+        "weightAndDimensions": {
+            "weight": [{"value": "12.5", "unit": "KG"}, {"value": "27.6", "unit": "LB"}],
+            "dimensions": [{"length": 40, "width": 30, "height": 25, "units": "CM"}],
+        },
+    })
+    if code == "DL":
+        info["deliveryDetails"] = {"actualDeliveryTimestamp": events[0]["date"]}
+    return info
+
+
+class FedExStubState:
+    """Tokens emitidos, contadores e latência, compartilhados entre threads"""
+
+    def __init__(self, client_id: str = "stub-client", client_secret: str = "stub-secret",
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, token_ttl_s: int = 3600,
+                 rate_per_s: float = 0.0, seed: int = 0):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.token_ttl_s = token_ttl_s
+        self.rate_per_s = rate_per_s
+        self.lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self.tokens: Dict[str, float] = {}
+        self.samples: List[Tuple[str, float]] = []
+        self.token_requests = 0
+        self.track_requests = 0
+        self.tracked_numbers = 0
+        self.rate_limited = 0
+        self._window: List[float] = []
+
+    def delay(self):
+        if self.latency_ms <= 0 and self.jitter_ms <= 0:
+            return
+        with self.lock:
+            jitter = self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        time.sleep((self.latency_ms + jitter) / 1000)
+
+    def over_rate(self) -> bool:
+        """True se a chamada passa do limite de rate_per_s (janela de 1s)"""
+        if self.rate_per_s <= 0:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.rate_per_s:
+                self.rate_limited += 1
+                return True
+            self._window.append(now)
+            return False
+
+    def summary(self) -> Dict:
+        with self.lock:
+            durations = [s for _, s in self.samples]
+            return {
+                "requests": len(durations),
+                "token_requests": self.token_requests,
+                "track_requests": self.track_requests,
+                "tracked_numbers": self.tracked_numbers,
+                "rate_limited": self.rate_limited,
+                "p50_ms": percentile(durations, 50) * 1000,
+                "p95_ms": percentile(durations, 95) * 1000,
+            }
+
+
+class FedExStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FedExStub/1.0"
+    disable_nagle_algorithm = True
+
+    @property
+    def state(self) -> FedExStubState:
+        return self.server.state  # type: ignore[attr-defined]
+
+    def log_message(self, format, *args):  # noqa: A002 - silencioso
+        pass
+
+    def _send(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _errors(self, status: int, code: str, message: str, headers: Optional[Dict[str, str]] = None):
+        self._send(status, {"transactionId": str(uuid.uuid4()), "errors": [{"code": code, "message": message}]},
+                   headers)
+
+    def do_POST(self):
+        start = time.perf_counter()
+        path = urlsplit(self.path).path
+        endpoint = f"POST {path}"
+        try:
+            self.state.delay()
+            raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if path == "/oauth/token":
+                self._token(dict(parse_qsl(raw.decode("utf-8"))))
+            elif path == "/track/v1/trackingnumbers":
+                self._track(json.loads(raw or b"{}"))
+            else:
+                self._errors(404, "NOT.FOUND.ERROR", "The resource you requested is no longer available.")
+        except Exception as exc:  # pragma: no cover - depuração do stub
+            self._errors(500, "INTERNAL.SERVER.ERROR", str(exc))
+        finally:
+            with self.state.lock:
+                self.state.samples.append((endpoint, time.perf_counter() - start))
+
+    def _token(self, form: Dict[str, str]):
+        with self.state.lock:
+            self.state.token_requests += 1
+        if (form.get("grant_type") != "client_credentials" or form.get("client_id") != self.state.client_id
+                or form.get("client_secret") != self.state.client_secret):
+            self._errors(401, "NOT.AUTHORIZED.ERROR", "The given client credentials were not valid.")
+            return
+        token = uuid.uuid4().hex
+        with self.state.lock:
+            self.state.tokens[token] = time.monotonic() + self.state.token_ttl_s
+        self._send(200, {"access_token": token, "token_type": "bearer",
+                         "expires_in": self.state.token_ttl_s, "scope": "CXS"})
+
+    def _track(self, body: Dict):
+        token = self.headers.get("Authorization", "").replace("Bearer ", "", 1)
+        with self.state.lock:
+            expires = self.state.tokens.get(token)
+        if expires is None or expires <= time.monotonic():
+            self._errors(401, "NOT.AUTHORIZED.ERROR", "Access token expired. Please modify your request and try again.")
+            return
+        if self.state.over_rate():
+            self._errors(429, "RATE.LIMIT.EXCEEDED", "We have received too many requests in a short duration.",
+                         {"Retry-After": "1"})
+            return
+
+        numbers = [(item.get("trackingNumberInfo") or {}).get("trackingNumber")
+                   for item in body.get("trackingInfo") or []]
+        if not numbers or len(numbers) > MAX_TRACKING_NUMBERS or not all(numbers):
+            self._errors(400, "TRACKING.TRACKINGNUMBER.INVALID",
+                         f"Please provide between 1 and {MAX_TRACKING_NUMBERS} valid tracking numbers.")
+            return
+
+        with self.state.lock:
+            self.state.track_requests += 1
+            self.state.tracked_numbers += len(numbers)
+        self._send(200, {
+            "transactionId": self.headers.get("x-customer-transaction-id") or str(uuid.uuid4()),
+            "output": {"completeTrackResults": [
+                {"trackingNumber": n, "trackResults": [track_result(n)]} for n in numbers
+            ]},
+        })
+
+
+class FedExStub:
+    """Servidor stub em background (thread), para uso programático"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **options):
+        self.state = FedExStubState(**options)
+        self._server = ThreadingHTTPServer((host, port), FedExStubHandler)
+        self._server.daemon_threads = True
+        self._server.state = self.state  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FedExStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub local da API da FedEx (OAuth + Track)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54330)
+    parser.add_argument("--client-id", default="stub-client")
+    parser.add_argument("--client-secret", default="stub-secret")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia fixa por requisicao")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Jitter aleatorio adicional (0..N ms)")
+    parser.add_argument("--token-ttl-s", type=int, default=3600, help="expires_in dos tokens emitidos")
+    parser.add_argument("--rate-per-s", type=float, default=0.0, help="Responder 429 acima de N chamadas/s (0 = sem limite)")
+    args = parser.parse_args()
+
+    stub = FedExStub(args.host, args.port, client_id=args.client_id, client_secret=args.client_secret,
+                     latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, token_ttl_s=args.token_ttl_s,
+                     rate_per_s=args.rate_per_s)
+    print(f"FedEx stub ouvindo em {stub.url} (client_id {args.client_id}, latencia {args.latency_ms}ms)")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nEncerrando stub")
+    finally:
+        stub._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
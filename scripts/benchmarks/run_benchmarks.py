@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks ponta a ponta dos scripts Python contra um Supabase local (stub).
+
+Gera uma árvore "IMPORTAÇÃO 2026/CARGA n" sintética com milhares de planilhas,
+popula o stub (supabase_stub.py) com tabelas coerentes e executa cada script
+como subprocesso, exatamente como em produção. Para cada cenário reporta:
+
+  - tempo de parede e throughput (itens/s)
+  - requisições HTTP, req/s e latência p50/p95 medida no stub
+  - pico de memória (RSS) do processo
+
+Cenários: audit (audit_cargo_data.py), migrate (migrate_supabase.py),
+cleanup (cleanup_old_cargas.py), delete (delete_specific_sos.py), tracking
+(replay_tracking_updates.py contra o update-tracking do stub) e fedex
+(fedex_tracking_worker.py contra o stub da FedEx e o do Supabase).
+
+Uso:
+    python scripts/benchmarks/run_benchmarks.py
+    python scripts/benchmarks/run_benchmarks.py --cargos 500 --latency-ms 30 --jitter-ms 20
+    python scripts/benchmarks/run_benchmarks.py --only audit --audit-args "--workers 8"
+    python scripts/benchmarks/run_benchmarks.py --only tracking --tracking-args "--batch-size 1"
+    python scripts/benchmarks/run_benchmarks.py --only fedex --fedex-args "--rate 2"
+    python scripts/benchmarks/run_benchmarks.py --save baseline.json
+    python scripts/benchmarks/run_benchmarks.py --compare baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from fedex_stub import FedExStub, tracking_stage  # noqa: E402
+from supabase_stub import SupabaseStub, percentile  # noqa: E402
+from synthetic_data import (FIRST_SO, build_tables, generate_importacoes_tree,  # noqa: E402
+                            make_delete_sos, make_pending_tracking_rows, make_tracking_payloads)
+
+SCENARIOS = ["audit", "migrate", "cleanup", "delete", "tracking", "fedex"]
+STUB_KEY = "bench-service-role-key"
+
+
+def run_script(script: str, args: List[str], env: Dict[str, str], stdin: str,
+               log_path: Path) -> Tuple[int, float, Optional[float]]:
+    """
+    Executa um script e retorna (returncode, segundos, pico de RSS em MB).
+    O RSS vem de os.wait4 (ru_maxrss); em plataformas sem wait4 fica None.
+    """
+    cmd = [sys.executable, str(SCRIPTS_DIR / script)] + args
+    with open(log_path, "w", encoding="utf-8") as log:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=log, stderr=subprocess.STDOUT,
+                                env=env, cwd=str(SCRIPTS_DIR))
+        proc.stdin.write(stdin.encode("utf-8"))
+        proc.stdin.close()
+
+        if hasattr(os, "wait4"):
+            _, status, rusage = os.wait4(proc.pid, 0)
+            elapsed = time.perf_counter() - start
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss é KB no Linux e bytes no macOS
+            divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+            peak_rss = rusage.ru_maxrss / divisor
+        else:
+            proc.wait()
+            elapsed = time.perf_counter() - start
+            peak_rss = None
+    return proc.returncode, elapsed, peak_rss
+
+
+def base_env(url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONIOENCODING": "utf-8",
+        "SUPABASE_URL": url,
+        "SUPABASE_KEY": STUB_KEY,
+        "SUPABASE_SERVICE_ROLE_KEY": STUB_KEY,
+    })
+    return env
+
+
+def seed(stub: SupabaseStub, tables: Dict[str, List[Dict]]):
+    for table, rows in tables.items():
+        stub.state.seed_table(table, rows)
+    stub.state.reset_metrics()
+
+
+def scenario_audit(ctx: Dict) -> Dict:
+    with SupabaseStub(latency_ms=ctx["latency_ms"], jitter_ms=ctx["jitter_ms"]) as stub:
+        seed(stub, ctx["tables"])
+        args = ["--dry-run", "--no-cache", "--base-path", str(ctx["tree"]),
+                "--output", str(ctx["workdir"] / "audit_report.csv"),
+                "--results-db", str(ctx["workdir"] / "audit_results.sqlite")] + ctx["audit_args"]
+        rc, elapsed, rss = run_script("audit_cargo_data.py", args, base_env(stub.url), "",
+                                      ctx["workdir"] / "audit.log")
+        return {"returncode": rc, "wall_s": elapsed, "peak_rss_mb": rss,
+                "items": ctx["total_sos"], "unit": "SOs", **stub.state.latency_summary()}
+
+
+def scenario_migrate(ctx: Dict) -> Dict:
+    old = SupabaseStub(latency_ms=ctx["latency_ms"], jitter_ms=ctx["jitter_ms"]).start()
+    new = SupabaseStub(latency_ms=ctx["latency_ms"], jitter_ms=ctx["jitter_ms"],
+                       max_body_bytes=ctx["max_body_kb"] * 1024).start()
+    try:
+        seed(old, ctx["tables"])
+        seed(new, {table: [] for table in ctx["tables"]})
+        env = base_env(new.url)
+        env.update({
+            "OLD_PROJECT_URL": old.url,
+            "OLD_ANON_KEY": STUB_KEY,
+            "NEW_PROJECT_URL": new.url,
+            "NEW_ANON_KEY": STUB_KEY,
+            "NEW_SERVICE_ROLE_KEY": STUB_KEY,
+            "MIGRATION_DATA_DIR": str(ctx["workdir"] / "migration_data"),
+        })
+        rc, elapsed, rss = run_script("migrate_supabase.py", ctx["migrate_args"], env, "",
+                                      ctx["workdir"] / "migrate.log")
+
+        old_lat, new_lat = old.state.latency_summary(), new.state.latency_summary()
+        rows = sum(len(r) for r in ctx["tables"].values())
+        imported = sum(len(r) for r in new.state.tables.values())
+        if imported != rows and rc == 0:
+            rc = 2  # migração terminou mas não copiou tudo
+        # p50/p95 sobre as amostras dos dois projetos
+        samples = [s for _, s in old.state.samples] + [s for _, s in new.state.samples]
+        return {"returncode": rc, "wall_s": elapsed, "peak_rss_mb": rss, "items": rows, "unit": "linhas",
+                "requests": old_lat["requests"] + new_lat["requests"],
+                "p50_ms": percentile(samples, 50) * 1000, "p95_ms": percentile(samples, 95) * 1000,
+                "endpoints": {**{f"old:{k}": v for k, v in old_lat["endpoints"].items()},
+                              **{f"new:{k}": v for k, v in new_lat["endpoints"].items()}}}
+    finally:
+        old.stop()
+        new.stop()
+
+
+def scenario_cleanup(ctx: Dict) -> Dict:
+    from cleanup_old_cargas import THRESHOLD
+    with SupabaseStub(latency_ms=ctx["latency_ms"], jitter_ms=ctx["jitter_ms"]) as stub:
+        seed(stub, ctx["tables"])
+        expected = sum(1 for c in ctx["tables"]["cargas"] if int(c["numero_carga"]) < THRESHOLD)
+        rc, elapsed, rss = run_script("cleanup_old_cargas.py", [], base_env(stub.url), "SIM\n",
+                                      ctx["workdir"] / "cleanup.log")
+        remaining = sum(1 for c in stub.state.tables["cargas"] if int(c["numero_carga"]) < THRESHOLD)
+        if remaining and rc == 0:
+            rc = 2
+        return {"returncode": rc, "wall_s": elapsed, "peak_rss_mb": rss,
+                "items": expected, "unit": "cargas", **stub.state.latency_summary()}
+
+
+def scenario_delete(ctx: Dict) -> Dict:
+    targets = set(ctx["delete_sos"])
+    # Lista com 10% de SOs inexistentes, que devem ser ignoradas
+    sos_file = ctx["workdir"] / "sos_to_delete.txt"
+    missing = make_delete_sos(len(targets) // 10, start=FIRST_SO - 200000)
+    sos_file.write_text("\n".join(ctx["delete_sos"] + missing) + "\n", encoding="utf-8")
+    with SupabaseStub(latency_ms=ctx["latency_ms"], jitter_ms=ctx["jitter_ms"]) as stub:
+        seed(stub, ctx["tables"])
+        rc, elapsed, rss = run_script("delete_specific_sos.py", [str(sos_file)], base_env(stub.url), "SIM\n",
+                                      ctx["workdir"] / "delete.log")
+        remaining = sum(1 for e in stub.state.tables["envios_processados"] if e["sales_order"] in targets)
+        remaining += sum(1 for l in stub.state.tables["carga_sales_orders"] if l["so_number"] in targets)
+        if remaining and rc == 0:
+            rc = 2
+        return {"returncode": rc, "wall_s": elapsed, "peak_rss_mb": rss,
+                "items": len(targets), "unit": "SOs", **stub.state.latency_summary()}
+
+
+def scenario_tracking(ctx: Dict) -> Dict:
+    # Um payload do FedEx Scraper por SO da árvore, mais ~10% de SOs novas
+    payloads = make_tracking_payloads([e["sales_order"] for e in ctx["tables"]["envios_processados"]])
+    payload_file = ctx["workdir"] / "tracking_payloads.ndjson"
+    payload_file.write_text("".join(json.dumps(p) + "\n" for p in payloads), encoding="utf-8")
+    with SupabaseStub(latency_ms=ctx["latency_ms"], jitter_ms=ctx["jitter_ms"],
+                      db_latency_ms=ctx["db_latency_ms"]) as stub:
+        seed(stub, ctx["tables"])
+        env = base_env(stub.url)
+        env["N8N_SHARED_TOKEN"] = STUB_KEY
+        rc, elapsed, rss = run_script("replay_tracking_updates.py",
+                                      [str(payload_file), "--yes"] + ctx["tracking_args"], env, "",
+                                      ctx["workdir"] / "tracking.log")
+        by_so = {e["sales_order"]: e for e in stub.state.tables["envios_processados"]}
+        stale = sum(1 for p in payloads
+                    if by_so.get(p["sales_order"], {}).get("status_atual") != p["status_atual"])
+        if stale and rc == 0:
+            rc = 2
+        return {"returncode": rc, "wall_s": elapsed, "peak_rss_mb": rss,
+                "items": len(payloads), "unit": "SOs", **stub.state.latency_summary()}
+
+
+def scenario_fedex(ctx: Dict) -> Dict:
+    # SOs da árvore pendentes de tracking, com números compartilhados, múltiplos e inexistentes
+    envios = [dict(e, status_atual="Pendente") for e in ctx["tables"]["envios_processados"]]
+    pending = make_pending_tracking_rows(envios)
+    tables = dict(ctx["tables"], envios_processados=envios, v_envios_pendentes_tracking=pending)
+    with SupabaseStub(latency_ms=ctx["latency_ms"], jitter_ms=ctx["jitter_ms"],
+                      db_latency_ms=ctx["db_latency_ms"]) as stub, \
+            FedExStub(latency_ms=ctx["fedex_latency_ms"], jitter_ms=ctx["jitter_ms"]) as fedex:
+        seed(stub, tables)
+        env = base_env(stub.url)
+        env.update({"N8N_SHARED_TOKEN": STUB_KEY, "FEDEX_API_URL": fedex.url,
+                    "FEDEX_CLIENT_ID": fedex.state.client_id, "FEDEX_CLIENT_SECRET": fedex.state.client_secret})
+        rc, elapsed, rss = run_script("fedex_tracking_worker.py", ctx["fedex_args"], env, "",
+                                      ctx["workdir"] / "fedex.log")
+        # Toda SO com algum número que a FedEx encontra tem que sair de "Pendente"
+        by_so = {e["sales_order"]: e for e in stub.state.tables["envios_processados"]}
+        stale = sum(1 for row in pending
+                    if any(tracking_stage(n.strip()) is not None for n in row["tracking_numbers"].split(","))
+                    and by_so[row["sales_order"]].get("status_atual") == "Pendente")
+        if stale and rc == 0:
+            rc = 2
+        api = fedex.state.summary()
+        pairs = sum(len(row["tracking_numbers"].split(",")) for row in pending)
+        print(f"    FedEx: {api['track_requests']} chamadas Track ({api['tracked_numbers']} numeros, "
+              f"o workflow faria {pairs}), {api['token_requests']} token(s), {api['rate_limited']} 429")
+        summary = stub.state.latency_summary()
+        summary["requests"] += api["requests"]
+        return {"returncode": rc, "wall_s": elapsed, "peak_rss_mb": rss,
+                "items": len(pending), "unit": "SOs", **summary}
+
+
+RUNNERS = {
+    "audit": scenario_audit,
+    "migrate": scenario_migrate,
+    "cleanup": scenario_cleanup,
+    "delete": scenario_delete,
+    "tracking": scenario_tracking,
+    "fedex": scenario_fedex,
+}
+
+
+def print_results(results: Dict[str, Dict]):
+    print()
+    print("=" * 102)
+    print(f"{'Cenario':<10} {'Tempo (s)':>10} {'Itens/s':>18} {'Req':>8} {'Req/s':>9} "
+          f"{'p50 (ms)':>10} {'p95 (ms)':>10} {'RSS (MB)':>10}  Status")
+    print("-" * 102)
+    for name, r in results.items():
+        rss = f"{r['peak_rss_mb']:.1f}" if r.get("peak_rss_mb") is not None else "n/a"
+        status = "ok" if r["returncode"] == 0 else f"FALHOU ({r['returncode']})"
+        print(f"{name:<10} {r['wall_s']:>10.2f} {r['throughput']:>10.1f} {r['unit'] + '/s':<7} "
+              f"{r['requests']:>8} {r['requests_per_s']:>9.1f} {r['p50_ms']:>10.1f} {r['p95_ms']:>10.1f} "
+              f"{rss:>10}  {status}")
+    print("=" * 102)
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Regressões: tempo ou RSS acima de baseline * (1 + tolerance)"""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ("wall_s", "peak_rss_mb"):
+            old, new = base.get(metric), r.get(metric)
+            if old and new and new > old * (1 + tolerance):
+                regressions.append(f"{name}.{metric}: {old:.2f} -> {new:.2f} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks ponta a ponta contra um Supabase local")
+    parser.add_argument("--cargos", type=int, default=2000, help="Cargas (planilhas) na arvore sintetica")
+    parser.add_argument("--sos-per-cargo", type=int, default=15)
+    parser.add_argument("--history-per-so", type=int, default=4, help="Linhas de shipment_history por SO")
+    parser.add_argument("--delete-sos", type=int, default=250, help="SOs avulsas para o cenario delete")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latencia fixa do stub por requisicao")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Jitter aleatorio adicional (0..N ms)")
+    parser.add_argument("--db-latency-ms", type=float, default=5.0,
+                        help="Round trip Edge Function -> banco por consulta emulada (cenarios tracking e fedex)")
+    parser.add_argument("--fedex-latency-ms", type=float, default=150.0,
+                        help="Latencia fixa do stub da FedEx por requisicao (cenario fedex)")
+    parser.add_argument("--max-body-kb", type=int, default=0,
+                        help="Projeto destino da migracao responde 413 acima deste tamanho (0 = sem limite)")
+    parser.add_argument("--only", default=",".join(SCENARIOS),
+                        help=f"Cenarios separados por virgula ({', '.join(SCENARIOS)})")
+    parser.add_argument("--audit-args", default="", help="Argumentos extras para audit_cargo_data.py")
+    parser.add_argument("--migrate-args", default="", help="Argumentos extras para migrate_supabase.py")
+    parser.add_argument("--tracking-args", default="",
+                        help="Argumentos extras para replay_tracking_updates.py (ex.: \"--batch-size 1\")")
+    parser.add_argument("--fedex-args", default="",
+                        help="Argumentos extras para fedex_tracking_worker.py (ex.: \"--tracking-batch-size 1\")")
+    parser.add_argument("--tree", help="Reusar/gerar a arvore IMPORTAÇÕES neste caminho")
+    parser.add_argument("--workdir", help="Pasta para logs e saidas (padrao: temporaria)")
+    parser.add_argument("--save", help="Salvar resultados em JSON")
+    parser.add_argument("--compare", help="JSON de baseline para detectar regressoes")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Tolerancia relativa (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.only.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in RUNNERS]
+    if unknown:
+        parser.error(f"cenarios desconhecidos: {', '.join(unknown)}")
+
+    tmp = tempfile.TemporaryDirectory(prefix="tracker-bench-")
+    workdir = Path(args.workdir or tmp.name)
+    workdir.mkdir(parents=True, exist_ok=True)
+    tree = Path(args.tree) if args.tree else workdir / "IMPORTACOES"
+
+    delete_sos = make_delete_sos(args.delete_sos)
+
+    print(f"Gerando arvore sintetica: {args.cargos} cargas x {args.sos_per_cargo} SOs em {tree}")
+    start = time.perf_counter()
+    layout = generate_importacoes_tree(tree, args.cargos, args.sos_per_cargo)
+    tables = build_tables(layout, extra_sos=delete_sos, history_per_so=args.history_per_so)
+    print(f"  {sum(len(r) for r in tables.values())} linhas em {len(tables)} tabelas "
+          f"({time.perf_counter() - start:.1f}s)")
+
+    ctx = {
+        "tree": tree,
+        "workdir": workdir,
+        "tables": tables,
+        "delete_sos": delete_sos,
+        "total_sos": sum(len(v) for v in layout.values()),
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "db_latency_ms": args.db_latency_ms,
+        "fedex_latency_ms": args.fedex_latency_ms,
+        "max_body_kb": args.max_body_kb,
+        "audit_args": shlex.split(args.audit_args),
+        "migrate_args": shlex.split(args.migrate_args),
+        "tracking_args": shlex.split(args.tracking_args),
+        "fedex_args": shlex.split(args.fedex_args),
+    }
+
+    results: Dict[str, Dict] = {}
+    for name in scenarios:
+        print(f"\n>>> {name}")
+        r = RUNNERS[name](ctx)
+        r["throughput"] = r["items"] / r["wall_s"] if r["wall_s"] else 0.0
+        r["requests_per_s"] = r["requests"] / r["wall_s"] if r["wall_s"] else 0.0
+        results[name] = r
+        print(f"    {r['wall_s']:.2f}s, {r['requests']} requisicoes, log: {workdir / (name + '.log')}")
+        if r["returncode"] != 0:
+            print(f"    ERRO: {name} terminou com codigo {r['returncode']}")
+
+    print_results(results)
+
+    if args.save:
+        meta = {"cargos": args.cargos, "sos_per_cargo": args.sos_per_cargo,
+                "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms}
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"Resultados salvos em {args.save}")
+
+    exit_code = 0 if all(r["returncode"] == 0 for r in results.values()) else 1
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressoes acima de {args.tolerance * 100:.0f}%:")
+            for line in regressions:
+                print(f"  - {line}")
+            exit_code = 1
+        else:
+            print(f"\nSem regressoes acima de {args.tolerance * 100:.0f}% em relacao a {args.compare}")
+
+    if not args.workdir:
+        tmp.cleanup()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,808 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stub HTTP local que imita o Supabase para benchmarks e testes offline.
+
+Implementa o subconjunto usado pelos scripts Python:
+  - PostgREST /rest/v1/{tabela}: GET/HEAD (select, filtros eq/neq/lt/lte/gt/gte/
+    in/is/match/imatch/like/ilike, order, limit, offset, header Range,
+    Prefer: count=exact), POST (insert e upsert com resolution=merge-duplicates),
+    PATCH e DELETE com filtros (Prefer: return=minimal|representation)
+  - RPC /rest/v1/rpc/bulk_update_cargas (mesma semântica da função SQL)
+  - Edge Functions /functions/v1/query-envios, update-envio-data, export-data e
+    update-tracking (SO única ou lote {updates: [...]}, sem tradução de status)
+
+Cada requisição pode receber uma latência artificial (fixa + jitter) e o tempo
+de atendimento é registrado para cálculo de p50/p95. Com db_latency_ms, as Edge
+Functions que emulam várias consultas ao banco (update-tracking) esperam esse
+tempo por round trip que a função real faria. Com max_body_bytes, corpos
+maiores que o limite recebem 413 (como o gateway do Supabase).
+
+Uso standalone:
+    python scripts/benchmarks/supabase_stub.py --port 54321 --latency-ms 20
+"""
+
+import argparse
+import gzip
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+# Coluna de conflito padrão do upsert (merge-duplicates) quando não há on_conflict
+DEFAULT_PRIMARY_KEY = "id"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por interpolação linear (values não precisa estar ordenado)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _as_timestamps(value: str, target: str):
+    """Compara timestamps ISO como datas (Z vs +00:00, frações variáveis)"""
+    try:
+        parse = lambda v: datetime.fromisoformat(v.replace("Z", "+00:00"))
+        return parse(value), parse(target)
+    except ValueError:
+        return value, target
+
+
+def _after(value: Optional[str], since: str) -> bool:
+    """value > since comparando timestamps ISO (como o filtro .gt do PostgREST)"""
+    if not value:
+        return False
+    parse = lambda v: datetime.fromisoformat(v.replace("Z", "+00:00"))
+    return parse(value) > parse(since)
+
+
+def _coerce(raw: str, sample):
+    """Converte o valor do filtro para o tipo da coluna (para comparar números)"""
+    if isinstance(sample, bool):
+        return raw.lower() == "true"
+    if isinstance(sample, int):
+        try:
+            return int(raw)
+        except ValueError:
+            return raw
+    if isinstance(sample, float):
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+@lru_cache(maxsize=256)
+def _in_set(raw: str) -> frozenset:
+    """_split_in_list em cache: o filtro é avaliado uma vez por linha da tabela"""
+    return frozenset(_split_in_list(raw))
+
+
+def _split_in_list(raw: str) -> List[str]:
+    """Valores de in.(a,b,"c,d")"""
+    inner = raw[1:-1] if raw.startswith("(") and raw.endswith(")") else raw
+    values, current, quoted = [], "", False
+    for ch in inner:
+        if ch == '"':
+            quoted = not quoted
+        elif ch == "," and not quoted:
+            values.append(current)
+            current = ""
+        else:
+            current += ch
+    if current or inner:
+        values.append(current)
+    return values
+
+
+def _match(row: Dict, column: str, expr: str) -> bool:
+    negate = expr.startswith("not.")
+    if negate:
+        expr = expr[4:]
+    op, _, raw = expr.partition(".")
+    value = row.get(column)
+
+    if op == "is":
+        result = value is None if raw == "null" else str(value).lower() == raw
+    elif op == "in":
+        result = value is not None and str(value) in _in_set(raw)
+    elif value is None:
+        result = False
+    elif op in ("match", "imatch"):
+        result = re.search(raw, str(value), re.IGNORECASE if op == "imatch" else 0) is not None
+    elif op in ("like", "ilike"):
+        pattern = "^" + ".*".join(re.escape(part) for part in raw.replace("%", "*").split("*")) + "$"
+        result = re.match(pattern, str(value), re.IGNORECASE if op == "ilike" else 0) is not None
+    else:
+        target = _coerce(raw, value)
+        if isinstance(value, str) and op in ("lt", "lte", "gt", "gte"):
+            value, target = _as_timestamps(value, target)
+        try:
+            if op == "eq":
+                result = value == target
+            elif op == "neq":
+                result = value != target
+            elif op == "lt":
+                result = value < target
+            elif op == "lte":
+                result = value <= target
+            elif op == "gt":
+                result = value > target
+            elif op == "gte":
+                result = value >= target
+            else:
+                raise ValueError(f"operador nao suportado: {op}")
+        except TypeError:
+            result = str(value) < str(target) if op in ("lt", "lte") else str(value) > str(target)
+    return not result if negate else result
+
+
+# Tipo de data -> (evento em carga_historico, localização, status em shipment_history)
+BULK_DATE_EVENTS = {
+    "data_armazem": ("Chegada no Armazém", "Miami - Armazém FedEx", "No Armazém"),
+    "data_embarque": ("Embarque Confirmado", "Aeroporto de Origem", "Em Trânsito"),
+    "data_chegada": ("Chegada no Brasil", "Aeroporto Brasil", "Em Desembaraço"),
+    "data_desembaraco": ("Desembaraço Concluído", "Alfândega Brasil", "Liberado"),
+    "data_entrega": ("Entrega Realizada", "Destino Final", "Entregue"),
+}
+
+# Coluna de cargas de cada tipo de data
+BULK_CARGA_COLUMNS = {
+    "data_armazem": "data_armazem",
+    "data_embarque": "data_embarque",
+    "data_chegada": "data_chegada_prevista",
+    "data_desembaraco": "data_autorizacao",
+    "data_entrega": "data_entrega",
+}
+
+# (data mais avançada, status, ultima_localizacao) inferidos, em ordem de prioridade
+BULK_INFERRED_STATUS = [
+    ("data_entrega", "Entregue", "Destino Final"),
+    ("data_desembaraco", "Liberado", "Brasil - Liberado"),
+    ("data_chegada", "Em Desembaraço", "Alfândega Brasil"),
+    ("data_embarque", "Em Trânsito", "Em Voo"),
+    ("data_armazem", "No Armazém", "Miami - Armazém FedEx"),
+]
+
+
+def _valid_timestamp(value: Optional[str]) -> bool:
+    if value is None:
+        return True
+    try:
+        datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        return True
+    except ValueError:
+        return False
+
+
+def bulk_update_cargas(tables: Dict[str, List[Dict]], payload: List[Dict]) -> Dict:
+    """
+    Emula public.bulk_update_cargas(payload jsonb): aplica o payload inteiro nas
+    tabelas em memória de uma vez (mesmas regras da migração SQL) e devolve o
+    resultado no formato da Edge Function bulk-update-cargas.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    cargas = {r.get("numero_carga"): r for r in tables.setdefault("cargas", [])}
+    links: Dict[str, List[str]] = {}
+    for link in tables.setdefault("carga_sales_orders", []):
+        links.setdefault(link.get("numero_carga"), []).append(link.get("so_number"))
+
+    # Linhas do payload com erro, status e localização
+    rows = []
+    for ord_, item in enumerate(payload):
+        item = item if isinstance(item, dict) else {}
+        row = {"ord": ord_, "numero_carga": str(item.get("numero_carga") or "").strip(), "erro": None}
+        for tipo in BULK_DATE_EVENTS:
+            row[tipo] = item.get(tipo) or None
+        if not row["numero_carga"]:
+            row["erro"] = "numero_carga é obrigatório"
+        elif row["numero_carga"] not in cargas:
+            row["erro"] = f"Carga {row['numero_carga']} não encontrada"
+        elif not all(_valid_timestamp(row[tipo]) for tipo in BULK_DATE_EVENTS):
+            row["erro"] = f"Data inválida para a carga {row['numero_carga']}"
+        inferred = next(((s, loc) for tipo, s, loc in BULK_INFERRED_STATUS if row[tipo]),
+                        ("Em Consolidação", "Fornecedor"))
+        row["status"] = item.get("status") or inferred[0]
+        row["ultima_localizacao"] = inferred[1]
+        rows.append(row)
+    valid = [r for r in rows if r["erro"] is None]
+
+    # Última data de cada (carga, tipo) e último status de cada carga
+    events: Dict[Tuple[str, str], Dict] = {}
+    last_row: Dict[str, Dict] = {}
+    for row in valid:
+        last_row[row["numero_carga"]] = row
+        for tipo in BULK_DATE_EVENTS:
+            if row[tipo]:
+                events[(row["numero_carga"], tipo)] = row
+
+    # 1. cargas
+    for (numero, tipo), source in events.items():
+        cargas[numero][BULK_CARGA_COLUMNS[tipo]] = source[tipo]
+    for numero, row in last_row.items():
+        cargas[numero].update(status=row["status"], ultima_localizacao=row["ultima_localizacao"], updated_at=now)
+
+    # 2. carga_historico
+    replaced = {(numero, BULK_DATE_EVENTS[tipo][0]) for numero, tipo in events}
+    history = [h for h in tables.setdefault("carga_historico", [])
+               if (h.get("numero_carga"), h.get("evento")) not in replaced]
+    for (numero, tipo), source in events.items():
+        evento, localizacao, _ = BULK_DATE_EVENTS[tipo]
+        history.append({"id": str(uuid.uuid4()), "numero_carga": numero, "evento": evento,
+                        "data_evento": source[tipo], "localizacao": localizacao,
+                        "descricao": "Atualizado via importação em massa", "created_at": now})
+    tables["carga_historico"] = history
+
+    # 3. envios_processados (vale a última linha do payload que toca a SO)
+    per_so: Dict[str, Dict] = {}
+    for row in valid:
+        for so in links.get(row["numero_carga"], []):
+            entry = per_so.setdefault(so, {"data_envio": None, "entregue": False})
+            entry.update(status=row["status"], ultima_localizacao=row["ultima_localizacao"])
+            entry["data_envio"] = row["data_embarque"] or entry["data_envio"]
+            entry["entregue"] = entry["entregue"] or row["status"] == "Entregue"
+    for envio in tables.setdefault("envios_processados", []):
+        entry = per_so.get(envio.get("sales_order"))
+        if entry is None:
+            continue
+        status = entry["status"]
+        envio.update(status_atual=status, status=status, status_cliente=status,
+                     ultima_localizacao=entry["ultima_localizacao"], data_ultima_atualizacao=now)
+        if entry["entregue"]:
+            envio["is_delivered"] = True
+        if entry["data_envio"]:
+            envio["data_envio"] = entry["data_envio"]
+
+    # 4. shipment_history por (SO, status)
+    so_events: Dict[Tuple[str, str], Tuple[int, str, Dict]] = {}
+    for (numero, tipo), source in events.items():
+        for so in links.get(numero, []):
+            key = (so, BULK_DATE_EVENTS[tipo][2])
+            if key not in so_events or so_events[key][0] < source["ord"]:
+                so_events[key] = (source["ord"], tipo, source)
+    shipments = [h for h in tables.setdefault("shipment_history", [])
+                 if (h.get("sales_order"), h.get("status")) not in so_events]
+    for (so, status), (_, tipo, source) in so_events.items():
+        shipments.append({"id": str(uuid.uuid4()), "sales_order": so, "status": status,
+                          "location": BULK_DATE_EVENTS[tipo][1], "timestamp": source[tipo],
+                          "description": f"Importação em massa - Carga {source['numero_carga']}",
+                          "tracking_number": None, "created_at": now})
+    tables["shipment_history"] = shipments
+
+    results = [{
+        "success": r["erro"] is None,
+        "numero_carga": r["numero_carga"],
+        "message": r["erro"] or "Atualizado com sucesso",
+        "sos_updated": len(links.get(r["numero_carga"], [])) if r["erro"] is None else 0,
+    } for r in rows]
+    return {
+        "success": True,
+        "processed": len(results),
+        "successful": sum(r["success"] for r in results),
+        "total_sos_updated": sum(r["sos_updated"] for r in results),
+        "results": results,
+    }
+
+
+# Funções SQL expostas em /rest/v1/rpc/{nome}: (tabelas, argumentos) -> resposta
+RPC_FUNCTIONS = {
+    "bulk_update_cargas": lambda tables, args: bulk_update_cargas(tables, args.get("payload") or []),
+}
+
+
+class StubState:
+    """Tabelas em memória + métricas de latência, compartilhadas entre threads"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0,
+                 max_body_bytes: int = 0, db_latency_ms: float = 0.0):
+        self.tables: Dict[str, List[Dict]] = {}
+        self.latency_ms = latency_ms
+        self.db_latency_ms = db_latency_ms
+        self.jitter_ms = jitter_ms
+        self.max_body_bytes = max_body_bytes
+        self.lock = threading.RLock()
+        self._rng = random.Random(seed)
+        self.samples: List[Tuple[str, float]] = []
+
+    def seed_table(self, table: str, rows: List[Dict]):
+        with self.lock:
+            self.tables[table] = [dict(r) for r in rows]
+
+    def reset_metrics(self):
+        with self.lock:
+            self.samples = []
+
+    def record(self, endpoint: str, seconds: float):
+        with self.lock:
+            self.samples.append((endpoint, seconds))
+
+    def delay(self):
+        if self.latency_ms <= 0 and self.jitter_ms <= 0:
+            return
+        with self.lock:
+            jitter = self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        time.sleep((self.latency_ms + jitter) / 1000)
+
+    def db_delay(self, round_trips: int):
+        """Round trips Edge Function -> banco (fora do lock das tabelas)"""
+        if self.db_latency_ms > 0 and round_trips > 0:
+            time.sleep(self.db_latency_ms * round_trips / 1000)
+
+    def latency_summary(self) -> Dict:
+        with self.lock:
+            durations = [s for _, s in self.samples]
+            endpoints: Dict[str, int] = {}
+            for endpoint, _ in self.samples:
+                endpoints[endpoint] = endpoints.get(endpoint, 0) + 1
+        return {
+            "requests": len(durations),
+            "p50_ms": percentile(durations, 50) * 1000,
+            "p95_ms": percentile(durations, 95) * 1000,
+            "endpoints": endpoints,
+        }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_version = "SupabaseStub/1.0"
+
+    # ------------------------------------------------------------------
+    # Infra
+    # ------------------------------------------------------------------
+
+    @property
+    def state(self) -> StubState:
+        return self.server.state  # type: ignore[attr-defined]
+
+    def log_message(self, format, *args):  # silencia o log padrão
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        return json.loads(self.rfile.read(length))
+
+    def _send(self, status: int, body=None, headers: Optional[Dict[str, str]] = None, head: bool = False,
+              compress: bool = False):
+        payload = b"" if body is None else json.dumps(body, default=str).encode("utf-8")
+        if compress and payload and "gzip" in self.headers.get("Accept-Encoding", ""):
+            payload = gzip.compress(payload, compresslevel=6)
+            headers = {**(headers or {}), "Content-Encoding": "gzip"}
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if payload and not head:
+            self.wfile.write(payload)
+
+    def _dispatch(self, method: str):
+        start = time.perf_counter()
+        parts = urlsplit(self.path)
+        endpoint = "other"
+        try:
+            self.state.delay()
+            length = int(self.headers.get("Content-Length") or 0)
+            if self.state.max_body_bytes and length > self.state.max_body_bytes:
+                self.rfile.read(length)
+                endpoint = f"{method} 413"
+                self._send(413, {"message": "Payload Too Large"})
+            elif parts.path.startswith("/rest/v1/rpc/"):
+                name = unquote(parts.path[len("/rest/v1/rpc/"):])
+                endpoint = f"{method} rpc/{name}"
+                self._handle_rpc(name)
+            elif parts.path.startswith("/rest/v1/"):
+                table = unquote(parts.path[len("/rest/v1/"):])
+                endpoint = f"{method} rest/{table}"
+                self._handle_rest(method, table, parts.query)
+            elif parts.path.startswith("/functions/v1/"):
+                name = parts.path[len("/functions/v1/"):]
+                endpoint = f"{method} fn/{name}"
+                self._handle_function(name)
+            else:
+                self._send(404, {"message": "not found"})
+        except Exception as exc:  # pragma: no cover - depuração do stub
+            self._send(500, {"message": str(exc)})
+        finally:
+            self.state.record(endpoint, time.perf_counter() - start)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_HEAD(self):
+        self._dispatch("HEAD")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    # ------------------------------------------------------------------
+    # PostgREST
+    # ------------------------------------------------------------------
+
+    def _parse_query(self, query: str):
+        select = "*"
+        filters: List[Tuple[str, str]] = []
+        order: List[Tuple[str, bool]] = []
+        limit = offset = None
+        on_conflict = None
+        for key, value in parse_qsl(query, keep_blank_values=True):
+            if key == "on_conflict":
+                on_conflict = value
+            elif key == "columns":
+                continue
+            elif key == "select":
+                select = value
+            elif key == "order":
+                for item in value.split(","):
+                    col, _, direction = item.partition(".")
+                    order.append((col, direction.startswith("desc")))
+            elif key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            else:
+                filters.append((key, value))
+        return select, filters, order, limit, offset, on_conflict
+
+    def _filtered(self, table: str, filters) -> List[Dict]:
+        rows = self.state.tables.get(table, [])
+        return [r for r in rows if all(_match(r, col, expr) for col, expr in filters)]
+
+    @staticmethod
+    def _project(rows: List[Dict], select: str) -> List[Dict]:
+        if select in ("*", ""):
+            return [dict(r) for r in rows]
+        columns = [c.strip() for c in select.split(",")]
+        return [{c: r.get(c) for c in columns} for r in rows]
+
+    def _handle_rest(self, method: str, table: str, query: str):
+        prefer = self.headers.get("Prefer", "")
+        select, filters, order, limit, offset, on_conflict = self._parse_query(query)
+
+        with self.state.lock:
+            if table not in self.state.tables:
+                self._send(404, {"message": f'relation "public.{table}" does not exist'}, head=method == "HEAD")
+                return
+
+            if method in ("GET", "HEAD"):
+                rows = self._filtered(table, filters)
+                for col, desc in reversed(order):
+                    rows.sort(key=lambda r: (r.get(col) is None, r.get(col) if r.get(col) is not None else ""),
+                              reverse=desc)
+                total = len(rows)
+
+                start = offset or 0
+                end = total if limit is None else start + limit
+                range_header = self.headers.get("Range")
+                if range_header:
+                    lo, _, hi = range_header.partition("-")
+                    start = int(lo)
+                    end = min(end, int(hi) + 1) if hi else end
+                    if start > 0 and start >= total:
+                        self._send(416, {"message": "Requested range not satisfiable"},
+                                   {"Content-Range": f"*/{total}"}, head=method == "HEAD")
+                        return
+                page = rows[start:end]
+
+                count = str(total) if "count=exact" in prefer else "*"
+                last = start + len(page) - 1
+                content_range = f"{start}-{last}/{count}" if page else f"*/{count}"
+                status = 206 if range_header and len(page) < total else 200
+                self._send(status, self._project(page, select), {"Content-Range": content_range},
+                           head=method == "HEAD")
+                return
+
+            if method == "POST":
+                body = self._read_json() or []
+                incoming = body if isinstance(body, list) else [body]
+                pk = on_conflict or DEFAULT_PRIMARY_KEY
+                merge = "resolution=merge-duplicates" in prefer
+                existing = {r.get(pk): r for r in self.state.tables[table] if r.get(pk) is not None}
+                stored = []
+                for row in incoming:
+                    row = dict(row)
+                    row.setdefault(pk, str(uuid.uuid4()))
+                    current = existing.get(row[pk])
+                    if current is not None:
+                        if not merge:
+                            self._send(409, {"message": "duplicate key value violates unique constraint"})
+                            return
+                        current.update(row)
+                        stored.append(current)
+                    else:
+                        self.state.tables[table].append(row)
+                        existing[row[pk]] = row
+                        stored.append(row)
+                if "return=representation" in prefer:
+                    self._send(201, self._project(stored, select))
+                else:
+                    self._send(201)
+                return
+
+            if method == "PATCH":
+                patch = self._read_json() or {}
+                rows = self._filtered(table, filters)
+                for row in rows:
+                    row.update(patch)
+                if "return=representation" in prefer:
+                    self._send(200, self._project(rows, select))
+                else:
+                    self._send(204)
+                return
+
+            if method == "DELETE":
+                doomed = self._filtered(table, filters)
+                doomed_ids = {id(r) for r in doomed}
+                self.state.tables[table] = [r for r in self.state.tables[table] if id(r) not in doomed_ids]
+                headers = {"Content-Range": f"*/{len(doomed)}"} if "count=exact" in prefer else None
+                if "return=representation" in prefer:
+                    self._send(200, self._project(doomed, select), headers)
+                else:
+                    self._send(204, None, headers)
+                return
+
+        self._send(405, {"message": "method not allowed"})
+
+    def _handle_rpc(self, name: str):
+        function = RPC_FUNCTIONS.get(name)
+        if function is None:
+            self._send(404, {"code": "PGRST202",
+                             "message": f"Could not find the function public.{name} in the schema cache"})
+            return
+        args = self._read_json() or {}
+        with self.state.lock:
+            result = function(self.state.tables, args)
+        self._send(200, result)
+
+    # ------------------------------------------------------------------
+    # Edge Functions
+    # ------------------------------------------------------------------
+
+    def _handle_function(self, name: str):
+        body = self._read_json() or {}
+
+        if name == "query-envios":
+            sales_orders = body.get("sales_orders") or []
+            if not isinstance(sales_orders, list) or not sales_orders:
+                self._send(400, {"error": "sales_orders array é obrigatório"})
+                return
+            if len(sales_orders) > 500:
+                self._send(400, {"error": "Máximo de 500 SOs por consulta"})
+                return
+            wanted = set(sales_orders)
+            since = body.get("updated_since")
+            columns = ("id", "sales_order", "data_envio", "status_atual", "is_delivered",
+                       "is_at_warehouse", "tracking_numbers", "data_ultima_atualizacao")
+            synced_at = datetime.now(timezone.utc).isoformat()
+            with self.state.lock:
+                data = [
+                    {c: r.get(c) for c in columns}
+                    for r in self.state.tables.get("envios_processados", [])
+                    if r.get("sales_order") in wanted
+                    and (not since or _after(r.get("data_ultima_atualizacao"), since)
+                         or _after(r.get("updated_at"), since))
+                ]
+            self._send(200, {"data": data, "synced_at": synced_at})
+            return
+
+        if name == "update-envio-data":
+            updates = body.get("updates") or []
+            if not isinstance(updates, list) or not updates:
+                self._send(400, {"error": "updates array é obrigatório"})
+                return
+            if len(updates) > 200:
+                self._send(400, {"error": "Máximo de 200 atualizações por chamada"})
+                return
+            updated = 0
+            with self.state.lock:
+                by_so = {r.get("sales_order"): r for r in self.state.tables.get("envios_processados", [])}
+                for update in updates:
+                    row = by_so.get(update.get("sales_order"))
+                    if row is not None and "data_envio" in update:
+                        row["data_envio"] = update["data_envio"]
+                        row["updated_at"] = datetime.now(timezone.utc).isoformat()  # trigger
+                        updated += 1
+            self._send(200, {"success": True, "updated": updated, "errors": 0, "details": []})
+            return
+
+        if name == "export-data":
+            table = body.get("table")
+            since, column = body.get("since"), body.get("since_column")
+            after_id, until_id, limit = body.get("after_id"), body.get("until_id"), body.get("limit")
+            paged = limit is not None or after_id is not None or until_id is not None
+            exported_at = datetime.now(timezone.utc).isoformat()
+            with self.state.lock:
+                if table not in self.state.tables:
+                    self._send(403, {"error": f'Tabela "{table}" não permitida'})
+                    return
+                rows = [
+                    r for r in self.state.tables[table]
+                    if (since is None or _match(r, column, f"gte.{since}"))
+                    and (after_id is None or _match(r, "id", f"gt.{after_id}"))
+                    and (until_id is None or _match(r, "id", f"lte.{until_id}"))
+                ]
+                if paged:
+                    rows = sorted(rows, key=lambda r: r["id"])[:min(limit or 5000, 5000)]
+                rows = [dict(r) for r in rows]
+            next_after_id = rows[-1]["id"] if paged and rows else None
+            self._send(200, {"table": table, "count": len(rows), "exported_at": exported_at,
+                             "next_after_id": next_after_id, "data": rows},
+                       compress=body.get("gzip") is True)
+            return
+
+        if name == "update-tracking":
+            self._update_tracking(body)
+            return
+
+        self._send(404, {"error": f"função {name} não encontrada"})
+
+    def _update_tracking(self, body):
+        """
+        update-tracking com as mesmas decisões da função real (update só dos
+        campos enviados, insert de SO nova, histórico só quando o estágio muda),
+        mas sem traduzir status: o estágio gravado é o status_atual recebido.
+        """
+        updates = body if isinstance(body, list) else body.get("updates")
+        batch = isinstance(updates, list)
+        items = updates if batch else [body]
+        if batch and not 1 <= len(items) <= 500:
+            self._send(400, {"error": "updates deve ter entre 1 e 500 itens"})
+            return
+
+        round_trips = 0  # rate limit em memória (RATE_LIMIT_MODE=memory): sem auth_attempts por chamada
+        now = datetime.now(timezone.utc).isoformat()
+        results, rows = [], []
+        inserted = updated = history_inserted = 0
+        with self.state.lock:
+            envios = self.state.tables.setdefault("envios_processados", [])
+            history = self.state.tables.setdefault("shipment_history", [])
+            by_so = {r.get("sales_order"): r for r in envios}
+            wanted = {str(i.get("sales_order") or "").strip() for i in items if i.get("tracking_numbers")}
+            last_stage: Dict[str, Tuple[str, str]] = {}
+            for h in history:
+                so = h.get("sales_order")
+                if so in wanted and (so not in last_stage or (h.get("timestamp") or "") > last_stage[so][0]):
+                    last_stage[so] = (h.get("timestamp") or "", h.get("status"))
+
+            for item in items:
+                so = str(item.get("sales_order") or "").strip()
+                if not so:
+                    results.append({"sales_order": so, "success": False, "error": "sales_order é obrigatório"})
+                    continue
+                row = by_so.get(so)
+                existed = row is not None
+                if existed:
+                    for column in ("status", "status_atual", "status_cliente", "ultima_localizacao",
+                                   "tracking_numbers", "carrier", "ship_to", "data_envio"):
+                        if item.get(column):
+                            row[column] = item[column]
+                    if item.get("status_atual"):
+                        row["is_at_warehouse"] = "armazém" in item["status_atual"].lower()
+                        row["is_delivered"] = "entregue" in item["status_atual"].lower()
+                    row["data_ultima_atualizacao"] = now
+                    updated += 1
+                else:
+                    row = {"id": str(uuid.uuid4()), "sales_order": so,
+                           "cliente": item.get("cliente") or "Cliente não especificado",
+                           "tracking_numbers": item.get("tracking_numbers"),
+                           "status_atual": item.get("status_atual") or "Em Trânsito",
+                           "ultima_localizacao": item.get("ultima_localizacao") or "Em Trânsito",
+                           "carrier": item.get("carrier") or "FedEx", "data_ultima_atualizacao": now}
+                    envios.append(row)
+                    by_so[so] = row
+                    inserted += 1
+                rows.append(dict(row))
+                results.append({"sales_order": so, "success": True,
+                                "operation": "update" if existed else "insert"})
+
+                stage = item.get("status_atual") if item.get("tracking_numbers") else None
+                if not batch:
+                    round_trips += 2 + (2 if stage else 0)  # select + write (+ último estágio + insert)
+                if stage and last_stage.get(so, ("", None))[1] != stage:
+                    history.append({"id": str(uuid.uuid4()), "sales_order": so, "status": stage,
+                                    "location": item.get("ultima_localizacao"),
+                                    "tracking_number": item.get("tracking_numbers"),
+                                    "timestamp": now, "created_at": now})
+                    last_stage[so] = (now, stage)
+                    history_inserted += 1
+        if batch:
+            round_trips += 3  # .in() + insert das novas + apply_tracking_updates
+        self.state.db_delay(round_trips)
+
+        if not batch:
+            if not results[0]["success"]:
+                self._send(400, {"error": results[0]["error"]})
+            else:
+                self._send(200, {"success": True, "data": rows})
+            return
+        self._send(200, {"success": True, "processed": len(results), "inserted": inserted,
+                         "updated": updated, "history_inserted": history_inserted,
+                         "errors": sum(not r["success"] for r in results), "results": results})
+
+
+class SupabaseStub:
+    """Servidor stub em background (thread), para uso programático"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, seed: int = 0, max_body_bytes: int = 0,
+                 db_latency_ms: float = 0.0):
+        self.state = StubState(latency_ms=latency_ms, jitter_ms=jitter_ms, seed=seed,
+                               max_body_bytes=max_body_bytes, db_latency_ms=db_latency_ms)
+        self._server = ThreadingHTTPServer((host, port), StubHandler)
+        self._server.daemon_threads = True
+        self._server.state = self.state  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "SupabaseStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub local do Supabase (PostgREST + Edge Functions)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia fixa por requisicao")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Jitter aleatorio adicional (0..N ms)")
+    parser.add_argument("--max-body-kb", type=int, default=0, help="Responder 413 para corpos maiores (0 = sem limite)")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0,
+                        help="Latencia por consulta ao banco dentro das Edge Functions emuladas")
+    parser.add_argument("--seed-json", help="JSON {tabela: [linhas]} para popular o stub")
+    args = parser.parse_args()
+
+    stub = SupabaseStub(args.host, args.port, args.latency_ms, args.jitter_ms,
+                        max_body_bytes=args.max_body_kb * 1024, db_latency_ms=args.db_latency_ms)
+    if args.seed_json:
+        with open(args.seed_json, "r", encoding="utf-8") as f:
+            for table, rows in json.load(f).items():
+                stub.state.seed_table(table, rows)
+
+    print(f"Supabase stub ouvindo em {stub.url} (latencia {args.latency_ms}ms + jitter {args.jitter_ms}ms)")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nEncerrando stub")
+    finally:
+        stub._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Geradores de dados sintéticos para os benchmarks.
+
+- generate_importacoes_tree: árvore "IMPORTAÇÃO {ano}/CARGA {n} - {tipo} - {sigla}"
+  com uma planilha "Dados {n}.xlsx" (aba SR1) por carga
+- build_tables: tabelas do Supabase coerentes com a árvore (envios_processados,
+  cargas, carga_sales_orders, carga_historico, shipment_history, ...)
+- make_delete_sos: SOs avulsas (fora da árvore) para o cenário de delete
+- make_bulk_cargas_payload: planilha do BulkCargoUpload (payload do bulk-update-cargas)
+- make_tracking_payloads: corpos do FedEx Scraper (payload do update-tracking)
+- make_pending_tracking_rows: linhas de v_envios_pendentes_tracking (worker FedEx)
+
+Uso standalone (só gera a árvore):
+    python scripts/benchmarks/synthetic_data.py /tmp/IMPORTACOES --cargos 2000
+"""
+
+import argparse
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from openpyxl import Workbook
+
+CARGO_TYPES = ["IDT", "AMB", "CTRL"]
+CARGO_TAGS = ["GS", "TF", "SA", "MK"]
+FIRST_CARGO = 800
+FIRST_SO = 23200000
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def generate_importacoes_tree(
+    base_path: Path,
+    cargos: int,
+    sos_per_cargo: int = 15,
+    year: int = 2026,
+    seed: int = 42,
+) -> Dict[str, List[str]]:
+    """
+    Cria a árvore de importações e retorna {numero_carga: [SOs da planilha]}.
+    As SOs se repetem entre linhas (como no SR1 real) e parte das datas vem em
+    texto nos formatos aceitos pelo auditor.
+    """
+    rng = random.Random(seed)
+    year_folder = Path(base_path) / f"IMPORTAÇÃO {year}"
+    year_folder.mkdir(parents=True, exist_ok=True)
+
+    layout: Dict[str, List[str]] = {}
+    next_so = FIRST_SO
+    base_date = datetime(year, 1, 1, 8, 0, 0)
+
+    for i in range(cargos):
+        numero = str(FIRST_CARGO + i)
+        folder = year_folder / f"CARGA {numero} - {rng.choice(CARGO_TYPES)} - {rng.choice(CARGO_TAGS)}"
+        folder.mkdir(exist_ok=True)
+
+        sos = [str(next_so + k) for k in range(sos_per_cargo)]
+        next_so += sos_per_cargo
+        layout[numero] = sos
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("SR1")
+        ws.append(["Tracking", "Service", "Ship Date", "Recipient", "Sales Order", "Weight"])
+        ship_base = base_date + timedelta(days=i % 300)
+        for so in sos:
+            for _ in range(rng.randint(1, 3)):
+                dt = ship_base + timedelta(hours=rng.randint(0, 12))
+                kind = rng.random()
+                if kind < 0.6:
+                    ship_date = dt
+                elif kind < 0.8:
+                    ship_date = dt.strftime("%m/%d/%Y %I:%M:%S %p")
+                elif kind < 0.95:
+                    ship_date = dt.strftime("%d/%m/%Y")
+                else:
+                    ship_date = None
+                ws.append([f"7{rng.randint(10**10, 10**11 - 1)}", "INTL PRIORITY", ship_date,
+                           "SINTESE", int(so), round(rng.uniform(0.5, 30), 2)])
+        wb.save(folder / f"Dados {numero}.xlsx")
+
+    return layout
+
+
+def make_delete_sos(count: int, start: int = FIRST_SO - 100000) -> List[str]:
+    """SOs fora da faixa da árvore, semeadas via build_tables(extra_sos=...)"""
+    return [str(start + i) for i in range(count)]
+
+
+BULK_DATE_TYPES = ["data_armazem", "data_embarque", "data_chegada", "data_desembaraco", "data_entrega"]
+
+
+def make_bulk_cargas_payload(numeros: List[str], missing: float = 0.02, duplicates: float = 0.02,
+                             seed: int = 11) -> List[Dict]:
+    """
+    Linhas como as enviadas pelo BulkCargoUpload: cada carga com as datas até
+    uma etapa aleatória (armazém -> entrega, ISO como Date.toISOString), ~10%
+    com status explícito, mais cargas inexistentes e linhas repetidas.
+    """
+    rng = random.Random(seed)
+    base = datetime(2026, 3, 1, 12, 0, 0, tzinfo=timezone.utc)
+    payload: List[Dict] = []
+    for numero in numeros:
+        stage = rng.randint(0, len(BULK_DATE_TYPES))
+        start = base + timedelta(days=rng.randint(0, 180))
+        row: Dict = {"numero_carga": numero}
+        for k, tipo in enumerate(BULK_DATE_TYPES):
+            when = start + timedelta(days=3 * k)
+            row[tipo] = when.strftime("%Y-%m-%dT%H:%M:%S.000Z") if k < stage else None
+        row["status"] = rng.choice(["Em Trânsito", "Entregue"]) if rng.random() < 0.1 else None
+        payload.append(row)
+    for i in range(int(len(numeros) * missing)):
+        payload.insert(rng.randrange(len(payload) + 1), {"numero_carga": f"X{i}", "status": None})
+    for _ in range(int(len(numeros) * duplicates)):
+        again = dict(rng.choice(payload))
+        again["data_entrega"] = None
+        payload.append(again)
+    return payload
+
+
+TRACKING_STATUSES = [
+    ("Picked up", "SHANGHAI, CN"),
+    ("In transit", "ANCHORAGE, AK, US"),
+    ("Arrived at FedEx location", "MEMPHIS, TN, US"),
+    ("Departed FedEx location", "MIAMI, FL, US"),
+    ("International shipment release - Import", "CAMPINAS, BR"),
+    ("At local FedEx facility", "SAO PAULO, BR"),
+    ("On FedEx vehicle for delivery", "SAO PAULO, BR"),
+    ("Delivered", "SAO PAULO, BR"),
+]
+
+
+def make_tracking_payloads(sos: List[str], new: float = 0.1, seed: int = 13) -> List[Dict]:
+    """
+    Corpos como os que o workflow "3 - FedEx Scraper" envia ao update-tracking:
+    um por SO, com o status bruto da FedEx, mais ~10% de SOs ainda não
+    cadastradas (viram insert).
+    """
+    rng = random.Random(seed)
+    now = datetime(2026, 10, 17, 12, 0, 0, tzinfo=timezone.utc)
+    targets = list(sos) + [str(FIRST_SO - 300000 + i) for i in range(int(len(sos) * new))]
+    rng.shuffle(targets)
+    payloads = []
+    for so in targets:
+        status, location = rng.choice(TRACKING_STATUSES)
+        payloads.append({
+            "sales_order": so,
+            "status_atual": status,
+            "ultima_localizacao": location,
+            "tracking_numbers": str(rng.randint(10 ** 11, 10 ** 12 - 1)),
+            "carrier": "FedEx",
+            "data_ultima_atualizacao": _iso(now - timedelta(minutes=rng.randint(0, 600))),
+        })
+    return payloads
+
+
+def make_pending_tracking_rows(envios: List[Dict], shared: float = 0.15, multi: float = 0.1,
+                               not_found: float = 0.05, seed: int = 17) -> List[Dict]:
+    """
+    Linhas de v_envios_pendentes_tracking para as SOs dadas: ~15% dividem o
+    tracking number com outra SO (consolidação), ~10% têm dois números e ~5%
+    usam um número que a FedEx não encontra (prefixo "000" no fedex_stub).
+    """
+    rng = random.Random(seed)
+    rows: List[Dict] = []
+    for envio in envios:
+        if rows and rng.random() < shared:
+            numbers = rng.choice(rows)["tracking_numbers"].split(",")[:1]
+        elif rng.random() < not_found:
+            numbers = [f"000{rng.randint(10 ** 8, 10 ** 9 - 1)}"]
+        else:
+            numbers = [str(rng.randint(10 ** 11, 10 ** 12 - 1))]
+            if rng.random() < multi:
+                numbers.append(str(rng.randint(10 ** 11, 10 ** 12 - 1)))
+        rows.append({
+            "id": envio["id"],
+            "sales_order": envio["sales_order"],
+            "cliente": envio.get("cliente"),
+            "tracking_numbers": ", ".join(numbers),
+            "created_at": envio.get("created_at"),
+        })
+    return rows
+
+
+def build_tables(
+    layout: Dict[str, List[str]],
+    extra_sos: List[str] = (),
+    history_per_so: int = 4,
+    seed: int = 7,
+) -> Dict[str, List[Dict]]:
+    """
+    Tabelas do Supabase para o stub, coerentes com a árvore gerada.
+
+    ~85% das SOs das planilhas existem em envios_processados; dessas, ~30% estão
+    sem data_envio e ~10% com data divergente, para exercitar o auditor.
+    """
+    rng = random.Random(seed)
+    now = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+    envios: List[Dict] = []
+    cargas: List[Dict] = []
+    links: List[Dict] = []
+    carga_hist: List[Dict] = []
+    shipment_history: List[Dict] = []
+
+    def add_envio(so: str, data_envio):
+        created = now - timedelta(days=rng.randint(1, 400))
+        envios.append({
+            "id": _uuid(rng),
+            "sales_order": so,
+            "cliente": f"Cliente {rng.randint(1, 300)}",
+            "produtos": "Reagente " * rng.randint(1, 40),
+            "valor_total": round(rng.uniform(100, 50000), 2),
+            "data_envio": data_envio,
+            "status_atual": rng.choice(["Em Trânsito", "No Armazém", "Em Desembaraço", "Entregue"]),
+            "is_delivered": False,
+            "is_at_warehouse": False,
+            "tracking_numbers": f"7{rng.randint(10**10, 10**11 - 1)}",
+            "data_ultima_atualizacao": _iso(created + timedelta(days=2)),
+            "created_at": _iso(created),
+            "updated_at": _iso(created + timedelta(days=2)),
+        })
+
+    for i, (numero, sos) in enumerate(layout.items()):
+        carga_id = _uuid(rng)
+        created = now - timedelta(days=len(layout) - i)
+        cargas.append({
+            "id": carga_id,
+            "numero_carga": numero,
+            "status": rng.choice(["Em Consolidação", "Em Trânsito", "Entregue"]),
+            "tipo_temperatura": rng.choice(["Ambiente", "Controlada"]),
+            "created_at": _iso(created),
+            "updated_at": _iso(created),
+        })
+        for event in ("Chegada no Armazém", "Embarque Confirmado"):
+            carga_hist.append({
+                "id": _uuid(rng), "carga_id": carga_id, "numero_carga": numero,
+                "evento": event, "data_evento": _iso(created), "created_at": _iso(created),
+            })
+        for so in sos:
+            links.append({
+                "id": _uuid(rng), "carga_id": carga_id, "numero_carga": numero,
+                "so_number": so, "created_at": _iso(created),
+            })
+            roll = rng.random()
+            if roll > 0.85:
+                continue  # SO ausente do banco
+            ship = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(days=i % 300)
+            if roll < 0.30:
+                data_envio = None
+            elif roll < 0.40:
+                data_envio = _iso(ship + timedelta(days=rng.randint(5, 20)))
+            else:
+                data_envio = _iso(ship)
+            add_envio(so, data_envio)
+
+    for n, so in enumerate(extra_sos):
+        add_envio(so, None)
+        if cargas and n % 2 == 0:  # metade com vinculo numa carga
+            carga = rng.choice(cargas)
+            links.append({
+                "id": _uuid(rng), "carga_id": carga["id"], "numero_carga": carga["numero_carga"],
+                "so_number": so, "created_at": carga["created_at"],
+            })
+
+    for envio in envios:
+        for k in range(history_per_so):
+            ts = now - timedelta(days=rng.randint(0, 300), minutes=k)
+            shipment_history.append({
+                "id": _uuid(rng),
+                "sales_order": envio["sales_order"],
+                "status": rng.choice(["Em Trânsito", "No Armazém", "Em Desembaraço", "Entregue"]),
+                "location": rng.choice(["Memphis", "Miami", "Guarulhos"]),
+                "timestamp": _iso(ts),
+                "created_at": _iso(ts),
+            })
+
+    clientes = [{"id": _uuid(rng), "nome": f"Cliente {i}", "created_at": _iso(now)} for i in range(300)]
+
+    return {
+        "profiles": [{"id": _uuid(rng), "email": f"user{i}@sintese.bio", "created_at": _iso(now)} for i in range(20)],
+        "clientes": clientes,
+        "clientes_contact_info": [
+            {"id": _uuid(rng), "cliente_id": c["id"], "email": f"contato{i}@cliente.com", "created_at": _iso(now)}
+            for i, c in enumerate(clientes)
+        ],
+        "alert_rules": [{"id": _uuid(rng), "name": f"Regra {i}", "active": True, "created_at": _iso(now)} for i in range(5)],
+        "cargas": cargas,
+        "envios_processados": envios,
+        "carga_sales_orders": links,
+        "carga_historico": carga_hist,
+        "shipment_history": shipment_history,
+        "tracking_master": [],
+        "customer_assignments": [],
+        "active_alerts": [],
+        "notificacoes": [],
+        "notification_queue": [],
+        "auth_attempts": [
+            {"id": _uuid(rng), "ip_address": f"10.0.0.{i % 255}", "endpoint": "/functions/update-tracking",
+             "success": True, "attempted_at": _iso(now - timedelta(minutes=i))}
+            for i in range(len(envios))
+        ],
+        "security_audit_log": [],
+        "user_roles": [],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera uma arvore IMPORTAÇÕES sintetica")
+    parser.add_argument("base_path", help="Pasta base (equivalente a C:\\IMPORTAÇÕES)")
+    parser.add_argument("--cargos", type=int, default=2000)
+    parser.add_argument("--sos-per-cargo", type=int, default=15)
+    parser.add_argument("--year", type=int, default=2026)
+    args = parser.parse_args()
+
+    layout = generate_importacoes_tree(Path(args.base_path), args.cargos, args.sos_per_cargo, args.year)
+    total_sos = sum(len(v) for v in layout.values())
+    print(f"{len(layout)} cargas, {total_sos} SOs geradas em {args.base_path}")
+
+
+if __name__ == "__main__":
+    main()
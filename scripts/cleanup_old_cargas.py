@@ -3,17 +3,28 @@
 """
 Script de Limpeza de Cargas Antigas (< 925)
 
-Remove do banco de dados todas as cargas cujo numero_carga numerico seja
-menor que 925, junto com seus registros relacionados:
+Remove do banco de dados todas as cargas que atendem ao predicado (por padrao,
+numero_carga numerico menor que 925), junto com seus registros relacionados:
   - carga_sales_orders (por carga_id)
   - carga_historico    (por carga_id, se a tabela existir)
   - cargas             (os registros principais)
 
+A limpeza e feita em conjunto (set-based) no servidor:
+  - as cargas alvo sao selecionadas com filtros PostgREST (nada e filtrado em
+    Python); a faixa de numero_carga vira uma regex (operador match)
+  - as contagens do dry-run usam HEAD com Prefer: count=exact, sem baixar linhas
+  - os DELETEs usam batches id=in.(...) enviados ao mesmo tempo pelo
+    supaclient (ate --workers requisicoes em voo); dependentes primeiro,
+    cargas por ultimo
+
 Requer a service role key para contornar RLS.
 
 Uso:
-    python cleanup_old_cargas.py --dry-run    # Preview sem apagar nada
-    python cleanup_old_cargas.py              # Executa a limpeza
+    python cleanup_old_cargas.py --dry-run                     # Preview sem apagar nada
+    python cleanup_old_cargas.py                               # numero_carga < 925
+    python cleanup_old_cargas.py --numero-min 100 --numero-max 200
+    python cleanup_old_cargas.py --older-than 365 --status entregue
+    python cleanup_old_cargas.py --where "tipo_temperatura=eq.ambiente"
 
 Variaveis de ambiente (.env):
     SUPABASE_URL               URL do projeto Supabase
@@ -24,15 +35,16 @@ import os
 import re
 import sys
 import argparse
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 try:
-    import requests
     from dotenv import load_dotenv
+    from supaclient import SupabaseClient, SupabaseError, SupabaseHTTPError, chunked, in_filter
 except ImportError as e:
     print(f"Erro: biblioteca necessaria nao instalada: {e}")
     print("\nInstale as dependencias:")
-    print("  pip install requests python-dotenv")
+    print('  pip install "httpx[http2]" python-dotenv')
     sys.exit(1)
 
 
@@ -40,89 +52,58 @@ except ImportError as e:
 # Constantes
 # ---------------------------------------------------------------------------
 
-THRESHOLD = 925  # Cargas com numero numerico < THRESHOLD serao deletadas
-BATCH_SIZE = 100  # Quantos IDs enviar por requisicao DELETE
-
-
-# ---------------------------------------------------------------------------
-# Cliente Supabase REST
-# ---------------------------------------------------------------------------
-
-
-class SupabaseClient:
-    """Cliente minimo para o Supabase REST API usando service role key."""
+THRESHOLD = 925  # Padrao: cargas com numero numerico < THRESHOLD serao deletadas
+BATCH_SIZE = 100  # Quantos IDs enviar por requisicao (in.(...))
+PAGE_SIZE = 1000  # Linhas por pagina ao listar as cargas alvo (max-rows do Supabase)
+MAX_WORKERS = 8  # Requisicoes simultaneas (concorrencia do client)
+PREVIEW_LIMIT = 50  # Cargas listadas no preview
 
-    def __init__(self, url: str, service_key: str) -> None:
-        self.base_url = url.rstrip("/")
-        self._headers = {
-            "apikey": service_key,
-            "Authorization": f"Bearer {service_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=representation",
-        }
+# Tabelas dependentes, apagadas antes de cargas: (tabela, coluna que aponta para cargas.id)
+DEPENDENT_TABLES = [
+    ("carga_sales_orders", "carga_id"),
+    ("carga_historico", "carga_id"),
+]
 
-    def select(self, table: str, columns: str = "*", filters: Optional[str] = None) -> list[dict]:
-        """
-        Executa um SELECT na tabela indicada.
+Filters = list[tuple[str, str]]
 
-        Args:
-            table:   Nome da tabela.
-            columns: Colunas a retornar (ex: "id,numero_carga").
-            filters: Query string de filtros PostgREST (ex: "numero_carga=lt.925").
 
-        Returns:
-            Lista de dicts com as linhas retornadas.
-
-        Raises:
-            requests.HTTPError: Se a resposta nao for 2xx.
-        """
-        url = f"{self.base_url}/rest/v1/{table}?select={columns}"
-        if filters:
-            url = f"{url}&{filters}"
-
-        response = requests.get(url, headers=self._headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
-
-    def table_exists(self, table: str) -> bool:
-        """Verifica se a tabela existe tentando um SELECT com limit=0."""
-        url = f"{self.base_url}/rest/v1/{table}?limit=0"
-        response = requests.get(url, headers=self._headers, timeout=10)
-        return response.status_code == 200
-
-    def delete_by_ids(self, table: str, id_column: str, ids: list) -> int:
-        """
-        Deleta linhas cujo id_column esteja na lista ids.
-        Opera em batches de BATCH_SIZE para evitar URLs muito longas.
+# ---------------------------------------------------------------------------
+# Operacoes em lote (supaclient)
+# ---------------------------------------------------------------------------
 
-        Args:
-            table:     Nome da tabela.
-            id_column: Coluna usada como chave (ex: "id", "carga_id").
-            ids:       Lista de valores a deletar.
 
-        Returns:
-            Total de linhas deletadas reportado pelo Supabase.
+async def delete_by_ids(client: SupabaseClient, table: str, id_column: str, ids: list) -> int:
+    """
+    Deleta linhas cujo id_column esteja na lista ids (corrotina: rode com
+    client.run/client.gather). Opera em batches de BATCH_SIZE (id=in.(...))
+    enviados ao mesmo tempo, limitados pela concorrencia do client.
 
-        Raises:
-            requests.HTTPError: Se alguma requisicao falhar.
-        """
-        total_deleted = 0
+    Args:
+        client:    Instancia do SupabaseClient.
+        table:     Nome da tabela.
+        id_column: Coluna usada como chave (ex: "id", "carga_id").
+        ids:       Lista de valores a deletar.
 
-        for i in range(0, len(ids), BATCH_SIZE):
-            batch = ids[i : i + BATCH_SIZE]
-            # PostgREST syntax: ?id=in.(1,2,3)
-            values = ",".join(str(v) for v in batch)
-            url = f"{self.base_url}/rest/v1/{table}?{id_column}=in.({values})"
+    Returns:
+        Total de linhas deletadas (contagem do servidor quando disponivel,
+        senao o tamanho dos batches).
 
-            headers = {**self._headers, "Prefer": "return=minimal"}
-            response = requests.delete(url, headers=headers, timeout=30)
-            response.raise_for_status()
+    Raises:
+        SupabaseError: Se alguma requisicao falhar.
+    """
+    batches = chunked(ids, BATCH_SIZE)
+    deleted = await client.aio.gather(
+        client.adelete(table, [(id_column, in_filter(batch))]) for batch in batches
+    )
+    return sum(len(batch) if n is None else n for batch, n in zip(batches, deleted))
 
-            # Supabase retorna 204 No Content para DELETE com return=minimal
-            # A contagem exata nao e retornada nesse modo, mas o status 2xx confirma sucesso
-            total_deleted += len(batch)
 
-        return total_deleted
+async def count_by_ids(client: SupabaseClient, table: str, id_column: str, ids: list) -> int:
+    """Conta (via HEAD count=exact) as linhas cujo id_column esteja na lista ids (corrotina)."""
+    counts = await client.aio.gather(
+        client.acount(table, [(id_column, in_filter(batch))]) for batch in chunked(ids, BATCH_SIZE)
+    )
+    return sum(counts)
 
 
 # ---------------------------------------------------------------------------
@@ -146,6 +127,110 @@ def extract_numeric(numero_carga: str) -> Optional[int]:
     return None
 
 
+def _digit_range(lo: str, hi: str) -> str:
+    return lo if lo == hi else f"[{lo}-{hi}]"
+
+
+def _range_patterns(lo: int, hi: int) -> list[str]:
+    """Regexes (sem zeros a esquerda) que casam exatamente os inteiros de lo a hi."""
+    if lo > hi:
+        return []
+    slo, shi = str(lo), str(hi)
+    if len(slo) < len(shi):
+        edge = 10 ** len(slo) - 1
+        return _range_patterns(lo, edge) + _range_patterns(edge + 1, hi)
+    if lo == hi:
+        return [slo]
+
+    i = 0
+    while slo[i] == shi[i]:
+        i += 1
+    prefix, rest = slo[:i], len(slo) - i - 1
+    if slo[i + 1 :] != "0" * rest:
+        edge = int(prefix + slo[i] + "9" * rest)
+        return _range_patterns(lo, edge) + _range_patterns(edge + 1, hi)
+    if shi[i + 1 :] != "9" * rest:
+        edge = int(prefix + shi[i] + "0" * rest)
+        return _range_patterns(lo, edge - 1) + _range_patterns(edge, hi)
+    tail = f"[0-9]{{{rest}}}" if rest > 1 else "[0-9]" * rest
+    return [prefix + _digit_range(slo[i], shi[i]) + tail]
+
+
+def numeric_range_regex(minimum: Optional[int] = None, maximum: Optional[int] = None) -> Optional[str]:
+    """
+    Regex POSIX para o operador `match` do PostgREST que reproduz
+    minimum <= extract_numeric(numero_carga) < maximum no servidor.
+
+    A primeira sequencia de digitos do texto e o numero (zeros a esquerda
+    ignorados), como em extract_numeric. Retorna None se o intervalo for vazio.
+    """
+    lo = max(minimum or 0, 0)
+    if maximum is None:
+        width = len(str(lo))
+        patterns = _range_patterns(lo, 10 ** width - 1) + [f"[1-9][0-9]{{{width},}}"]
+    else:
+        patterns = _range_patterns(lo, maximum - 1)
+    if not patterns:
+        return None
+    return f"^[^0-9]*0*({'|'.join(patterns)})([^0-9]|$)"
+
+
+def build_filters(args: argparse.Namespace) -> Filters:
+    """
+    Traduz o predicado da linha de comando em filtros PostgREST sobre cargas.
+    Sem nenhum predicado, usa o padrao numero_carga < THRESHOLD.
+
+    Raises:
+        ValueError: Se um --where for invalido ou a faixa de numeros for vazia.
+    """
+    filters: Filters = []
+    numero_max = args.numero_max
+    has_predicate = any([args.numero_min is not None, numero_max is not None,
+                         args.older_than is not None, args.status, args.where])
+    if not has_predicate:
+        numero_max = THRESHOLD
+
+    if args.numero_min is not None or numero_max is not None:
+        regex = numeric_range_regex(args.numero_min, numero_max)
+        if regex is None:
+            raise ValueError(f"Faixa de numero_carga vazia: [{args.numero_min}, {numero_max})")
+        filters.append(("numero_carga", f"match.{regex}"))
+
+    if args.older_than is not None:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=args.older_than)
+        filters.append((args.date_column, f"lt.{cutoff.isoformat(timespec='seconds')}"))
+
+    if args.status:
+        filters.append(("status", in_filter(args.status)))
+
+    for raw in args.where or []:
+        column, sep, expr = raw.partition("=")
+        if not sep or not column or "." not in expr:
+            raise ValueError(f"Filtro invalido: {raw!r} (use coluna=operador.valor, ex: status=eq.entregue)")
+        filters.append((column.strip(), expr.strip()))
+
+    return filters
+
+
+def describe_predicate(args: argparse.Namespace) -> str:
+    """Descricao legivel do predicado usado (para cabecalho e resumo)."""
+    parts = []
+    numero_max = args.numero_max
+    if not any([args.numero_min is not None, numero_max is not None,
+                args.older_than is not None, args.status, args.where]):
+        numero_max = THRESHOLD
+    if args.numero_min is not None:
+        parts.append(f"numero_carga >= {args.numero_min}")
+    if numero_max is not None:
+        parts.append(f"numero_carga < {numero_max}")
+    if args.older_than is not None:
+        parts.append(f"{args.date_column} ha mais de {args.older_than} dias")
+    if args.status:
+        parts.append(f"status em {', '.join(args.status)}")
+    parts.extend(args.where or [])
+    return " E ".join(parts)
+
+
 def load_credentials() -> tuple[str, str]:
     """
     Carrega as credenciais do Supabase a partir do .env ou variaveis de ambiente.
@@ -185,38 +270,34 @@ def load_credentials() -> tuple[str, str]:
 # ---------------------------------------------------------------------------
 
 
-def fetch_cargas_to_delete(client: SupabaseClient) -> list[dict]:
+def fetch_cargas_to_delete(client: SupabaseClient, filters: Filters) -> list[dict]:
     """
-    Consulta todas as cargas e retorna apenas aquelas cujo numero numerico < THRESHOLD.
+    Seleciona no servidor as cargas que atendem aos filtros.
 
     Returns:
-        Lista de dicts com ao menos as chaves 'id' e 'numero_carga'.
+        Lista de dicts com as chaves 'id' e 'numero_carga'.
     """
-    print("Consultando cargas no banco de dados...")
-    rows = client.select("cargas", columns="id,numero_carga")
-    print(f"  Total de cargas encontradas: {len(rows)}")
-
-    to_delete = []
-    for row in rows:
-        numero = row.get("numero_carga", "")
-        num = extract_numeric(numero)
-        if num is not None and num < THRESHOLD:
-            to_delete.append(row)
-
-    return to_delete
+    print("Consultando cargas alvo no banco de dados...")
+    total = client.count("cargas")
+    rows = client.select_all("cargas", columns="id,numero_carga", filters=filters, page_size=PAGE_SIZE)
+    print(f"  Total de cargas no banco: {total}")
+    print(f"  Cargas que atendem ao predicado: {len(rows)}")
+    return rows
 
 
 def print_preview(cargas: list[dict]) -> None:
     """Exibe a lista de cargas que seriam deletadas."""
     if not cargas:
-        print("  Nenhuma carga encontrada com numero < 925.")
+        print("  Nenhuma carga encontrada para o predicado.")
         return
 
     print(f"\n  Cargas que SERIAM deletadas ({len(cargas)} total):")
     # Ordena pelo numero numerico para leitura mais clara
     sorted_cargas = sorted(cargas, key=lambda r: extract_numeric(r["numero_carga"]) or 0)
-    for row in sorted_cargas:
+    for row in sorted_cargas[:PREVIEW_LIMIT]:
         print(f"    id={row['id']}  numero_carga={row['numero_carga']}")
+    if len(sorted_cargas) > PREVIEW_LIMIT:
+        print(f"    ... e mais {len(sorted_cargas) - PREVIEW_LIMIT} carga(s)")
 
 
 def run_cleanup(
@@ -224,60 +305,52 @@ def run_cleanup(
     cargas: list[dict],
     has_historico: bool,
     dry_run: bool,
-) -> None:
+) -> dict[str, int]:
     """
-    Executa (ou simula) a sequencia de deleção:
-      1. carga_sales_orders
-      2. carga_historico (se existir)
-      3. cargas
+    Executa (ou simula) a sequencia de delecao em duas fases:
+      1. dependentes (carga_sales_orders e carga_historico, se existir); os
+         batches das duas tabelas vao juntos
+      2. cargas
 
     Args:
-        client:       Instancia do SupabaseClient.
-        cargas:       Lista de dicts {'id': ..., 'numero_carga': ...} a deletar.
+        client:        Instancia do SupabaseClient.
+        cargas:        Lista de dicts {'id': ..., 'numero_carga': ...} a deletar.
         has_historico: Se True, a tabela carga_historico existe.
-        dry_run:      Se True, apenas exibe o que seria feito sem apagar nada.
+        dry_run:       Se True, apenas conta (HEAD count=exact) o que seria removido.
+
+    Returns:
+        Dict {tabela: registros removidos (ou que seriam removidos)}.
     """
     carga_ids = [row["id"] for row in cargas]
     mode_label = "[DRY-RUN] " if dry_run else ""
+    verb = "seriam removidos" if dry_run else "removido(s)"
+    action = count_by_ids if dry_run else delete_by_ids
+
+    dependents = [(t, col) for t, col in DEPENDENT_TABLES if t != "carga_historico" or has_historico]
 
     print(f"\n{mode_label}Sequencia de delecao:")
     print(f"  IDs das cargas alvo: {len(carga_ids)} registros")
 
-    # --- carga_sales_orders ---
-    print(f"\n{mode_label}1. Deletando registros em carga_sales_orders...")
-    if not dry_run:
-        deleted = client.delete_by_ids("carga_sales_orders", "carga_id", carga_ids)
-        print(f"     {deleted} registro(s) removido(s).")
-    else:
-        # No dry-run, consulta para mostrar quantos existem
-        rows = client.select("carga_sales_orders", columns="id,carga_id,so_number")
-        affected = [r for r in rows if r.get("carga_id") in carga_ids]
-        print(f"     {len(affected)} registro(s) seriam removidos.")
-
-    # --- carga_historico ---
-    if has_historico:
-        print(f"\n{mode_label}2. Deletando registros em carga_historico...")
-        if not dry_run:
-            deleted = client.delete_by_ids("carga_historico", "carga_id", carga_ids)
-            print(f"     {deleted} registro(s) removido(s).")
-        else:
-            rows = client.select("carga_historico", columns="id,carga_id")
-            affected = [r for r in rows if r.get("carga_id") in carga_ids]
-            print(f"     {len(affected)} registro(s) seriam removidos.")
-    else:
-        print(f"\n{mode_label}2. Tabela carga_historico nao encontrada — pulando.")
-
-    # --- cargas ---
-    step = 3 if has_historico else 2
-    print(f"\n{mode_label}{step}. Deletando registros em cargas...")
-    if not dry_run:
-        deleted = client.delete_by_ids("cargas", "id", carga_ids)
-        print(f"     {deleted} registro(s) removido(s).")
-    else:
-        print(f"     {len(carga_ids)} registro(s) seriam removidos.")
+    # --- Fase 1: dependentes, todas as tabelas ao mesmo tempo ---
+    print(f"\n{mode_label}1. Deletando registros dependentes ({', '.join(t for t, _ in dependents)})...")
+    if not has_historico:
+        print("     Tabela carga_historico nao encontrada — pulando.")
+
+    counts = client.gather(action(client, table, column, carga_ids) for table, column in dependents)
+    results: dict[str, int] = {}
+    for (table, _), count in zip(dependents, counts):
+        results[table] = count
+        print(f"     {table}: {count} registro(s) {verb}.")
 
+    # --- Fase 2: cargas ---
+    print(f"\n{mode_label}2. Deletando registros em cargas...")
+    results["cargas"] = client.run(action(client, "cargas", "id", carga_ids))
+    print(f"     {results['cargas']} registro(s) {verb}.")
 
-def print_summary(cargas: list[dict], dry_run: bool) -> None:
+    return results
+
+
+def print_summary(cargas: list[dict], results: dict[str, int], predicate: str, dry_run: bool) -> None:
     """Imprime resumo final da operacao."""
     print("\n" + "=" * 60)
     print("  RESUMO")
@@ -286,7 +359,10 @@ def print_summary(cargas: list[dict], dry_run: bool) -> None:
         print(f"  Modo:           DRY-RUN (nenhum dado foi alterado)")
     else:
         print(f"  Modo:           EXECUCAO REAL")
-    print(f"  Cargas alvo:    {len(cargas)} (numero_carga < {THRESHOLD})")
+    print(f"  Predicado:      {predicate}")
+    print(f"  Cargas alvo:    {len(cargas)}")
+    for table, count in results.items():
+        print(f"  {table + ':':<22}{count}")
     if dry_run:
         print("\n  Para executar a limpeza real, rode sem --dry-run:")
         print("    python cleanup_old_cargas.py")
@@ -300,61 +376,83 @@ def print_summary(cargas: list[dict], dry_run: bool) -> None:
 
 def main() -> None:
     parser = argparse.ArgumentParser(
-        description=f"Remove cargas com numero_carga < {THRESHOLD} e seus registros relacionados."
+        description=(
+            "Remove as cargas que atendem ao predicado e seus registros relacionados. "
+            f"Sem predicado, remove cargas com numero_carga < {THRESHOLD}."
+        )
     )
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="Exibe o que seria deletado sem efetuar nenhuma alteracao no banco.",
     )
+    parser.add_argument("--numero-min", type=int, help="numero_carga numerico >= N")
+    parser.add_argument("--numero-max", type=int, help=f"numero_carga numerico < N (padrao: {THRESHOLD})")
+    parser.add_argument("--older-than", type=int, metavar="DIAS", help="Cargas com data anterior a DIAS dias atras")
+    parser.add_argument("--date-column", default="created_at",
+                        help="Coluna de data usada por --older-than (padrao: created_at)")
+    parser.add_argument("--status", action="append", help="Status da carga (pode repetir)")
+    parser.add_argument("--where", action="append", metavar="COLUNA=OP.VALOR",
+                        help="Filtro PostgREST adicional sobre cargas (pode repetir), ex: status=eq.entregue")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help=f"Requisicoes simultaneas (padrao: {MAX_WORKERS})")
     args = parser.parse_args()
 
+    try:
+        filters = build_filters(args)
+    except ValueError as exc:
+        parser.error(str(exc))
+    predicate = describe_predicate(args)
+
     print("=" * 60)
     print("  LIMPEZA DE CARGAS ANTIGAS")
-    print(f"  Threshold: numero_carga < {THRESHOLD}")
+    print(f"  Predicado: {predicate}")
     print("=" * 60)
 
     supabase_url, service_key = load_credentials()
 
     print(f"\nConectando ao Supabase: {supabase_url}")
-    client = SupabaseClient(supabase_url, service_key)
-
-    # Descobrir se a tabela carga_historico existe
-    print("Verificando tabela carga_historico...")
-    has_historico = client.table_exists("carga_historico")
-    print(f"  carga_historico: {'encontrada' if has_historico else 'NAO encontrada'}")
-
-    # Buscar cargas candidatas a delecao
-    cargas_to_delete = fetch_cargas_to_delete(client)
-
-    if not cargas_to_delete:
-        print(f"\nNenhuma carga com numero < {THRESHOLD} encontrada. Nada a fazer.")
-        sys.exit(0)
-
-    # Sempre exibir o preview
-    print_preview(cargas_to_delete)
-
-    if not args.dry_run:
-        # Confirmacao de seguranca para execucao real
-        print(f"\nATENCAO: Esta operacao e IRREVERSIVEL.")
-        print(f"  Serao deletadas {len(cargas_to_delete)} carga(s) e todos os seus registros relacionados.")
-        confirm = input("  Digite 'SIM' para confirmar: ").strip()
-        if confirm != "SIM":
-            print("  Operacao cancelada pelo usuario.")
-            sys.exit(0)
+    client = SupabaseClient(supabase_url, service_key, concurrency=max(args.workers, 1))
 
-    # Executar limpeza
     try:
-        run_cleanup(client, cargas_to_delete, has_historico, dry_run=args.dry_run)
-    except requests.HTTPError as exc:
+        # Descobrir se a tabela carga_historico existe
+        print("Verificando tabela carga_historico...")
+        has_historico = client.table_exists("carga_historico")
+        print(f"  carga_historico: {'encontrada' if has_historico else 'NAO encontrada'}")
+
+        # Buscar cargas candidatas a delecao
+        cargas_to_delete = fetch_cargas_to_delete(client, filters)
+
+        if not cargas_to_delete:
+            print(f"\nNenhuma carga encontrada para o predicado ({predicate}). Nada a fazer.")
+            sys.exit(0)
+
+        # Sempre exibir o preview
+        print_preview(cargas_to_delete)
+
+        if not args.dry_run:
+            # Confirmacao de seguranca para execucao real
+            print(f"\nATENCAO: Esta operacao e IRREVERSIVEL.")
+            print(f"  Serao deletadas {len(cargas_to_delete)} carga(s) e todos os seus registros relacionados.")
+            confirm = input("  Digite 'SIM' para confirmar: ").strip()
+            if confirm != "SIM":
+                print("  Operacao cancelada pelo usuario.")
+                sys.exit(0)
+
+        # Executar limpeza
+        results = run_cleanup(client, cargas_to_delete, has_historico, dry_run=args.dry_run)
+    except SupabaseHTTPError as exc:
         print(f"\nErro HTTP durante a limpeza: {exc}")
-        print(f"  Response: {exc.response.text[:400] if exc.response is not None else 'N/A'}")
+        print(f"  Response: {exc.text[:400]}")
         sys.exit(1)
-    except requests.RequestException as exc:
+    except SupabaseError as exc:
         print(f"\nErro de conexao: {exc}")
         sys.exit(1)
+    finally:
+        client.print_metrics()
+        client.close()
 
-    print_summary(cargas_to_delete, dry_run=args.dry_run)
+    print_summary(cargas_to_delete, results, predicate, dry_run=args.dry_run)
 
 
 if __name__ == "__main__":
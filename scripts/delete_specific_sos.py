@@ -6,9 +6,15 @@ Deletar SOs especificas do banco de dados.
 Remove SOs da tabela envios_processados e seus vinculos em carga_sales_orders.
 Ignora SOs que nao existem no banco.
 
+As SOs vem de um arquivo (uma por linha, ou separadas por virgula) ou do
+stdin. Existencia e vinculos sao consultados com um in.() por batch, e os
+batches rodam em paralelo no pool de conexoes do client. Os DELETEs usam
+return=minimal: o servidor devolve so a contagem, nao as linhas apagadas.
+
 Uso:
-    python scripts/delete_specific_sos.py --dry-run   # Preview
-    python scripts/delete_specific_sos.py              # Executar
+    python scripts/delete_specific_sos.py sos.txt --dry-run   # Preview
+    python scripts/delete_specific_sos.py sos.txt             # Executar
+    cat sos.txt | python scripts/delete_specific_sos.py - --yes
 
 Variaveis de ambiente (.env):
     SUPABASE_URL               URL do projeto Supabase
@@ -16,96 +22,76 @@ Variaveis de ambiente (.env):
 """
 
 import os
+import re
 import sys
 import argparse
 
 try:
-    import requests
     from dotenv import load_dotenv
+    from supaclient import SupabaseClient, chunked, in_filter
 except ImportError as e:
     print(f"Erro: biblioteca necessaria nao instalada: {e}")
     print("\nInstale as dependencias:")
-    print("  pip install requests python-dotenv")
+    print('  pip install "httpx[http2]" python-dotenv')
     sys.exit(1)
 
-# ---------------------------------------------------------------------------
-# Lista de SOs para deletar (deduplicada)
-# ---------------------------------------------------------------------------
-
-SOS_TO_DELETE = sorted(set([
-    "23239399", "23248715", "23249954", "23250064", "23211403", "23211691",
-    "23222042", "23231623", "23231929", "23234082", "23238245", "23238359",
-    "23239208", "23242135", "23242137", "23242713", "23243966", "23244659",
-    "23245116", "23245963", "23247028", "23257846", "23259656", "23259814",
-    "23260083", "23260295", "23260296", "23260351", "23261902", "23261987",
-    "23262241", "23262247", "23205545", "23210414", "23211594", "23218535",
-    "23221352", "23233161", "23240692", "23240918", "23242132", "23248339",
-    "23248340", "23249776", "23250915", "23250916", "23250925", "23251091",
-    "23251243", "23251592", "23251594", "23252052", "23255401", "23255402",
-    "23255403", "23255404", "23255405", "23256045", "23256255", "23259658",
-    "23259815", "23260248", "23262242", "23262244", "23262245", "23262246",
-    "23262249", "23263522", "23263547", "23263560", "23264045", "23264736",
-    "23264737", "23264740", "23267758", "23267694", "23255128", "23258767",
-    "23259657", "23259848", "23260085", "23260377", "23260442", "23262199",
-    "23264738", "23264739", "23264741", "23267533", "23267621", "23268096",
-    "23269212", "23270955", "23275373", "23275379", "23279421", "23280243",
-    "23280244", "23280245", "23280246", "23280945", "23260084", "23262208",
-    "23267677", "23269210", "23280242", "23280249", "23280572", "23283640",
-    "23284897", "23284898", "23284900", "23284901", "23287562", "23288212",
-    "23288657", "23288756", "23288763", "23292015", "23292016", "23292019",
-    "23292020", "23292022", "23292673", "23294998", "23295023", "23295024",
-    "23295221", "23296967", "23297301", "23297673", "23297674", "23297757",
-    "23300643", "23300644", "23300645", "23302407", "23287269", "23287287",
-    "23292042", "23303570", "23285771", "23287415", "23287891", "23288761",
-    "23288762", "23288769", "23289210", "23296888", "23297300", "23297672",
-    "23302406", "23303259", "23305320", "23306809", "23307005", "23308043",
-    "23309508", "23309509", "23309510", "23309511", "23309892", "23309893",
-    "23310106", "23310309", "23310311", "23310313", "23310314", "23312382",
-    "23312383", "23312385", "23312386", "23312414", "23316066", "23316096",
-    "23316113", "23316861", "23316862", "23316864", "23316865", "23316905",
-    "23317143", "23317145", "23317146", "23319019", "23322959", "23323485",
-    "23323487", "23323488", "23325459", "23326650", "23326651", "23326653",
-    "23328525", "23328560", "23328619", "23329500", "23329501", "23329696",
-    "23329881", "23329882", "23329883", "23329884", "23329885", "23333573",
-    "23333574", "23334044", "23335579", "23335654", "23335897", "23336005",
-    "23337117", "23337118", "23337119", "23337121", "23337122", "23337123",
-    "23337125", "23337126", "23337127", "23302123", "23306128", "23306130",
-    "23332220", "23337675", "23347731", "23349821",
-]))
-
 BATCH_SIZE = 50
-
-
-class SupabaseClient:
-    def __init__(self, url, service_key):
-        self.base_url = url.rstrip("/")
-        self._headers = {
-            "apikey": service_key,
-            "Authorization": f"Bearer {service_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=representation",
-        }
-
-    def select(self, table, columns="*", filters=None):
-        url = f"{self.base_url}/rest/v1/{table}?select={columns}"
-        if filters:
-            url += f"&{filters}"
-        resp = requests.get(url, headers=self._headers)
-        resp.raise_for_status()
-        return resp.json()
-
-    def delete(self, table, filters):
-        url = f"{self.base_url}/rest/v1/{table}?{filters}"
-        resp = requests.delete(url, headers=self._headers)
-        resp.raise_for_status()
-        return resp.json()
+CONCURRENCY = 8  # batches em voo ao mesmo tempo
+PREVIEW_LIMIT = 20
+
+
+def read_sos(path):
+    """
+    Le a lista de SOs de um arquivo ("-" = stdin). Aceita uma SO por linha ou
+    separadas por virgula/ponto-e-virgula/espaco; linhas com # sao comentarios.
+    Duplicadas sao removidas mantendo a ordem do arquivo.
+    """
+    if path == "-":
+        text = sys.stdin.read()
+    else:
+        with open(path, encoding="utf-8-sig") as f:
+            text = f.read()
+    sos = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0]
+        for token in re.split(r"[\s,;]+", line):
+            token = token.strip().strip("'\"")
+            if token:
+                sos.append(token)
+    return list(dict.fromkeys(sos))
 
 
 def main():
-    parser = argparse.ArgumentParser(description="Deletar SOs especificas")
+    parser = argparse.ArgumentParser(
+        description="Deletar SOs especificas",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos:
+  python scripts/delete_specific_sos.py sos.txt --dry-run
+  python scripts/delete_specific_sos.py sos.txt
+  cat sos.txt | python scripts/delete_specific_sos.py - --yes
+        """,
+    )
+    parser.add_argument("arquivo", help="Arquivo com as SOs (uma por linha) ou - para ler do stdin")
     parser.add_argument("--dry-run", action="store_true", help="Preview sem deletar")
+    parser.add_argument("--yes", action="store_true", help="Nao pedir confirmacao (obrigatorio com stdin)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"SOs por requisicao (default: {BATCH_SIZE})")
+    parser.add_argument("--workers", type=int, default=CONCURRENCY,
+                        help=f"Requisicoes em voo ao mesmo tempo (default: {CONCURRENCY})")
     args = parser.parse_args()
 
+    if args.arquivo == "-" and not (args.yes or args.dry_run):
+        parser.error("com a lista no stdin nao ha como confirmar; use --yes ou --dry-run")
+    if args.batch_size < 1:
+        parser.error("--batch-size deve ser >= 1")
+
+    try:
+        sos = read_sos(args.arquivo)
+    except OSError as e:
+        print(f"Erro ao ler {args.arquivo}: {e}")
+        sys.exit(1)
+
     # Carregar .env (scripts/ e root)
     scripts_env = os.path.join(os.path.dirname(__file__), ".env")
     root_env = os.path.join(os.path.dirname(__file__), "..", ".env")
@@ -119,39 +105,67 @@ def main():
         print("Erro: SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY devem estar no .env")
         sys.exit(1)
 
-    client = SupabaseClient(url, key)
+    with SupabaseClient(url, key, concurrency=max(args.workers, 1)) as client:
+        try:
+            run(client, sos, args)
+        finally:
+            client.print_metrics()
+
+
+# ---------------------------------------------------------------------------
+# Operacoes por batch: cada batch percorre as fases em sequencia, e os
+# batches rodam ao mesmo tempo (limitados pelo pool do client).
+# ---------------------------------------------------------------------------
+
+async def inspect_batch(client, batch):
+    """Busca as SOs do batch e conta os vinculos das que existem."""
+    rows = await client.aselect("envios_processados", "sales_order,cliente",
+                                [("sales_order", in_filter(batch))])
+    clientes = {r["sales_order"]: r["cliente"] for r in rows}
+    found = [so for so in batch if so in clientes]
+    links = await client.acount("carga_sales_orders", [("so_number", in_filter(found))]) if found else 0
+    return clientes, links
+
+
+async def delete_batch(client, batch):
+    """
+    Remove os vinculos e depois as SOs do batch (return=minimal: so a contagem
+    volta do servidor). Se os vinculos falharem, as SOs do batch ficam.
+    """
+    links = await client.adelete("carga_sales_orders", [("so_number", in_filter(batch))])
+    sos = await client.adelete("envios_processados", [("sales_order", in_filter(batch))])
+    return (len(batch) if sos is None else sos), (links or 0)
 
+
+def run(client, sos, args):
     print(f"=== DELETAR SOs ESPECIFICAS ===")
-    print(f"Total de SOs na lista: {len(SOS_TO_DELETE)}")
+    print(f"Total de SOs na lista: {len(sos)}")
     print()
 
-    # 1. Verificar quais existem no banco
+    if not sos:
+        print("Lista vazia. Encerrando.")
+        return
+
+    # 1. Verificar quais existem no banco e contar vinculos (batches em paralelo)
     print("Verificando quais SOs existem no banco...")
-    found_sos = []
-    not_found = []
+    batches = chunked(sos, args.batch_size)
+    results = client.map(lambda batch: inspect_batch(client, batch), batches, return_exceptions=True)
 
-    for i in range(0, len(SOS_TO_DELETE), BATCH_SIZE):
-        batch = SOS_TO_DELETE[i:i + BATCH_SIZE]
-        so_filter = ",".join(batch)
-        try:
-            rows = client.select(
-                "envios_processados",
-                columns="sales_order,cliente",
-                filters=f"sales_order=in.({so_filter})"
-            )
-            found_in_batch = {r["sales_order"] for r in rows}
-            for so in batch:
-                if so in found_in_batch:
-                    cliente = next((r["cliente"] for r in rows if r["sales_order"] == so), "?")
-                    found_sos.append((so, cliente))
-                else:
-                    not_found.append(so)
-        except Exception as e:
-            print(f"  Erro ao consultar batch: {e}")
+    clientes = {}
+    link_count = 0
+    for number, result in enumerate(results, start=1):
+        if isinstance(result, Exception):
+            print(f"  Erro ao consultar batch {number}: {result}")
             sys.exit(1)
+        found, links = result
+        clientes.update(found)
+        link_count += links
+
+    found_sos = [so for so in sos if so in clientes]
+    not_found = len(sos) - len(found_sos)
 
     print(f"\n  Encontradas no banco: {len(found_sos)}")
-    print(f"  Nao encontradas (ignoradas): {len(not_found)}")
+    print(f"  Nao encontradas (ignoradas): {not_found}")
 
     if not found_sos:
         print("\nNenhuma SO para deletar. Encerrando.")
@@ -159,26 +173,10 @@ def main():
 
     # 2. Preview
     print(f"\n=== SOs QUE SERAO DELETADAS ({len(found_sos)}) ===")
-    for so, cliente in found_sos[:20]:
-        print(f"  {so}  ({cliente})")
-    if len(found_sos) > 20:
-        print(f"  ... e mais {len(found_sos) - 20} SOs")
-
-    # 3. Verificar vinculos em carga_sales_orders
-    found_so_numbers = [so for so, _ in found_sos]
-    link_count = 0
-    for i in range(0, len(found_so_numbers), BATCH_SIZE):
-        batch = found_so_numbers[i:i + BATCH_SIZE]
-        so_filter = ",".join(batch)
-        try:
-            links = client.select(
-                "carga_sales_orders",
-                columns="so_number",
-                filters=f"so_number=in.({so_filter})"
-            )
-            link_count += len(links)
-        except Exception:
-            pass
+    for so in found_sos[:PREVIEW_LIMIT]:
+        print(f"  {so}  ({clientes[so]})")
+    if len(found_sos) > PREVIEW_LIMIT:
+        print(f"  ... e mais {len(found_sos) - PREVIEW_LIMIT} SOs")
 
     print(f"\n  Vinculos em carga_sales_orders: {link_count}")
 
@@ -186,44 +184,41 @@ def main():
         print("\n[DRY RUN] Nenhuma alteracao feita.")
         return
 
-    # 4. Confirmacao
+    # 3. Confirmacao
     print(f"\n{'='*50}")
     print(f"ATENCAO: Isso vai deletar {len(found_sos)} SOs e {link_count} vinculos.")
     print(f"{'='*50}")
-    confirm = input("Digite SIM para confirmar: ").strip()
-    if confirm != "SIM":
-        print("Operacao cancelada.")
-        return
-
-    # 5. Deletar vinculos em carga_sales_orders
-    print("\nDeletando vinculos em carga_sales_orders...")
-    deleted_links = 0
-    for i in range(0, len(found_so_numbers), BATCH_SIZE):
-        batch = found_so_numbers[i:i + BATCH_SIZE]
-        so_filter = ",".join(batch)
-        try:
-            result = client.delete("carga_sales_orders", f"so_number=in.({so_filter})")
-            deleted_links += len(result)
-            print(f"  Batch {i // BATCH_SIZE + 1}: {len(result)} vinculos deletados")
-        except Exception as e:
-            print(f"  Erro no batch: {e}")
-
-    # 6. Deletar SOs em envios_processados
-    print("\nDeletando SOs em envios_processados...")
-    deleted_sos = 0
-    for i in range(0, len(found_so_numbers), BATCH_SIZE):
-        batch = found_so_numbers[i:i + BATCH_SIZE]
-        so_filter = ",".join(batch)
-        try:
-            result = client.delete("envios_processados", f"sales_order=in.({so_filter})")
-            deleted_sos += len(result)
-            print(f"  Batch {i // BATCH_SIZE + 1}: {len(result)} SOs deletadas")
-        except Exception as e:
-            print(f"  Erro no batch: {e}")
+    if not args.yes:
+        confirm = input("Digite SIM para confirmar: ").strip()
+        if confirm != "SIM":
+            print("Operacao cancelada.")
+            return
+
+    # 4. Deletar vinculos e SOs (cada batch: vinculos -> SOs)
+    print("\nDeletando vinculos e SOs...")
+    found_batches = chunked(found_sos, args.batch_size)
+    results = client.map(lambda batch: delete_batch(client, batch), found_batches, return_exceptions=True)
+
+    deleted_sos = deleted_links = 0
+    failed = []
+    for number, (batch, result) in enumerate(zip(found_batches, results), start=1):
+        if isinstance(result, Exception):
+            print(f"  Erro no batch {number}: {result}")
+            failed.extend(batch)
+            continue
+        n_sos, n_links = result
+        deleted_sos += n_sos
+        deleted_links += n_links
+        print(f"  Batch {number}: {n_sos} SOs, {n_links} vinculos deletados")
 
     print(f"\n=== CONCLUIDO ===")
     print(f"  SOs deletadas: {deleted_sos}")
     print(f"  Vinculos deletados: {deleted_links}")
+    if failed:
+        print(f"  SOs com erro (rode de novo com elas): {len(failed)}")
+        for so in failed[:PREVIEW_LIMIT]:
+            print(f"    {so}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
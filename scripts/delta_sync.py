@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Delta sync for migration snapshots (`--delta` / `--since`).
+
+Every table with an `updated_at` column, plus the append-only tables in
+APPEND_ONLY_TABLES (by `created_at` / `attempted_at`), gets a high-water
+mark: the server time at which its last export started. A delta export then pulls only rows with
+`{column} >= watermark - DELTA_OVERLAP` and merges them into the existing
+snapshot by primary key, keeping the snapshot's format (NDJSON, gzip NDJSON or
+Arrow). The same rows are merged by id into migration_data/{table}.delta.ndjson,
+which accumulates every delta not yet imported.
+
+Watermarks live in migration_data/watermarks.json:
+
+    {"cargas": {"column": "updated_at", "watermark": "2026-...", "mode": "delta", "rows": 12,
+                "imported": "2026-..."}}
+
+`mode` records what the last export of the table was ("full" or "delta").
+`imported` is the export watermark the target had fully received at the last
+clean import: while it is set, a --delta import only posts the pending delta
+file; a full export drops it, so the next import posts the whole snapshot.
+The importer sets it (and removes the pending file) only after every batch
+went through, so failed imports and several delta exports in a row are all
+sent by the next import. The updated_at triggers (see
+generate_schema.generate_triggers) keep `updated_at` current on UPDATE.
+Deleted rows are not seen by a delta: run a full export to drop them.
+Tables updated in place without an `updated_at` (notification_queue,
+active_alerts, ...) have no watermark and are fully re-exported on every
+delta run.
+"""
+
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from migration_snapshot import SnapshotWriter, iter_snapshot_rows, snapshot_path
+
+# Watermark column of tables whose rows change in place
+UPDATED_COLUMN = "updated_at"
+# Tables the app only ever inserts into (and deletes from), so an insert-time
+# column is a safe watermark. Rows of any other table without updated_at may
+# change in place (e.g. notification_queue.status), so those get full exports.
+APPEND_ONLY_TABLES = {
+    "auth_attempts": "attempted_at",
+    "carga_historico": "created_at",
+    "carga_sales_orders": "created_at",
+    "security_audit_log": "created_at",
+    "shipment_history": "created_at",
+}
+# Re-read this much before the watermark: clock skew and transactions that
+# commit after their now(). Re-read rows merge idempotently.
+DELTA_OVERLAP = timedelta(minutes=5)
+WATERMARKS_FILE = "watermarks.json"
+DELTA_SUFFIX = ".delta.ndjson"
+MERGE_CHUNK_ROWS = 10_000
+
+_RELATIVE = re.compile(r"^(\d+(?:\.\d+)?)\s*([smhd])$")
+_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+_lock = threading.Lock()
+
+
+def parse_since(value: str) -> datetime:
+    """
+    --since value: an ISO date/datetime (naive = UTC) or a relative age
+    such as 30m, 6h or 2d. Raises ValueError otherwise.
+    """
+    value = value.strip()
+    match = _RELATIVE.match(value.lower())
+    if match:
+        amount, unit = match.groups()
+        return datetime.now(timezone.utc) - timedelta(**{_UNITS[unit]: float(amount)})
+    at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return at if at.tzinfo else at.replace(tzinfo=timezone.utc)
+
+
+def watermark_column(table: str, definitions: Dict[str, Any]) -> Optional[str]:
+    """Column used as high-water mark for a table (None: always full export)"""
+    columns = definitions.get(table, {}).get("properties", {})
+    if UPDATED_COLUMN in columns:
+        return UPDATED_COLUMN
+    column = APPEND_ONLY_TABLES.get(table)
+    return column if column in columns else None
+
+
+def full_export_tables(tables: Iterable[str], definitions: Dict[str, Any]) -> List[str]:
+    """Tables a delta run re-exports in full (no watermark column)"""
+    return [t for t in tables if watermark_column(t, definitions) is None]
+
+
+def delta_path(data_dir: Path, table: str) -> Path:
+    return Path(data_dir) / f"{table}{DELTA_SUFFIX}"
+
+
+def delta_filter(column: str, since: datetime) -> Tuple[str, str]:
+    """PostgREST filter for rows changed since `since` (minus DELTA_OVERLAP)"""
+    return column, f"gte.{(since - DELTA_OVERLAP).astimezone(timezone.utc).isoformat()}"
+
+
+def server_time(response_or_client, table: Optional[str] = None) -> datetime:
+    """
+    Current time according to the server (HTTP Date header), so watermarks
+    don't depend on the local clock. Accepts a response, or a client plus a
+    table to send a cheap HEAD to. Falls back to the local clock.
+    """
+    response = response_or_client
+    if table is not None:
+        try:
+            response = response_or_client.request("HEAD", f"rest/v1/{table}",
+                                                  params=[("limit", "0")], check=False)
+        except Exception:
+            response = None
+    try:
+        return parsedate_to_datetime(response.headers["date"]).astimezone(timezone.utc)
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return datetime.now(timezone.utc)
+
+
+def load_watermarks(data_dir: Path) -> Dict[str, Dict[str, Any]]:
+    path = Path(data_dir) / WATERMARKS_FILE
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def get_watermark(data_dir: Path, table: str) -> Optional[Dict[str, Any]]:
+    return load_watermarks(data_dir).get(table)
+
+
+def _write_watermarks(data_dir: Path, marks: Dict[str, Dict[str, Any]]) -> None:
+    path = Path(data_dir) / WATERMARKS_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(marks, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def save_watermark(data_dir: Path, table: str, column: Optional[str], watermark: Optional[datetime],
+                   mode: str, rows: int) -> None:
+    """
+    Record a table's export watermark (thread-safe, atomic rewrite of the
+    file). A delta keeps the import watermark; a full export drops it.
+    """
+    with _lock:
+        marks = load_watermarks(data_dir)
+        if column is None or watermark is None:
+            marks.pop(table, None)
+        else:
+            mark = {
+                "column": column,
+                "watermark": watermark.astimezone(timezone.utc).isoformat(),
+                "mode": mode,
+                "rows": rows,
+            }
+            imported = marks.get(table, {}).get("imported")
+            if mode == "delta" and imported:
+                mark["imported"] = imported
+            marks[table] = mark
+        _write_watermarks(data_dir, marks)
+
+
+def save_import_watermark(data_dir: Path, table: str, watermark: str) -> None:
+    """
+    After a clean import: the target has every row exported up to `watermark`
+    (the export watermark read before the import), so the pending delta file
+    is no longer needed.
+    """
+    with _lock:
+        marks = load_watermarks(data_dir)
+        mark = marks.get(table)
+        if mark is None:
+            return
+        if mark["watermark"] == watermark:
+            delta_path(data_dir, table).unlink(missing_ok=True)
+        elif not mark.get("imported"):
+            return  # a full export ran meanwhile: its snapshot still has to be imported
+        mark["imported"] = watermark
+        _write_watermarks(data_dir, marks)
+
+
+def stage_delta(data_dir: Path, table: str, fetched: Path) -> int:
+    """
+    Move freshly fetched delta rows into the pending {table}.delta.ndjson,
+    merging by id with the deltas earlier exports left there for the next
+    import. Returns the number of pending rows.
+    """
+    fetched, pending = Path(fetched), delta_path(data_dir, table)
+    if not fetched.exists() or fetched.stat().st_size == 0:
+        fetched.unlink(missing_ok=True)
+        return sum(1 for _ in iter_snapshot_rows(pending)) if pending.exists() else 0
+    if not pending.exists():
+        os.replace(fetched, pending)
+        return sum(1 for _ in iter_snapshot_rows(pending))
+    _, total, _, _ = merge_snapshot(pending, fetched, table)
+    fetched.unlink()
+    return total
+
+
+def merge_snapshot(snapshot: Path, delta: Path, table: str, key: str = "id") -> Tuple[Path, int, int, int]:
+    """
+    Merge delta rows into a snapshot by `key`: changed rows replace the old
+    version in place, new rows are appended. The snapshot is streamed and
+    rewritten atomically in its own format (a legacy .json array becomes
+    NDJSON); only the delta is held in memory.
+
+    Returns (snapshot path, total rows, updated rows, inserted rows).
+    """
+    snapshot = Path(snapshot)
+    changed = {row[key]: row for row in iter_snapshot_rows(delta)}
+    counts = {"total": 0, "updated": 0}
+
+    def merged() -> Iterator[Dict[str, Any]]:
+        for row in iter_snapshot_rows(snapshot):
+            new = changed.pop(row.get(key), None)
+            if new is not None:
+                counts["updated"] += 1
+            counts["total"] += 1
+            yield row if new is None else new
+        inserted = list(changed.values())
+        counts["total"] += len(inserted)
+        yield from inserted
+
+    name = snapshot.name
+    inserted_before = len(changed)
+    if name.endswith(".arrow"):
+        from arrow_snapshot import write_arrow
+        target = snapshot
+        write_arrow(merged(), target, table)  # writes a temp file, then renames
+    else:
+        target = snapshot if name.endswith((".ndjson", ".ndjson.gz")) else \
+            snapshot_path(snapshot.parent, table)
+        tmp = target.with_name(target.name + ".merge" + (".gz" if target.name.endswith(".gz") else ""))
+        writer = SnapshotWriter(tmp)
+        writer.reset(0)
+        chunk = []
+        for row in merged():
+            chunk.append(row)
+            if len(chunk) >= MERGE_CHUNK_ROWS:
+                writer.append(chunk)
+                chunk = []
+        if chunk:
+            writer.append(chunk)
+        os.replace(tmp, target)
+        if target != snapshot:
+            snapshot.unlink()  # legacy .json array, now NDJSON
+
+    inserted = inserted_before - counts["updated"]
+    return target, counts["total"], counts["updated"], inserted
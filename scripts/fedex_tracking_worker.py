@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Worker de tracking FedEx: substitui o workflow "3 - FedEx Scraper" do n8n.
+
+O workflow pede um token OAuth novo a cada execucao e faz uma chamada a
+track/v1/trackingnumbers por par tracking x SO (o "Processar Token" abre um
+item por SO). Este worker:
+
+  1. le v_envios_pendentes_tracking (paginado)
+  2. deduplica os tracking numbers entre as SOs
+  3. consulta a Track API em lotes de ate 30 numeros (limite por chamada),
+     com --concurrency lotes em voo e no maximo --rate chamadas/s
+  4. reusa o token OAuth ate perto de expirar (e renova uma vez num 401)
+  5. envia os resultados ao update-tracking em lotes {"updates": [...]}
+
+Com --schedule, cada SO so e consultada quando vence na agenda adaptativa
+(tracking_scheduler.py), que espaca as consultas pelo estagio e pelo SLA.
+
+Status, localizacao e "No Armazem" seguem as regras dos nos "Processar
+Tracking" e "Preparar Atualizacoes". Quando uma SO tem varios tracking numbers,
+vale o que tem o evento mais recente.
+
+Uso:
+    python scripts/fedex_tracking_worker.py --dry-run
+    python scripts/fedex_tracking_worker.py
+    python scripts/fedex_tracking_worker.py --interval 30      # servico: um ciclo a cada 30 min
+    python scripts/fedex_tracking_worker.py --schedule --interval 15   # so SOs vencidas (agenda adaptativa)
+
+Variaveis de ambiente (.env):
+    SUPABASE_URL               URL do projeto Supabase
+    SUPABASE_SERVICE_ROLE_KEY  Leitura de v_envios_pendentes_tracking
+    N8N_SHARED_TOKEN           Token aceito pelo update-tracking (Authorization: Bearer)
+    FEDEX_CLIENT_ID            Credenciais OAuth da FedEx (client_credentials)
+    FEDEX_CLIENT_SECRET
+    FEDEX_API_URL              Opcional (padrao https://apis.fedex.com; stub local nos testes)
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import httpx
+    from dotenv import load_dotenv
+    from supaclient import AsyncSupabaseClient, EndpointMetrics, SupabaseError, chunked
+    from tracking_scheduler import DEFAULT_PATH as SCHEDULE_PATH, TrackingSchedule
+    from translations import translate_fedex_status
+except ImportError as e:
+    print(f"Erro: biblioteca necessaria nao instalada: {e}")
+    print("\nInstale as dependencias:")
+    print('  pip install "httpx[http2]" python-dotenv')
+    sys.exit(1)
+
+VIEW = "v_envios_pendentes_tracking"
+FEDEX_API_URL = "https://apis.fedex.com"
+TRACK_PATH = "/track/v1/trackingnumbers"
+TOKEN_PATH = "/oauth/token"
+
+TRACKING_BATCH_SIZE = 30    # numeros por chamada (limite da Track API)
+CONCURRENCY = 4             # chamadas a Track API em voo
+RATE = 5.0                  # chamadas/s a Track API
+PUSH_BATCH_SIZE = 200       # SOs por chamada ao update-tracking (a funcao aceita ate 500)
+TOKEN_MARGIN_S = 60         # renovar o token esse tempo antes de expirar
+RETRIES = 3
+BACKOFF_BASE_S = 0.5
+BACKOFF_CAP_S = 8.0
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+TIMEOUT = 60
+MIN_SLEEP = 30              # segundos minimos entre ciclos no modo servico com --schedule
+
+# Mesmas regras do no "Processar Tracking"
+WAREHOUSE_CODES = {"AR", "DL", "OD"}
+WAREHOUSE_WORDS = ("delivered", "warehouse", "arrived")
+NO_LOCATION = "Localização não disponível"
+
+
+class FedExError(Exception):
+    """Chamada a API da FedEx falhou (depois dos retries)"""
+
+
+class RateBudget:
+    """Token bucket: no maximo `rate` chamadas por segundo, rajadas de ate `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def retry_delay(attempt: int, response: Optional[httpx.Response]) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.replace(".", "", 1).isdigit():
+            return min(float(retry_after), BACKOFF_CAP_S)
+    return random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt))
+
+
+class FedExClient:
+    """
+    Cliente da Track API. O token OAuth fica em cache ate TOKEN_MARGIN_S antes
+    de expirar e e compartilhado entre as chamadas (e entre ciclos no modo
+    servico); chamadas concorrentes esperam um unico pedido de token.
+    """
+
+    def __init__(self, base_url: str, client_id: str, client_secret: str, rate: float = RATE,
+                 concurrency: int = CONCURRENCY, retries: int = RETRIES, timeout: float = TIMEOUT,
+                 metrics: Optional[EndpointMetrics] = None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.retries = retries
+        self.metrics = metrics or EndpointMetrics()
+        self.budget = RateBudget(rate, burst=concurrency)
+        self.token_requests = 0
+        self.track_calls = 0
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._token_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            timeout=timeout,
+            headers={"Accept": "application/json"},
+            limits=httpx.Limits(max_connections=max(1, concurrency),
+                                max_keepalive_connections=max(1, concurrency)),
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def _post(self, path: str, budgeted: bool = False, **kwargs) -> httpx.Response:
+        """POST com retry em 429/5xx/timeout (OAuth e Track sao leituras)"""
+        endpoint = f"POST {path}"
+        attempt = 0
+        while True:
+            if budgeted:
+                await self.budget.acquire()
+            started = time.perf_counter()
+            response: Optional[httpx.Response] = None
+            try:
+                response = await self._client.post(path, **kwargs)
+            except httpx.TransportError as e:
+                self.metrics.record(endpoint, time.perf_counter() - started, ok=False)
+                if attempt >= self.retries:
+                    raise FedExError(f"{endpoint}: {e!r}") from e
+            else:
+                self.metrics.record(endpoint, time.perf_counter() - started, ok=not response.is_error)
+                if response.status_code not in RETRY_STATUS or attempt >= self.retries:
+                    return response
+            self.metrics.record_retry(endpoint)
+            await asyncio.sleep(retry_delay(attempt, response))
+            attempt += 1
+
+    async def token(self, stale: Optional[str] = None) -> str:
+        """Token em cache; com `stale`, renova se o cache ainda for esse token (recusado com 401)"""
+        async with self._token_lock:
+            if self._token and self._token != stale and time.monotonic() < self._token_expires:
+                return self._token
+            response = await self._post(TOKEN_PATH, data={"grant_type": "client_credentials",
+                                                          "client_id": self.client_id,
+                                                          "client_secret": self.client_secret})
+            self.token_requests += 1
+            if response.is_error:
+                raise FedExError(f"OAuth {response.status_code}: {error_message(response)}")
+            body = response.json()
+            expires_in = float(body.get("expires_in") or 3600)
+            self._token = body["access_token"]
+            self._token_expires = time.monotonic() + expires_in - min(TOKEN_MARGIN_S, expires_in / 2)
+            return self._token
+
+    async def track(self, numbers: List[str]) -> Dict[str, Dict]:
+        """trackResults[0] de cada numero do lote (ate TRACKING_BATCH_SIZE)"""
+        body = {
+            "includeDetailedScans": True,
+            "trackingInfo": [{"trackingNumberInfo": {"trackingNumber": n}} for n in numbers],
+        }
+        async with self._semaphore:
+            token = await self.token()
+            for renewed in (False, True):
+                headers = {"Authorization": f"Bearer {token}",
+                           "x-customer-transaction-id": f"{numbers[0]}-{uuid.uuid4().hex[:12]}"}
+                response = await self._post(TRACK_PATH, budgeted=True, json=body, headers=headers)
+                self.track_calls += 1
+                if response.status_code == 401 and not renewed:
+                    token = await self.token(stale=token)
+                    continue
+                break
+        if response.is_error:
+            raise FedExError(f"Track API {response.status_code}: {error_message(response)}")
+        results = (response.json().get("output") or {}).get("completeTrackResults") or []
+        return {r.get("trackingNumber"): (r.get("trackResults") or [{}])[0] for r in results}
+
+
+def error_message(response: httpx.Response) -> str:
+    try:
+        errors = response.json().get("errors") or []
+    except ValueError:
+        return response.text[:200]
+    return errors[0].get("message", "") if errors else response.text[:200]
+
+
+def split_tracking_numbers(value: Optional[str]) -> List[str]:
+    return [t.strip() for t in (value or "").split(",") if t.strip()]
+
+
+def group_by_tracking_number(rows: List[Dict]) -> Dict[str, List[Dict]]:
+    """Tracking number -> SOs que o usam (como o no "Extrair Tracking Numbers")"""
+    by_number: Dict[str, List[Dict]] = {}
+    for row in rows:
+        for number in split_tracking_numbers(row.get("tracking_numbers")):
+            by_number.setdefault(number, []).append(row)
+    return by_number
+
+
+def parse_event_date(value: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return datetime.min.replace(tzinfo=timezone.utc)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def parse_track_result(info: Dict) -> Dict:
+    """Status, localizacao e data do ultimo evento de um trackResult ({"error": ...} se nao houver)"""
+    if info.get("error"):
+        error = info["error"]
+        return {"error": error.get("message") or error.get("code") or "erro sem mensagem"}
+    latest = info.get("latestStatusDetail") or {}
+    code = latest.get("code") or ""
+    description = latest.get("description") or ""
+    if not description:
+        return {"error": "resposta sem latestStatusDetail"}
+
+    lower = description.lower()
+    location = latest.get("scanLocation")
+    events = info.get("scanEvents") or []
+    return {
+        "status_code": code,
+        "description": description,
+        "is_at_warehouse": code in WAREHOUSE_CODES or any(word in lower for word in WAREHOUSE_WORDS),
+        "location": (f"{location.get('city') or ''}, {location.get('stateOrProvinceCode') or ''}, "
+                     f"{location.get('countryCode') or ''}".strip() if location else NO_LOCATION),
+        "last_event_date": (latest.get("date") or (events[0].get("date") if events else None)
+                            or datetime.now(timezone.utc).isoformat()),
+    }
+
+
+def build_update(row: Dict, result: Dict) -> Dict:
+    """Payload do update-tracking para uma SO (regras do "Preparar Atualizacoes")"""
+    return {
+        "sales_order": row["sales_order"],
+        "tracking_numbers": row.get("tracking_numbers"),
+        "carrier": "FedEx",
+        "status_atual": "No Armazém" if result["is_at_warehouse"] else result["description"],
+        "status_cliente": "Em Importação",
+        "ultima_localizacao": result["location"],
+        "data_ultima_atualizacao": result["last_event_date"],
+    }
+
+
+async def track_all(fedex: FedExClient, numbers: List[str], batch_size: int):
+    """Consulta todos os numeros em lotes concorrentes; devolve (resultados, erros) por numero"""
+    batches = chunked(numbers, batch_size)
+    responses = await asyncio.gather(*(fedex.track(list(b)) for b in batches), return_exceptions=True)
+    results: Dict[str, Dict] = {}
+    errors: Dict[str, str] = {}
+    failed_calls = 0
+    for batch, response in zip(batches, responses):
+        if isinstance(response, Exception):
+            failed_calls += 1
+            print(f"  Erro na Track API ({len(batch)} numeros): {response}")
+            errors.update({n: str(response) for n in batch})
+            continue
+        for number in batch:
+            parsed = parse_track_result(response[number]) if number in response else {"error": "sem resultado"}
+            if "error" in parsed:
+                errors[number] = parsed["error"]
+            else:
+                results[number] = parsed
+    return results, errors, failed_calls
+
+
+async def push_updates(supabase: AsyncSupabaseClient, token: str, updates: List[Dict], batch_size: int):
+    """Envia as atualizacoes em lotes; devolve (totais, SOs que falharam)"""
+    async def push(batch):
+        response = await supabase.request("POST", "functions/v1/update-tracking", json={"updates": list(batch)},
+                                          headers={"Authorization": f"Bearer {token}"},
+                                          idempotent=True, timeout=120)
+        return response.json()
+
+    batches = chunked(updates, batch_size)
+    responses = await supabase.gather((push(b) for b in batches), return_exceptions=True)
+    totals = {"updated": 0, "inserted": 0, "history_inserted": 0, "errors": 0}
+    failed = set()
+    for batch, response in zip(batches, responses):
+        if isinstance(response, Exception):
+            print(f"  Erro no update-tracking ({len(batch)} SOs): {response}")
+            totals["errors"] += len(batch)
+            failed.update(u["sales_order"] for u in batch)
+            continue
+        for key in totals:
+            totals[key] += response.get(key, 0)
+        failed.update(r.get("sales_order") for r in response.get("results", []) if not r.get("success"))
+    return totals, failed
+
+
+async def run_cycle(supabase: AsyncSupabaseClient, fedex: FedExClient, n8n_token: str, args,
+                    schedule: Optional[TrackingSchedule] = None) -> Dict:
+    started = time.perf_counter()
+    token_requests, track_calls = fedex.token_requests, fedex.track_calls
+
+    rows = await supabase.select_all(VIEW, "id,sales_order,cliente,tracking_numbers,created_at")
+    pairs = sum(len(split_tracking_numbers(r.get("tracking_numbers"))) for r in rows)
+    print(f"\n[{datetime.now().strftime('%H:%M:%S')}] {len(rows)} SOs pendentes, {pairs} pares tracking x SO")
+
+    # Com a agenda, so as SOs vencidas sao consultadas
+    if schedule is not None:
+        now = time.time()
+        added, removed = schedule.sync(rows, now)
+        due = {entry["sales_order"] for entry in schedule.due(now)}
+        rows = [r for r in rows if str(r["sales_order"]) in due]
+        print(f"  Agenda: {len(schedule)} SOs na fila (+{added} novas, -{removed} sairam), {len(rows)} vencidas")
+
+    by_number = group_by_tracking_number(rows)
+    print(f"  {len(by_number)} tracking numbers unicos a consultar")
+    if not by_number:
+        if schedule is not None and not args.dry_run:
+            schedule.commit()
+        return {"sos": len(rows), "updates": 0, "failed_calls": 0, "errors": 0}
+
+    await fedex.token()  # credencial invalida derruba o ciclo aqui, nao em cada lote
+    results, errors, failed_calls = await track_all(fedex, list(by_number), args.tracking_batch_size)
+
+    # Uma atualizacao por SO: o tracking number com o evento mais recente
+    updates = []
+    for row in rows:
+        found = [results[n] for n in split_tracking_numbers(row.get("tracking_numbers")) if n in results]
+        if found:
+            latest = max(found, key=lambda r: parse_event_date(r["last_event_date"]))
+            updates.append(build_update(row, latest))
+
+    totals = {"updated": 0, "inserted": 0, "history_inserted": 0, "errors": 0}
+    failed = set()
+    if args.dry_run:
+        # Como o update-tracking vai gravar (translateFedExStatus)
+        for update in updates[:10]:
+            print(f"  SO {update['sales_order']}: {translate_fedex_status(update['status_atual'])} "
+                  f"({translate_fedex_status(update['ultima_localizacao'])})")
+        if len(updates) > 10:
+            print(f"  ... e mais {len(updates) - 10}")
+    elif updates:
+        totals, failed = await push_updates(supabase, n8n_token, updates, args.push_batch_size)
+
+    # Reagendar as SOs consultadas (dry-run nao grava a agenda)
+    if schedule is not None and not args.dry_run:
+        by_so = {u["sales_order"]: u for u in updates}
+        for row in rows:
+            update = by_so.get(row["sales_order"])
+            if update is None or row["sales_order"] in failed:
+                schedule.record_error(str(row["sales_order"]))
+            else:
+                schedule.record(str(row["sales_order"]), update["status_atual"], update["ultima_localizacao"],
+                                changed_at=update["data_ultima_atualizacao"])
+        schedule.commit()
+
+    elapsed = time.perf_counter() - started
+    print(f"  Track API: {fedex.track_calls - track_calls} chamadas (o workflow faria {pairs}), "
+          f"{fedex.token_requests - token_requests} pedidos de token")
+    print(f"  Numeros sem resultado: {len(errors)}"
+          + (f" (ex.: {next(iter(errors))}: {next(iter(errors.values()))})" if errors else ""))
+    if args.dry_run:
+        print(f"  DRY-RUN: {len(updates)} SOs seriam atualizadas")
+    else:
+        print(f"  update-tracking: {totals['updated']} atualizadas, {totals['inserted']} criadas, "
+              f"{totals['history_inserted']} eventos de historico, {totals['errors']} com erro")
+    if schedule is not None and schedule.next_due_at():
+        print(f"  Proxima SO vencida as {datetime.fromtimestamp(schedule.next_due_at()).strftime('%d/%m %H:%M')}")
+    print(f"  Ciclo em {elapsed:.2f}s")
+    return {"sos": len(rows), "updates": len(updates), "failed_calls": failed_calls, **totals}
+
+
+async def run(args, config: Dict[str, str]) -> int:
+    supabase = AsyncSupabaseClient(config["url"], config["service_key"], concurrency=args.concurrency,
+                                   timeout=TIMEOUT)
+    fedex = FedExClient(config["fedex_url"], config["client_id"], config["client_secret"], rate=args.rate,
+                        concurrency=args.concurrency, metrics=supabase.metrics)
+    schedule = TrackingSchedule(Path(args.schedule)) if args.schedule else None
+    failed = False
+    try:
+        while True:
+            aborted = False
+            try:
+                cycle = await run_cycle(supabase, fedex, config["n8n_token"], args, schedule)
+                failed = bool(cycle["failed_calls"] or cycle["errors"])
+            except (SupabaseError, FedExError) as e:
+                print(f"  Erro no ciclo: {e}")
+                failed = aborted = True
+            if not args.interval:
+                break
+            # Com a agenda, acorda na proxima SO vencida (no maximo a cada --interval).
+            # Ciclo abortado ou dry-run nao reagenda: as SOs seguem vencidas e
+            # voltam depois de --interval, sem repetir a cada MIN_SLEEP
+            wait = args.interval * 60
+            if schedule is not None and not (aborted or args.dry_run) and schedule.next_due_at() is not None:
+                wait = min(wait, max(MIN_SLEEP, schedule.next_due_at() - time.time()))
+            await asyncio.sleep(wait)
+    finally:
+        supabase.metrics.print()
+        if schedule is not None:
+            schedule.close()
+        await fedex.aclose()
+        await supabase.aclose()
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de tracking FedEx (substitui o workflow 3 - FedEx Scraper)")
+    parser.add_argument("--dry-run", action="store_true", help="Consultar a FedEx sem enviar ao update-tracking")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="Minutos entre ciclos (modo servico); 0 = um ciclo e sai (default: 0)")
+    parser.add_argument("--schedule", nargs="?", const=str(SCHEDULE_PATH), metavar="DB",
+                        help="Consultar so as SOs vencidas na agenda adaptativa (tracking_scheduler.py; "
+                             f"padrao: {SCHEDULE_PATH.name})")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help=f"Chamadas em voo a Track API e ao Supabase (default: {CONCURRENCY})")
+    parser.add_argument("--rate", type=float, default=RATE,
+                        help=f"Maximo de chamadas/s a Track API; 0 = sem limite (default: {RATE})")
+    parser.add_argument("--tracking-batch-size", type=int, default=TRACKING_BATCH_SIZE,
+                        help=f"Tracking numbers por chamada (1 a {TRACKING_BATCH_SIZE}, default: {TRACKING_BATCH_SIZE})")
+    parser.add_argument("--push-batch-size", type=int, default=PUSH_BATCH_SIZE,
+                        help=f"SOs por chamada ao update-tracking (1 a 500, default: {PUSH_BATCH_SIZE})")
+    args = parser.parse_args()
+
+    if not 1 <= args.tracking_batch_size <= TRACKING_BATCH_SIZE:
+        parser.error(f"--tracking-batch-size deve estar entre 1 e {TRACKING_BATCH_SIZE}")
+    if not 1 <= args.push_batch_size <= 500:
+        parser.error("--push-batch-size deve estar entre 1 e 500")
+
+    # Carregar .env (scripts/ e root)
+    scripts_env = os.path.join(os.path.dirname(__file__), ".env")
+    root_env = os.path.join(os.path.dirname(__file__), "..", ".env")
+    load_dotenv(scripts_env)
+    load_dotenv(root_env)
+
+    config = {
+        "url": os.getenv("SUPABASE_URL") or os.getenv("VITE_SUPABASE_URL"),
+        "service_key": os.getenv("SUPABASE_SERVICE_ROLE_KEY"),
+        "n8n_token": os.getenv("N8N_SHARED_TOKEN"),
+        "client_id": os.getenv("FEDEX_CLIENT_ID"),
+        "client_secret": os.getenv("FEDEX_CLIENT_SECRET"),
+        "fedex_url": os.getenv("FEDEX_API_URL") or FEDEX_API_URL,
+    }
+    required = {"url": "SUPABASE_URL", "service_key": "SUPABASE_SERVICE_ROLE_KEY",
+                "client_id": "FEDEX_CLIENT_ID", "client_secret": "FEDEX_CLIENT_SECRET"}
+    if not args.dry_run:
+        required["n8n_token"] = "N8N_SHARED_TOKEN"
+    missing = [name for key, name in required.items() if not config[key]]
+    if missing:
+        print(f"Erro: defina {', '.join(missing)} no .env")
+        sys.exit(1)
+
+    print("=== FEDEX TRACKING WORKER ===")
+    print(f"Supabase: {config['url']}")
+    print(f"FedEx: {config['fedex_url']} (lotes de {args.tracking_batch_size}, {args.concurrency} em paralelo, "
+          f"{args.rate or 'sem limite de'} chamadas/s)")
+    if args.schedule:
+        print(f"Agenda adaptativa: {args.schedule}")
+    if args.interval:
+        print(f"Modo servico: um ciclo a cada {args.interval:g} min (Ctrl+C para parar)")
+
+    try:
+        sys.exit(asyncio.run(run(args, config)))
+    except KeyboardInterrupt:
+        print("\nEncerrado.")
+
+
+if __name__ == "__main__":
+    main()
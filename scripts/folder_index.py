@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Índice das pastas de cargas (SNT-16)
+
+Mantém em disco o mapa pasta de carga -> planilha "Dados {nº}.xlsx" (com
+mtimes) da árvore de importações, para que a auditoria não precise percorrer
+o compartilhamento de rede inteiro a cada execução:
+
+    C:\\IMPORTAÇÕES\\IMPORTAÇÃO {ANO}\\CARGA {NUM} - {TIPO} - {SIGLA}\\Dados {NUM}.xlsx
+
+A primeira varredura lista as pastas em paralelo (os.scandir em threads). As
+seguintes são incrementais: cada pasta de ano é listada de novo, mas só as
+pastas de carga com mtime diferente do índice são relidas. Com o serviço
+`watch` rodando, o índice é atualizado pelos eventos do sistema de arquivos
+(inotify/ReadDirectoryChangesW via watchdog, ou varredura periódica) e a
+auditoria o usa sem varrer nada.
+
+Uso:
+    python folder_index.py --base-path "C:\\IMPORTAÇÕES" --years 2025,2026     # Atualiza e lista
+    python folder_index.py watch --base-path "C:\\IMPORTAÇÕES"                 # Serviço (watcher)
+    python folder_index.py watch --poll --interval 120                        # Compartilhamento de rede
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_PATH = Path(__file__).parent / '.folder_index.json'
+
+YEAR_PATTERN = re.compile(r"IMPORTA[ÇC][ÃA]O\s+(\d{4})", re.IGNORECASE)
+CARGO_PATTERN = re.compile(r"CARGA\s+(\d+)", re.IGNORECASE)
+WORKBOOK_SUFFIXES = ('.xlsx', '.xls')
+
+SCAN_WORKERS = 16
+POLL_INTERVAL = 60          # segundos entre varreduras/heartbeats do watcher
+WATCH_DEBOUNCE = 2          # segundos agrupando eventos antes de atualizar o índice
+
+
+def parse_years(value: Optional[str]) -> Optional[Set[str]]:
+    """'2025,2026' -> {'2025', '2026'}; 'all' -> None (todos os anos)"""
+    if value is None or value.strip().lower() in ('all', 'todos', '*'):
+        return None
+    years = {y.strip() for y in value.split(',') if y.strip()}
+    for year in years:
+        if not re.fullmatch(r"\d{4}", year):
+            raise ValueError(f"ano invalido: {year}")
+    return years
+
+
+def workbook_patterns(cargo_num: str) -> List[str]:
+    return [
+        f"Dados {cargo_num}.xlsx",
+        f"Dados_{cargo_num}.xlsx",
+        f"dados{cargo_num}.xlsx",
+        f"Dados{cargo_num}.xlsx",
+    ]
+
+
+def is_workbook(name: str, cargo_num: str) -> bool:
+    """Nome de arquivo da planilha "Dados {nº}" de uma carga"""
+    lower = name.lower()
+    if not lower.endswith(WORKBOOK_SUFFIXES):
+        return False
+    return any(pattern.lower() in lower for pattern in workbook_patterns(cargo_num))
+
+
+class FolderIndex:
+    """
+    Índice persistente (JSON) das pastas de ano e de carga sob base_path.
+
+    Estrutura: years[nome da pasta de ano] = {year, cargos}, e
+    cargos[nome da pasta de carga] = {cargo, mtime, workbook, workbook_mtime,
+    workbook_size}, na ordem da listagem do diretório. Sem `path` o índice
+    fica só em memória (sempre uma varredura completa, ainda paralela).
+    """
+
+    VERSION = 1
+
+    def __init__(self, base_path: Path, path: Optional[Path] = None, workers: int = SCAN_WORKERS):
+        self.base_path = Path(base_path)
+        self.path = Path(path) if path is not None else None
+        self.workers = workers
+        self.years: Dict[str, Dict] = {}
+        self.heartbeat: Optional[float] = None
+        self.watch_years: Optional[List[str]] = None
+        self.updated_at: Optional[str] = None
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"  Indice de pastas ignorado ({self.path.name}): {e}")
+            return
+        if data.get('version') == self.VERSION and data.get('base_path') == str(self.base_path):
+            self.years = data.get('years', {})
+            self.heartbeat = data.get('heartbeat')
+            self.watch_years = data.get('watch_years')
+            self.updated_at = data.get('updated_at')
+
+    def save(self, heartbeat: Optional[float] = None):
+        """Grava o índice de forma atômica (arquivo temporário + rename)"""
+        if self.path is None:
+            return
+        with self._lock:
+            if heartbeat is not None:
+                self.heartbeat = heartbeat
+            data = {
+                'version': self.VERSION,
+                'base_path': str(self.base_path),
+                'updated_at': self.updated_at,
+                'heartbeat': self.heartbeat,
+                'watch_years': self.watch_years,
+                'years': self.years,
+            }
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def is_live(self, years: Optional[Set[str]] = None, max_age: float = 3 * POLL_INTERVAL) -> bool:
+        """True se um watcher está mantendo o índice dos `years` (heartbeat recente)"""
+        if self.heartbeat is None or time.time() - self.heartbeat >= max_age:
+            return False
+        return self.watch_years is None or (years is not None and years <= set(self.watch_years))
+
+    # ------------------------------------------------------------------
+    # Varredura
+
+    def _list_cargo(self, cargo_dir: Path, cargo_num: str, mtime: int) -> Dict:
+        """Entrada do índice de uma pasta de carga (procura a planilha)"""
+        entry = {'cargo': cargo_num, 'mtime': mtime, 'workbook': None,
+                 'workbook_mtime': None, 'workbook_size': None}
+        try:
+            with os.scandir(cargo_dir) as it:
+                for item in it:
+                    if is_workbook(item.name, cargo_num) and item.is_file():
+                        st = item.stat()
+                        entry.update(workbook=item.name, workbook_mtime=st.st_mtime_ns,
+                                     workbook_size=st.st_size)
+                        break
+        except OSError as e:
+            print(f"  Erro ao listar {cargo_dir}: {e}")
+        return entry
+
+    def _list_year(self, year_dir: Path) -> List[Tuple[str, str, int]]:
+        """[(pasta de carga, nº da carga, mtime)] de uma pasta de ano"""
+        cargos = []
+        with os.scandir(year_dir) as it:
+            for item in it:
+                match = CARGO_PATTERN.search(item.name)
+                if match and item.is_dir():
+                    cargos.append((item.name, match.group(1), item.stat().st_mtime_ns))
+        return cargos
+
+    def _year_dirs(self, years: Optional[Set[str]]) -> List[Tuple[str, str]]:
+        """[(pasta de ano, ano)] em base_path, filtradas por `years`"""
+        found = []
+        with os.scandir(self.base_path) as it:
+            for item in it:
+                match = YEAR_PATTERN.match(item.name)
+                if match and item.is_dir() and (years is None or match.group(1) in years):
+                    found.append((item.name, match.group(1)))
+        return found
+
+    def refresh(self, years: Optional[Set[str]] = None, verbose: bool = False) -> Dict[str, int]:
+        """
+        Atualiza o índice das pastas de `years` (None = todas). Pastas de ano
+        são sempre relistadas; pastas de carga só se o mtime mudou. Retorna
+        contadores {years, cargos, listed}.
+        """
+        year_dirs = self._year_dirs(years)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            listings = list(pool.map(lambda y: self._list_year(self.base_path / y[0]), year_dirs))
+
+            # Pastas de carga novas ou alteradas, de todos os anos, listadas juntas
+            stale = []
+            for (year_name, _), cargos in zip(year_dirs, listings):
+                known = self.years.get(year_name, {}).get('cargos', {})
+                for cargo_name, cargo_num, mtime in cargos:
+                    old = known.get(cargo_name)
+                    if old is None or old['mtime'] != mtime or old['cargo'] != cargo_num:
+                        stale.append((year_name, cargo_name, cargo_num, mtime))
+            fresh = dict(zip(
+                ((y, c) for y, c, _, _ in stale),
+                pool.map(lambda s: self._list_cargo(self.base_path / s[0] / s[1], s[2], s[3]), stale),
+            ))
+
+        with self._lock:
+            # Anos na ordem da listagem; os fora do filtro ficam como estavam e
+            # as pastas de ano apagadas (do filtro) saem do índice
+            listed = {}
+            for (year_name, year), cargos in zip(year_dirs, listings):
+                known = self.years.get(year_name, {}).get('cargos', {})
+                listed[year_name] = {
+                    'year': year,
+                    'cargos': {
+                        cargo_name: fresh.get((year_name, cargo_name)) or known[cargo_name]
+                        for cargo_name, _, _ in cargos
+                    },
+                }
+            for year_name, entry in self.years.items():
+                if year_name not in listed and years is not None and entry.get('year') not in years:
+                    listed[year_name] = entry
+            self.years = listed
+            self.updated_at = datetime.now().isoformat(timespec='seconds')
+
+        counts = {
+            'years': len(year_dirs),
+            'cargos': sum(len(cargos) for cargos in listings),
+            'listed': len(stale),
+        }
+        if verbose:
+            print(f"  Indice de pastas: {counts['years']} anos, {counts['cargos']} cargas "
+                  f"({counts['listed']} pastas relidas)")
+        return counts
+
+    def update_paths(self, paths: Iterable[Path], years: Optional[Set[str]] = None):
+        """
+        Atualiza só as pastas afetadas por eventos do watcher: um evento em uma
+        pasta de ano relista o ano; dentro de uma pasta de carga, relista a carga.
+        """
+        year_names: Set[str] = set()
+        cargo_dirs: Set[Tuple[str, str]] = set()
+        for path in paths:
+            try:
+                parts = Path(path).relative_to(self.base_path).parts
+            except ValueError:
+                continue
+            match = YEAR_PATTERN.match(parts[0]) if parts else None
+            if not match or (years is not None and match.group(1) not in years):
+                continue
+            if len(parts) <= 2:
+                year_names.add(parts[0])
+            elif len(parts) == 3:
+                cargo_dirs.add((parts[0], parts[1]))
+
+        with self._lock:
+            for year_name in year_names:
+                year_dir = self.base_path / year_name
+                if not year_dir.is_dir():
+                    self.years.pop(year_name, None)
+                    continue
+                cargos = self._list_year(year_dir)
+                known = self.years.get(year_name, {}).get('cargos', {})
+                self.years[year_name] = {
+                    'year': YEAR_PATTERN.match(year_name).group(1),
+                    'cargos': {
+                        cargo_name: known[cargo_name]
+                        if cargo_name in known and known[cargo_name]['mtime'] == mtime
+                        else self._list_cargo(year_dir / cargo_name, cargo_num, mtime)
+                        for cargo_name, cargo_num, mtime in cargos
+                    },
+                }
+            for year_name, cargo_name in cargo_dirs:
+                if year_name in year_names:
+                    continue
+                cargos = self.years.get(year_name, {}).get('cargos', {})
+                cargo_dir = self.base_path / year_name / cargo_name
+                if cargo_name not in cargos or not cargo_dir.is_dir():
+                    continue
+                cargos[cargo_name] = self._list_cargo(
+                    cargo_dir, cargos[cargo_name]['cargo'], cargo_dir.stat().st_mtime_ns
+                )
+            self.updated_at = datetime.now().isoformat(timespec='seconds')
+
+    # ------------------------------------------------------------------
+    # Consulta
+
+    def cargo_folders(self, years: Optional[Set[str]] = None) -> List[Tuple[str, Path, Optional[Path]]]:
+        """[(nº da carga, pasta, planilha ou None)] das pastas de `years`"""
+        result = []
+        with self._lock:
+            for year_name, year_entry in self.years.items():
+                if years is not None and year_entry['year'] not in years:
+                    continue
+                for cargo_name, entry in year_entry['cargos'].items():
+                    folder = self.base_path / year_name / cargo_name
+                    workbook = folder / entry['workbook'] if entry['workbook'] else None
+                    result.append((entry['cargo'], folder, workbook))
+        return result
+
+    def year_names(self, years: Optional[Set[str]] = None) -> List[str]:
+        with self._lock:
+            return [n for n, v in self.years.items() if years is None or v['year'] in years]
+
+
+def watch(index: FolderIndex, years: Optional[Set[str]], interval: float = POLL_INTERVAL, poll: bool = False):
+    """
+    Serviço: mantém o índice atualizado até Ctrl+C. Usa eventos do sistema de
+    arquivos via watchdog (inotify no Linux, ReadDirectoryChangesW no Windows)
+    e, sem watchdog ou com poll=True (compartilhamentos de rede, que não
+    entregam eventos de forma confiável), uma varredura incremental a cada
+    `interval` segundos. O heartbeat no arquivo indica à auditoria que o
+    índice está sendo mantido.
+    """
+    observer = None
+    dirty: Set[str] = set()
+    dirty_lock = threading.Lock()
+
+    if not poll:
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            print("  watchdog nao instalado, usando varredura periodica (pip install watchdog)")
+        else:
+            class Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    if event.event_type in ('opened', 'closed', 'closed_no_write'):
+                        return
+                    with dirty_lock:
+                        dirty.add(event.src_path)
+                        if getattr(event, 'dest_path', None):
+                            dirty.add(event.dest_path)
+
+            observer = Observer()
+            observer.schedule(Handler(), str(index.base_path), recursive=True)
+            observer.start()
+
+    index.watch_years = sorted(years) if years is not None else None
+    mode = 'eventos do sistema de arquivos' if observer else f'varredura a cada {interval:.0f}s'
+    index.refresh(years, verbose=True)
+    index.save(heartbeat=time.time())
+    print(f"  Observando {index.base_path} ({mode}). Ctrl+C para parar.")
+
+    last_beat = time.time()
+    try:
+        while True:
+            time.sleep(WATCH_DEBOUNCE if observer else interval)
+            if observer is None:
+                counts = index.refresh(years)
+                if counts['listed']:
+                    print(f"  {datetime.now():%H:%M:%S} {counts['listed']} pastas atualizadas")
+                index.save(heartbeat=time.time())
+                continue
+
+            with dirty_lock:
+                paths = list(dirty)
+                dirty.clear()
+            if paths:
+                index.update_paths(paths, years)
+                print(f"  {datetime.now():%H:%M:%S} {len(paths)} eventos aplicados")
+            if paths or time.time() - last_beat >= interval:
+                index.save(heartbeat=time.time())
+                last_beat = time.time()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
+        index.heartbeat = None
+        index.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Indice das pastas de cargas (SNT-16)')
+    parser.add_argument('command', nargs='?', choices=['scan', 'watch'], default='scan',
+                        help='scan: atualiza o indice e lista as cargas; watch: servico que mantem o indice')
+    parser.add_argument('--base-path', default=r"C:\IMPORTAÇÕES", help='Caminho base das importacoes')
+    parser.add_argument('--years', default='all',
+                        help='Anos das pastas IMPORTAÇÃO, separados por virgula, ou "all" (default: all)')
+    parser.add_argument('--index-file', default=str(DEFAULT_PATH),
+                        help='Arquivo do indice (default: scripts/.folder_index.json)')
+    parser.add_argument('--workers', type=int, default=SCAN_WORKERS,
+                        help=f'Threads listando pastas em paralelo (default: {SCAN_WORKERS})')
+    parser.add_argument('--poll', action='store_true', help='watch: varredura periodica em vez de eventos')
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL,
+                        help=f'watch: segundos entre varreduras/heartbeats (default: {POLL_INTERVAL})')
+    args = parser.parse_args()
+
+    try:
+        years = parse_years(args.years)
+    except ValueError as e:
+        parser.error(f"--years: {e}")
+
+    base_path = Path(args.base_path)
+    if not base_path.is_dir():
+        print(f"  Pasta base nao encontrada: {base_path}")
+        sys.exit(1)
+
+    index = FolderIndex(base_path, Path(args.index_file), workers=max(args.workers, 1))
+
+    if args.command == 'watch':
+        watch(index, years, interval=args.interval, poll=args.poll)
+        return
+
+    started = time.perf_counter()
+    index.refresh(years, verbose=True)
+    index.save()
+    folders = index.cargo_folders(years)
+    without = sum(1 for _, _, workbook in folders if workbook is None)
+    print(f"  {len(folders)} cargas, {without} sem planilha Dados "
+          f"({time.perf_counter() - started:.2f}s) -> {args.index_file}")
+
+
+if __name__ == '__main__':
+    main()
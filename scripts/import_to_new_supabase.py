@@ -1,8 +1,10 @@
 """Import exported data into new Supabase project via REST API."""
-import json
 import os
 import sys
-import requests
+
+from adaptive_batching import AdaptiveBatcher, send_adaptive
+from migration_snapshot import find_snapshot, iter_snapshot_rows
+from supaclient import SupabaseClient
 
 NEW_URL = "https://stkwoqcrrecwzeajhhxi.supabase.co"
 NEW_SERVICE_KEY = "sb_secret_9_uEFSNA4RjTinP2EbJlFg_nM9eJKCb"
@@ -29,55 +31,50 @@ TABLES = [
 ]
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "migration_data")
-BATCH_SIZE = 100
+# Batches are sized by bytes and latency (see adaptive_batching)
 
-headers = {
-    "apikey": NEW_SERVICE_KEY,
-    "Authorization": f"Bearer {NEW_SERVICE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "resolution=merge-duplicates",
-}
+client = SupabaseClient(NEW_URL, NEW_SERVICE_KEY)
 
 total_imported = 0
 errors = []
 
 for table in TABLES:
-    filepath = os.path.join(DATA_DIR, f"{table}.json")
-    if not os.path.exists(filepath):
+    filepath = find_snapshot(DATA_DIR, table)
+    if filepath is None:
         print(f"  {table}: no export file, skipping")
         continue
 
-    with open(filepath, "r", encoding="utf-8") as f:
-        rows = json.load(f)
+    print(f"  {table}: importing...", end=" ", flush=True)
+    imported = 0
+    total = 0
+    batcher = AdaptiveBatcher()
 
-    if not rows:
-        print(f"  {table}: 0 rows (empty)")
-        continue
+    def post(body, table=table):
+        return client.insert(table, body, upsert=True, timeout=60, check=False)
 
-    print(f"  {table}: importing {len(rows)} rows...", end=" ", flush=True)
-    imported = 0
-    for i in range(0, len(rows), BATCH_SIZE):
-        batch = rows[i : i + BATCH_SIZE]
+    def on_error(batch, message, table=table):
+        errors.append(f"{table} batch {batch.start}: {message}")
+        print(f"\n    ERROR batch {batch.start}: {message}")
+
+    for batch in batcher.batches_from(iter_snapshot_rows(filepath)):
+        total += len(batch)
         try:
-            resp = requests.post(
-                f"{NEW_URL}/rest/v1/{table}",
-                headers=headers,
-                json=batch,
-                timeout=60,
-            )
-            if resp.status_code in (200, 201):
-                imported += len(batch)
-            else:
-                err_msg = resp.text[:200]
-                errors.append(f"{table} batch {i}: {resp.status_code} {err_msg}")
-                print(f"\n    ERROR batch {i}: {resp.status_code} {err_msg}")
+            imported += send_adaptive(post, batcher, batch, on_error)
         except Exception as e:
-            errors.append(f"{table} batch {i}: {e}")
-            print(f"\n    ERROR batch {i}: {e}")
+            errors.append(f"{table} batch {batch.start}: {e}")
+            print(f"\n    ERROR batch {batch.start}: {e}")
+
+    if total == 0:
+        print("0 rows (empty)")
+        continue
 
-    print(f"{imported} OK")
+    summary = batcher.summary()
+    print(f"{imported} OK (~{summary['avg_rows']:.0f} rows/batch, {summary['rows_per_s']:.0f} rows/s)")
     total_imported += imported
 
+client.print_metrics()
+client.close()
+
 print(f"\nTotal imported: {total_imported} rows")
 if errors:
     print(f"\n{len(errors)} errors:")
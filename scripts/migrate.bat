@@ -19,13 +19,13 @@ if errorlevel 1 (
     exit /b 1
 )
 
-REM Check requests module
-python -c "import requests" >nul 2>&1
+REM Check httpx module
+python -c "import httpx" >nul 2>&1
 if errorlevel 1 (
-    echo ERROR: requests module not found. Installing...
-    pip install requests
+    echo ERROR: httpx module not found. Installing...
+    pip install "httpx[http2]"
     if errorlevel 1 (
-        echo ERROR: Failed to install requests
+        echo ERROR: Failed to install httpx
         pause
         exit /b 1
     )
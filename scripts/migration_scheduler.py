@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FK-aware scheduling for the data migration.
+
+- load_fk_graph: table -> tables it references, built from
+  generate_schema.generate_foreign_keys() plus the SQL migrations
+- load_fk_columns: the same FKs as (table, column, ref_table, ref_column)
+- import_waves: groups tables into dependency "waves"; tables in the same wave
+  do not reference each other and can be imported in parallel
+- RateBudget: thread-safe token bucket shared by every worker, so the total
+  request rate stays under a global budget
+- run_bounded: runs tasks from an iterator with at most N in flight
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+_LINE_COMMENT = re.compile(r"--[^\n]*")
+_STATEMENT_TABLE = re.compile(
+    r"^\s*(?:CREATE\s+TABLE(?:\s+IF\s+NOT\s+EXISTS)?|ALTER\s+TABLE(?:\s+IF\s+EXISTS)?(?:\s+ONLY)?)"
+    r"\s+(?:\"?(\w+)\"?\.)?\"?(\w+)\"?",
+    re.IGNORECASE,
+)
+_REFERENCES = re.compile(r"REFERENCES\s+(?:\"?(\w+)\"?\.)?\"?(\w+)\"?", re.IGNORECASE)
+# "FOREIGN KEY (col) REFERENCES t(ref)" or an inline "col TYPE ... REFERENCES t(ref)"
+_FK_COLUMN = re.compile(
+    r"(?:FOREIGN\s+KEY\s*\(\s*\"?(\w+)\"?\s*\)|^\s*\"?(\w+)\"?\s+[^,\n]*?)\s*"
+    r"REFERENCES\s+(?:\"?(\w+)\"?\.)?\"?(\w+)\"?\s*(?:\(\s*\"?(\w+)\"?\s*\))?",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+ForeignKey = Tuple[str, str, str, str]  # (table, column, ref_table, ref_column)
+
+
+def parse_foreign_keys(sql: str) -> Dict[str, Set[str]]:
+    """
+    Extract {table: {referenced tables}} from CREATE TABLE / ALTER TABLE
+    statements in the public schema. References to other schemas (auth.users)
+    are ignored since they are not part of the data migration.
+    """
+    graph: Dict[str, Set[str]] = {}
+    for statement in _LINE_COMMENT.sub("", sql).split(";"):
+        match = _STATEMENT_TABLE.match(statement)
+        if not match:
+            continue
+        schema, table = match.group(1), match.group(2)
+        if schema and schema.lower() != "public":
+            continue
+        for ref_schema, ref_table in _REFERENCES.findall(statement):
+            if ref_schema and ref_schema.lower() != "public":
+                continue
+            if ref_table != table:
+                graph.setdefault(table, set()).add(ref_table)
+    return graph
+
+
+def parse_foreign_key_columns(sql: str) -> List[ForeignKey]:
+    """Column-level version of parse_foreign_keys (referenced column defaults to id)"""
+    keys: List[ForeignKey] = []
+    for statement in _LINE_COMMENT.sub("", sql).split(";"):
+        match = _STATEMENT_TABLE.match(statement)
+        if not match:
+            continue
+        schema, table = match.group(1), match.group(2)
+        if schema and schema.lower() != "public":
+            continue
+        body = statement[match.end():]
+        for fk_col, inline_col, ref_schema, ref_table, ref_col in _FK_COLUMN.findall(body):
+            if ref_schema and ref_schema.lower() != "public":
+                continue
+            column = fk_col or inline_col
+            if column.upper() in ("CONSTRAINT", "ADD"):
+                continue
+            keys.append((table, column, ref_table, ref_col or "id"))
+    return keys
+
+
+def _schema_sources(migrations_dir: Optional[Path]) -> List[str]:
+    sources: List[str] = []
+    try:
+        from generate_schema import generate_foreign_keys
+        sources.append("\n".join(generate_foreign_keys()))
+    except ImportError:
+        pass
+
+    if migrations_dir and Path(migrations_dir).exists():
+        for migration_file in sorted(Path(migrations_dir).glob("*.sql")):
+            try:
+                sources.append(migration_file.read_text(encoding="utf-8"))
+            except OSError:
+                continue
+    return sources
+
+
+def load_fk_columns(tables: List[str], migrations_dir: Optional[Path] = None) -> List[ForeignKey]:
+    """FKs between `tables` (deduplicated), from generate_schema and the migrations"""
+    wanted = set(tables)
+    keys: List[ForeignKey] = []
+    for sql in _schema_sources(migrations_dir):
+        for key in parse_foreign_key_columns(sql):
+            if key[0] in wanted and key[2] in wanted and key not in keys:
+                keys.append(key)
+    return keys
+
+
+def load_fk_graph(tables: List[str], migrations_dir: Optional[Path] = None) -> Dict[str, Set[str]]:
+    """FK graph restricted to `tables`, merging generate_schema and the migrations"""
+    graph: Dict[str, Set[str]] = {table: set() for table in tables}
+
+    for sql in _schema_sources(migrations_dir):
+        for table, refs in parse_foreign_keys(sql).items():
+            if table in graph:
+                graph[table].update(ref for ref in refs if ref in graph)
+
+    return graph
+
+
+def import_waves(tables: List[str], graph: Dict[str, Set[str]]) -> List[List[str]]:
+    """
+    Layer the tables so every table comes after the tables it references.
+    Within a wave the original `tables` order is kept. Tables caught in a
+    cycle are placed together in a final wave, in the original order.
+    """
+    remaining = list(tables)
+    done: Set[str] = set()
+    waves: List[List[str]] = []
+
+    while remaining:
+        wave = [t for t in remaining if graph.get(t, set()) <= done]
+        if not wave:
+            waves.append(remaining)
+            break
+        waves.append(wave)
+        done.update(wave)
+        remaining = [t for t in remaining if t not in done]
+
+    return waves
+
+
+class RateBudget:
+    """
+    Token bucket shared across threads: at most `rate` requests per second,
+    with bursts of up to `rate` requests. rate <= 0 disables the limit.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tokens = max(rate, 1.0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_s = (1 - self._tokens) / self.rate
+            time.sleep(wait_s)
+
+
+def run_bounded(tasks: Iterable[Callable[[], None]], limit: int) -> None:
+    """
+    Run callables with at most `limit` in flight, pulling from the iterable
+    lazily (so a streamed snapshot is never fully materialized). limit <= 1
+    runs them inline. Exceptions from tasks propagate.
+    """
+    if limit <= 1:
+        for task in tasks:
+            task()
+        return
+
+    with ThreadPoolExecutor(max_workers=limit) as pool:
+        pending = set()
+        for task in tasks:
+            if len(pending) >= limit:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+            pending.add(pool.submit(task))
+        for future in pending:
+            future.result()
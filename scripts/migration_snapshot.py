@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migration snapshot I/O.
+
+Tables are exported as NDJSON (one row per line), optionally gzip-compressed,
+so exports and imports stream instead of holding a whole table in memory:
+
+    migration_data/{table}.ndjson      plain NDJSON
+    migration_data/{table}.ndjson.gz   gzip NDJSON (one gzip member per page)
+    migration_data/{table}.arrow       typed Arrow IPC file (see arrow_snapshot)
+    migration_data/{table}.json        legacy JSON array (still readable)
+
+Each export also keeps migration_data/{table}.checkpoint.json with the last
+exported key and the byte offset of the last complete page, which is what
+`migrate_supabase.py --export-only --resume` continues from.
+"""
+
+import gzip
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import ijson
+except ImportError:  # optional: legacy .json arrays are then loaded whole
+    ijson = None
+
+# Preferred first when more than one snapshot exists for a table
+SNAPSHOT_EXTENSIONS = (".arrow", ".ndjson.gz", ".ndjson", ".json")
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+
+
+def snapshot_path(data_dir: Path, table: str, compress: bool = False) -> Path:
+    """Path of the NDJSON snapshot written by the exporter"""
+    return Path(data_dir) / f"{table}{'.ndjson.gz' if compress else '.ndjson'}"
+
+
+def checkpoint_path(data_dir: Path, table: str) -> Path:
+    return Path(data_dir) / f"{table}{CHECKPOINT_SUFFIX}"
+
+
+def find_snapshot(data_dir: Path, table: str) -> Optional[Path]:
+    """Existing snapshot for a table, in SNAPSHOT_EXTENSIONS order"""
+    for ext in SNAPSHOT_EXTENSIONS:
+        path = Path(data_dir) / f"{table}{ext}"
+        if path.exists():
+            return path
+    return None
+
+
+def remove_snapshots(data_dir: Path, table: str, keep: Optional[Path] = None) -> None:
+    """Delete snapshots of a table in every format (except `keep`)"""
+    for ext in SNAPSHOT_EXTENSIONS:
+        path = Path(data_dir) / f"{table}{ext}"
+        if path.exists() and path != keep:
+            path.unlink()
+
+
+def iter_snapshot_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Yield rows from a snapshot file of any supported format.
+
+    NDJSON is read line by line, Arrow one record batch at a time; a legacy
+    .json array is parsed incrementally with ijson when it is installed (and
+    loaded whole otherwise). Raises ValueError on malformed content.
+    """
+    path = Path(path)
+    name = path.name
+
+    if name.endswith(".arrow"):
+        from arrow_snapshot import iter_arrow_rows
+        yield from iter_arrow_rows(path)
+        return
+
+    if name.endswith(".json") and not name.endswith(CHECKPOINT_SUFFIX):
+        if ijson is not None:
+            with open(path, "rb") as f:
+                try:
+                    first = next(ijson.parse(f), None)
+                    if first is None or first[1] != "start_array":
+                        raise ValueError("Not a list")
+                    f.seek(0)
+                    yield from ijson.items(f, "item", use_float=True)
+                except ijson.JSONError as e:
+                    raise ValueError(str(e).splitlines()[0]) from e
+            return
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            raise ValueError("Not a list")
+        yield from data
+        return
+
+    opener = gzip.open if name.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {line_no}: {e}") from e
+
+
+class SnapshotWriter:
+    """
+    Append-only NDJSON writer.
+
+    Every append() is flushed and fsync'ed before returning the new file size,
+    so a checkpoint saved afterwards always points at a complete page. With
+    gzip each page becomes its own gzip member; gzip readers concatenate them
+    and truncating back to a member boundary is safe.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.compress = self.path.name.endswith(".gz")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def reset(self, offset: int = 0) -> None:
+        """Truncate the file to `offset` bytes (creating it if needed)"""
+        with open(self.path, "ab") as f:
+            f.truncate(offset)
+
+    def size(self) -> int:
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    def append(self, rows: List[Dict[str, Any]]) -> int:
+        data = "".join(
+            json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows
+        ).encode("utf-8")
+
+        with open(self.path, "ab") as raw:
+            if self.compress:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                    gz.write(data)
+            else:
+                raw.write(data)
+            raw.flush()
+            os.fsync(raw.fileno())
+            return raw.tell()
+
+
+def load_checkpoint(data_dir: Path, table: str) -> Optional[Dict[str, Any]]:
+    path = checkpoint_path(data_dir, table)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def save_checkpoint(data_dir: Path, table: str, checkpoint: Dict[str, Any]) -> None:
+    """Write the checkpoint atomically (temp file + rename)"""
+    path = checkpoint_path(data_dir, table)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+def save_complete_checkpoint(data_dir: Path, table: str, path: Path, rows: Optional[int] = None) -> None:
+    """
+    Point the table's checkpoint at `path` as a complete snapshot (after a
+    delta merge or an export by export_via_edge_function.py), so --resume
+    and the importer don't act on a stale one. `rows` None keeps the count.
+    """
+    path = Path(path)
+    checkpoint = load_checkpoint(data_dir, table) or {"table": table, "key": "id", "last_key": None}
+    checkpoint["file"] = path.name
+    checkpoint["offset"] = path.stat().st_size
+    checkpoint["complete"] = True
+    if rows is not None:
+        checkpoint["rows"] = rows
+    elif "rows" not in checkpoint:
+        checkpoint["rows"] = sum(1 for _ in iter_snapshot_rows(path))
+    save_checkpoint(data_dir, table, checkpoint)
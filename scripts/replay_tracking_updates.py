@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reenviar payloads gravados do FedEx Scraper para o update-tracking e medir
+throughput.
+
+Os payloads sao os corpos que o workflow "3 - FedEx Scraper" envia ao
+update-tracking (um objeto por SO). O arquivo pode ser NDJSON (um payload por
+linha), um array JSON, um objeto {"updates": [...]} ou os itens exportados de
+uma execucao do n8n ([{"json": {...}}, ...]).
+
+Com --batch-size 1 cada SO vira uma chamada, como o workflow faz hoje; com
+--batch-size N as SOs vao em lotes {"updates": [...]} (modo em lote da funcao:
+uma autenticacao, um .in() e uma RPC por lote). As chamadas rodam em paralelo
+ate --concurrency.
+
+ATENCAO: o update-tracking grava em envios_processados e shipment_history.
+Rode contra um projeto de teste (ou o stub dos benchmarks).
+
+Uso:
+    python scripts/replay_tracking_updates.py payloads.ndjson --batch-size 1
+    python scripts/replay_tracking_updates.py payloads.ndjson --batch-size 200 --concurrency 4
+    python scripts/replay_tracking_updates.py execucao_n8n.json --yes
+
+Variaveis de ambiente (.env):
+    SUPABASE_URL      URL do projeto Supabase
+    N8N_SHARED_TOKEN  Token aceito pelo update-tracking (Authorization: Bearer)
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    from dotenv import load_dotenv
+    from supaclient import SupabaseClient, chunked
+except ImportError as e:
+    print(f"Erro: biblioteca necessaria nao instalada: {e}")
+    print("\nInstale as dependencias:")
+    print('  pip install "httpx[http2]" python-dotenv')
+    sys.exit(1)
+
+BATCH_SIZE = 200    # SOs por chamada no modo em lote (a funcao aceita ate 500)
+CONCURRENCY = 4     # chamadas em voo ao mesmo tempo
+TIMEOUT = 120
+
+
+def read_payloads(path):
+    """Payloads do arquivo (NDJSON, array JSON, {"updates": [...]} ou itens do n8n)"""
+    with open(path, encoding="utf-8-sig") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(data, dict):
+        data = data.get("updates", [data])
+    # Itens exportados do n8n vem embrulhados em {"json": {...}}
+    return [item["json"] if isinstance(item.get("json"), dict) else item for item in data]
+
+
+def send(client, batch, batched):
+    """Uma chamada ao update-tracking (SO unica ou lote {"updates": [...]})"""
+    body = {"updates": list(batch)} if batched else batch[0]
+    return client.ainvoke("update-tracking", body, idempotent=True, timeout=TIMEOUT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reenviar payloads do FedEx Scraper para o update-tracking")
+    parser.add_argument("arquivo", help="Payloads gravados (NDJSON, JSON ou itens exportados do n8n)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"SOs por chamada; 1 = uma chamada por SO, como o workflow (default: {BATCH_SIZE})")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help=f"Chamadas em voo ao mesmo tempo (default: {CONCURRENCY})")
+    parser.add_argument("--limit", type=int, help="Reenviar so os primeiros N payloads")
+    parser.add_argument("--yes", action="store_true", help="Nao pedir confirmacao")
+    args = parser.parse_args()
+
+    if not 1 <= args.batch_size <= 500:
+        parser.error("--batch-size deve estar entre 1 e 500")
+
+    try:
+        payloads = read_payloads(args.arquivo)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao ler {args.arquivo}: {e}")
+        sys.exit(1)
+    if args.limit:
+        payloads = payloads[:args.limit]
+
+    # Carregar .env (scripts/ e root)
+    scripts_env = os.path.join(os.path.dirname(__file__), ".env")
+    root_env = os.path.join(os.path.dirname(__file__), "..", ".env")
+    load_dotenv(scripts_env)
+    load_dotenv(root_env)
+
+    url = os.getenv("SUPABASE_URL") or os.getenv("VITE_SUPABASE_URL")
+    token = os.getenv("N8N_SHARED_TOKEN")
+    if not url or not token:
+        print("Erro: SUPABASE_URL e N8N_SHARED_TOKEN devem estar no .env")
+        sys.exit(1)
+
+    batched = args.batch_size > 1
+    batches = chunked(payloads, args.batch_size)
+    print(f"=== REPLAY UPDATE-TRACKING ===")
+    print(f"Destino: {url}")
+    print(f"Payloads: {len(payloads)} em {len(batches)} chamadas "
+          f"({'lotes de ' + str(args.batch_size) if batched else 'uma SO por chamada'}, "
+          f"{args.concurrency} em paralelo)")
+
+    if not payloads:
+        print("Nada para enviar.")
+        return
+    if not args.yes:
+        confirm = input("Isso grava no banco de destino. Digite SIM para confirmar: ").strip()
+        if confirm != "SIM":
+            print("Operacao cancelada.")
+            return
+
+    with SupabaseClient(url, token, concurrency=max(args.concurrency, 1), timeout=TIMEOUT) as client:
+        started = time.perf_counter()
+        results = client.map(lambda batch: send(client, batch, batched), batches, return_exceptions=True)
+        elapsed = time.perf_counter() - started
+        client.print_metrics()
+
+    failed_calls = so_errors = 0
+    inserted = updated = history = 0
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            failed_calls += 1
+            so_errors += len(batch)
+            print(f"  Erro em chamada com {len(batch)} SOs: {result}")
+            continue
+        if batched:
+            so_errors += result.get("errors", 0)
+            inserted += result.get("inserted", 0)
+            updated += result.get("updated", 0)
+            history += result.get("history_inserted", 0)
+
+    print(f"\n=== RESULTADO ===")
+    print(f"  SOs enviadas: {len(payloads)} em {elapsed:.2f}s ({len(payloads) / elapsed:.1f} SOs/s)")
+    print(f"  Chamadas: {len(batches)} ({len(batches) / elapsed:.1f}/s; latencia por chamada em HTTP acima)")
+    if batched:
+        print(f"  Criadas: {inserted}, atualizadas: {updated}, eventos de historico: {history}")
+    print(f"  SOs com erro: {so_errors} ({failed_calls} chamadas falharam)")
+    if so_errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
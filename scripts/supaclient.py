@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared Supabase HTTP client for the scripts.
+
+One client per project keeps a pool of keep-alive connections (HTTP/2 when
+the `h2` package is installed and the server negotiates it over TLS) and
+every request goes through it:
+
+  - bounded concurrency: at most `concurrency` requests in flight
+  - retries with exponential backoff and full jitter (Retry-After honored):
+      429 / 503            always (the server did not process the request)
+      500 / 502 / 504      only for idempotent requests
+      timeouts, resets     only for idempotent requests
+    GET/HEAD/PUT/DELETE are idempotent; pass idempotent=True for read-only
+    POSTs such as query Edge Functions
+  - per-endpoint metrics: requests, errors, retries, p50/p95/max latency
+
+AsyncSupabaseClient is the asyncio API. SupabaseClient wraps it for
+synchronous code: it runs the event loop in a background thread, so plain
+calls block as usual, calls from several threads share the pool, and
+gather()/map() put many requests in flight at once.
+
+    with SupabaseClient(url, key, concurrency=16) as client:
+        rows = client.select("cargas", "id,numero_carga", [("status", "eq.entregue")])
+        client.map(lambda ids: client.adelete("cargas", [("id", in_filter(ids))]), batches)
+        client.print_metrics()
+
+Requires httpx (pip install "httpx[http2]").
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (only needed for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_CONCURRENCY = 16
+DEFAULT_RETRIES = 3
+BACKOFF_BASE_S = 0.5
+BACKOFF_CAP_S = 8.0
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_ALWAYS_STATUS = frozenset({429, 503})
+RETRY_IDEMPOTENT_STATUS = frozenset({500, 502, 504})
+
+# PostgREST filters: [("status", "eq.entregue"), ...] or {"status": "eq.entregue"}
+Filters = Union[Sequence[Tuple[str, str]], Dict[str, str], None]
+
+
+class SupabaseError(Exception):
+    """Base error for requests that could not be completed"""
+
+
+class SupabaseHTTPError(SupabaseError):
+    """Non-2xx response"""
+
+    def __init__(self, response: httpx.Response):
+        self.response = response
+        self.status_code = response.status_code
+        super().__init__(
+            f"HTTP {response.status_code} {response.reason_phrase} for "
+            f"{response.request.method} {response.request.url}"
+        )
+
+    @property
+    def text(self) -> str:
+        return self.response.text
+
+
+class SupabaseTimeout(SupabaseError):
+    """The request timed out (after retries, when retried)"""
+
+
+class SupabaseConnectionError(SupabaseError):
+    """Connection failed or was reset (after retries, when retried)"""
+
+
+def raise_for_status(response: httpx.Response) -> httpx.Response:
+    if response.is_error:
+        raise SupabaseHTTPError(response)
+    return response
+
+
+def content_range_total(response: httpx.Response) -> Optional[int]:
+    """Total from a Content-Range header ("0-99/1234" or "*/1234"); None for "*" """
+    total = response.headers.get("Content-Range", "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+def in_filter(values: Iterable[Any]) -> str:
+    """PostgREST in.(...) expression; values with reserved characters are quoted"""
+    quoted = []
+    for value in values:
+        text = str(value)
+        if re.search(r'[,()"\s]', text):
+            text = '"' + text.replace('"', '\\"') + '"'
+        quoted.append(text)
+    return f"in.({','.join(quoted)})"
+
+
+def chunked(values: Sequence[Any], size: int) -> List[Sequence[Any]]:
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+class EndpointMetrics:
+    """Latency and outcome counters per endpoint ("POST /functions/v1/query-envios")"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, List[float]] = {}
+        self._errors: Dict[str, int] = {}
+        self._retries: Dict[str, int] = {}
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self._latencies.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def record_retry(self, endpoint: str) -> None:
+        with self._lock:
+            self._retries[endpoint] = self._retries.get(endpoint, 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            result = {}
+            for endpoint, values in sorted(self._latencies.items()):
+                ordered = sorted(values)
+                result[endpoint] = {
+                    "requests": len(ordered),
+                    "errors": self._errors.get(endpoint, 0),
+                    "retries": self._retries.get(endpoint, 0),
+                    "p50_ms": _percentile(ordered, 50) * 1000,
+                    "p95_ms": _percentile(ordered, 95) * 1000,
+                    "max_ms": ordered[-1] * 1000,
+                }
+            return result
+
+    def print(self, title: str = "HTTP") -> None:
+        summary = self.summary()
+        if not summary:
+            return
+        width = max(len(e) for e in summary)
+        print(f"\n{title}")
+        print(f"  {'endpoint':<{width}} {'req':>6} {'err':>5} {'retry':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        for endpoint, m in summary.items():
+            print(f"  {endpoint:<{width}} {m['requests']:>6,} {m['errors']:>5,} {m['retries']:>6,} "
+                  f"{m['p50_ms']:>8.1f} {m['p95_ms']:>8.1f} {m['max_ms']:>8.1f}")
+
+
+def _endpoint(method: str, path: str) -> str:
+    return f"{method} /{path.split('?', 1)[0].lstrip('/')}"
+
+
+def _params(filters: Filters, extra: Optional[Sequence[Tuple[str, str]]] = None) -> List[Tuple[str, str]]:
+    params = list(filters.items()) if isinstance(filters, dict) else list(filters or [])
+    return params + list(extra or [])
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response]) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.replace(".", "", 1).isdigit():
+            return min(float(retry_after), BACKOFF_CAP_S)
+    # Full jitter: uniform between 0 and the exponential ceiling
+    return random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt))
+
+
+class AsyncSupabaseClient:
+    """asyncio client for the REST API (PostgREST) and Edge Functions of one project"""
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        http2: bool = True,
+        headers: Optional[Dict[str, str]] = None,
+        metrics: Optional[EndpointMetrics] = None,
+    ):
+        self.base_url = url.rstrip("/")
+        self.retries = retries
+        self.metrics = metrics or EndpointMetrics()
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+                "Content-Type": "application/json",
+                **(headers or {}),
+            },
+            timeout=timeout,
+            http2=http2 and HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=max(1, concurrency),
+                                max_keepalive_connections=max(1, concurrency)),
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def __aenter__(self) -> "AsyncSupabaseClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    # ------------------------------------------------------------------
+    # Core
+    # ------------------------------------------------------------------
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: Filters = None,
+        json: Any = None,
+        content: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        idempotent: Optional[bool] = None,
+        check: bool = True,
+    ) -> httpx.Response:
+        """
+        Send a request (path relative to the project URL, e.g. "rest/v1/cargas").
+        Raises SupabaseHTTPError on non-2xx when check=True (the default),
+        SupabaseTimeout / SupabaseConnectionError when the request failed.
+        """
+        method = method.upper()
+        endpoint = _endpoint(method, path)
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        kwargs: Dict[str, Any] = {"params": _params(params), "headers": headers}
+        if json is not None:
+            kwargs["json"] = json
+        if content is not None:
+            kwargs["content"] = content
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        attempt = 0
+        async with self._semaphore:
+            while True:
+                started = time.perf_counter()
+                response: Optional[httpx.Response] = None
+                try:
+                    response = await self._client.request(method, path, **kwargs)
+                except httpx.TimeoutException as e:
+                    error: Optional[SupabaseError] = SupabaseTimeout(f"{endpoint}: timeout ({e!r})")
+                except httpx.TransportError as e:
+                    error = SupabaseConnectionError(f"{endpoint}: {e!r}")
+                else:
+                    error = None
+                self.metrics.record(endpoint, time.perf_counter() - started,
+                                    ok=error is None and not response.is_error)
+
+                if error is not None:
+                    retryable = idempotent
+                else:
+                    status = response.status_code
+                    retryable = status in RETRY_ALWAYS_STATUS or (
+                        idempotent and status in RETRY_IDEMPOTENT_STATUS)
+
+                if retryable and attempt < self.retries:
+                    self.metrics.record_retry(endpoint)
+                    await asyncio.sleep(_retry_delay(attempt, response))
+                    attempt += 1
+                    continue
+
+                if error is not None:
+                    raise error
+                return raise_for_status(response) if check else response
+
+    async def gather(self, aws: Iterable[Awaitable[Any]], return_exceptions: bool = False) -> List[Any]:
+        """Await many requests together (still capped by `concurrency`)"""
+        return list(await asyncio.gather(*aws, return_exceptions=return_exceptions))
+
+    # ------------------------------------------------------------------
+    # PostgREST
+    # ------------------------------------------------------------------
+
+    async def select(
+        self,
+        table: str,
+        columns: str = "*",
+        filters: Filters = None,
+        order: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        extra = [("select", columns)]
+        if order:
+            extra.append(("order", order))
+        if limit is not None:
+            extra.append(("limit", str(limit)))
+        response = await self.request("GET", f"rest/v1/{table}", params=_params(filters, extra))
+        return response.json()
+
+    async def select_all(
+        self,
+        table: str,
+        columns: str = "*",
+        filters: Filters = None,
+        key: str = "id",
+        page_size: int = 1000,
+    ) -> List[Dict[str, Any]]:
+        """All matching rows, paging by `key` (keyset) past the max-rows limit"""
+        rows: List[Dict[str, Any]] = []
+        last = None
+        while True:
+            page_filters = _params(filters, [(key, f"gt.{last}")] if last is not None else None)
+            page = await self.select(table, columns, page_filters, order=f"{key}.asc", limit=page_size)
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            last = page[-1][key]
+
+    async def count(self, table: str, filters: Filters = None) -> int:
+        """Exact row count without transferring rows (HEAD + Prefer: count=exact)"""
+        response = await self.request("HEAD", f"rest/v1/{table}", params=filters,
+                                      headers={"Prefer": "count=exact"})
+        total = content_range_total(response)
+        if total is None:
+            raise SupabaseError(f"{table}: Content-Range without a count")
+        return total
+
+    async def table_exists(self, table: str) -> bool:
+        response = await self.request("GET", f"rest/v1/{table}", params=[("limit", "0")], check=False)
+        return response.status_code == 200
+
+    async def insert(
+        self,
+        table: str,
+        rows: Union[List[Dict[str, Any]], Dict[str, Any], bytes],
+        upsert: bool = False,
+        on_conflict: Optional[str] = None,
+        returning: bool = False,
+        timeout: Optional[float] = None,
+        check: bool = True,
+        idempotent: bool = False,
+    ) -> httpx.Response:
+        """
+        POST rows (or a pre-encoded JSON body); upsert merges duplicates.
+        Not retried on 5xx/timeouts unless idempotent=True, so callers that
+        split oversized batches (adaptive_batching) see the failure at once.
+        """
+        prefer = ["return=representation" if returning else "return=minimal"]
+        if upsert:
+            prefer.append("resolution=merge-duplicates")
+        params = [("on_conflict", on_conflict)] if on_conflict else None
+        body = {"content": rows} if isinstance(rows, bytes) else {"json": rows}
+        return await self.request("POST", f"rest/v1/{table}", params=params,
+                                  headers={"Prefer": ",".join(prefer)}, timeout=timeout,
+                                  check=check, idempotent=idempotent, **body)
+
+    async def update(
+        self,
+        table: str,
+        filters: Filters,
+        values: Dict[str, Any],
+        returning: bool = False,
+    ) -> Union[List[Dict[str, Any]], None]:
+        if not filters:
+            raise ValueError(f"refusing PATCH without filters on {table}")
+        response = await self.request(
+            "PATCH", f"rest/v1/{table}", params=filters, json=values, idempotent=True,
+            headers={"Prefer": "return=representation" if returning else "return=minimal"},
+        )
+        return response.json() if returning else None
+
+    async def delete(
+        self,
+        table: str,
+        filters: Filters,
+        returning: bool = False,
+    ) -> Union[List[Dict[str, Any]], Optional[int]]:
+        """
+        DELETE matching rows (never without filters). Returns the deleted rows
+        with returning=True, otherwise the server's count (None if not sent).
+        """
+        if not filters:
+            raise ValueError(f"refusing DELETE without filters on {table}")
+        prefer = "return=representation" if returning else "return=minimal,count=exact"
+        response = await self.request("DELETE", f"rest/v1/{table}", params=filters,
+                                      headers={"Prefer": prefer})
+        return response.json() if returning else content_range_total(response)
+
+    async def rpc(self, function: str, args: Optional[Dict[str, Any]] = None,
+                  idempotent: bool = False, timeout: Optional[float] = None) -> Any:
+        response = await self.request("POST", f"rest/v1/rpc/{function}", json=args or {},
+                                      idempotent=idempotent, timeout=timeout)
+        return response.json() if response.content else None
+
+    # ------------------------------------------------------------------
+    # Edge Functions
+    # ------------------------------------------------------------------
+
+    async def invoke(self, function: str, body: Optional[Dict[str, Any]] = None,
+                     idempotent: bool = False, timeout: Optional[float] = None) -> Any:
+        """POST /functions/v1/{function} and return the decoded JSON"""
+        response = await self.request("POST", f"functions/v1/{function}", json=body or {},
+                                      idempotent=idempotent, timeout=timeout)
+        return response.json()
+
+
+class SupabaseClient:
+    """
+    Blocking facade over AsyncSupabaseClient. The event loop runs in a
+    daemon thread; methods may be called from any number of threads.
+    The a-prefixed methods return coroutines for gather()/map().
+    """
+
+    def __init__(self, url: str, key: str, **options: Any):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="supaclient", daemon=True)
+        self._thread.start()
+        self.aio: AsyncSupabaseClient = self.run(self._create(url, key, options))
+        self.base_url = self.aio.base_url
+        self.metrics = self.aio.metrics
+
+    @staticmethod
+    async def _create(url: str, key: str, options: Dict[str, Any]) -> AsyncSupabaseClient:
+        return AsyncSupabaseClient(url, key, **options)
+
+    def run(self, coro: Awaitable[Any]) -> Any:
+        """Run a coroutine on the client's loop and wait for the result"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("SupabaseClient.run() called from its own event loop")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def gather(self, aws: Iterable[Awaitable[Any]], return_exceptions: bool = False) -> List[Any]:
+        """Run many coroutines (e.g. client.adelete(...)) concurrently, results in order"""
+        aws = list(aws)
+        return self.run(self.aio.gather(aws, return_exceptions=return_exceptions))
+
+    def map(self, fn: Callable[[Any], Awaitable[Any]], items: Iterable[Any],
+            return_exceptions: bool = False) -> List[Any]:
+        """gather(fn(item) for item in items)"""
+        return self.gather((fn(item) for item in items), return_exceptions=return_exceptions)
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        self.run(self.aio.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self) -> "SupabaseClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def print_metrics(self, title: str = "HTTP") -> None:
+        self.metrics.print(title)
+
+    # Coroutine versions (for gather/map)
+
+    def arequest(self, *args, **kwargs) -> Awaitable[httpx.Response]:
+        return self.aio.request(*args, **kwargs)
+
+    def aselect(self, *args, **kwargs) -> Awaitable[List[Dict[str, Any]]]:
+        return self.aio.select(*args, **kwargs)
+
+    def acount(self, *args, **kwargs) -> Awaitable[int]:
+        return self.aio.count(*args, **kwargs)
+
+    def ainsert(self, *args, **kwargs) -> Awaitable[httpx.Response]:
+        return self.aio.insert(*args, **kwargs)
+
+    def aupdate(self, *args, **kwargs) -> Awaitable[Any]:
+        return self.aio.update(*args, **kwargs)
+
+    def adelete(self, *args, **kwargs) -> Awaitable[Any]:
+        return self.aio.delete(*args, **kwargs)
+
+    def arpc(self, *args, **kwargs) -> Awaitable[Any]:
+        return self.aio.rpc(*args, **kwargs)
+
+    def ainvoke(self, *args, **kwargs) -> Awaitable[Any]:
+        return self.aio.invoke(*args, **kwargs)
+
+    # Blocking versions (same signatures as AsyncSupabaseClient)
+
+    def request(self, *args, **kwargs) -> httpx.Response:
+        return self.run(self.aio.request(*args, **kwargs))
+
+    def get(self, path: str, **kwargs) -> httpx.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> httpx.Response:
+        return self.request("POST", path, **kwargs)
+
+    def select(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        return self.run(self.aio.select(*args, **kwargs))
+
+    def select_all(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        return self.run(self.aio.select_all(*args, **kwargs))
+
+    def count(self, *args, **kwargs) -> int:
+        return self.run(self.aio.count(*args, **kwargs))
+
+    def table_exists(self, table: str) -> bool:
+        return self.run(self.aio.table_exists(table))
+
+    def insert(self, *args, **kwargs) -> httpx.Response:
+        return self.run(self.aio.insert(*args, **kwargs))
+
+    def update(self, *args, **kwargs) -> Any:
+        return self.run(self.aio.update(*args, **kwargs))
+
+    def delete(self, *args, **kwargs) -> Any:
+        return self.run(self.aio.delete(*args, **kwargs))
+
+    def rpc(self, *args, **kwargs) -> Any:
+        return self.run(self.aio.rpc(*args, **kwargs))
+
+    def invoke(self, *args, **kwargs) -> Any:
+        return self.run(self.aio.invoke(*args, **kwargs))
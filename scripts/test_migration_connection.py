@@ -16,7 +16,7 @@ if sys.platform == "win32":
     if hasattr(sys.stderr, "reconfigure"):
         sys.stderr.reconfigure(encoding="utf-8")
 
-import requests
+from supaclient import SupabaseClient, SupabaseError
 
 # Same config as migrate_supabase.py
 OLD_PROJECT_URL = "https://aldwmdfveivkfxxvfoua.supabase.co"
@@ -32,21 +32,17 @@ def test_connection(name, url, key, is_anon=False):
     print(f"\nTesting {name}...")
     print(f"  URL: {url}")
 
-    headers = {
-        "apikey": key,
-        "Authorization": f"Bearer {key}",
-    }
-
     # For anon keys, test with a simple table query instead of schema listing
     # Schema listing requires service role
     if is_anon:
         # Try to query profiles table (should exist in most projects)
-        test_url = f"{url}/rest/v1/profiles?limit=0"
+        test_path, params = "rest/v1/profiles", [("limit", "0")]
     else:
-        test_url = f"{url}/rest/v1/"
+        test_path, params = "rest/v1/", None
 
     try:
-        response = requests.get(test_url, headers=headers, timeout=10)
+        with SupabaseClient(url, key, timeout=10, retries=1) as client:
+            response = client.get(test_path, params=params, check=False)
 
         # For anon keys, 200 or 406 (not acceptable) are both OK
         # 406 means the table exists but we might not have permission
@@ -62,7 +58,7 @@ def test_connection(name, url, key, is_anon=False):
             print(f"    Response: {response.text[:200]}")
             return False
 
-    except requests.exceptions.RequestException as e:
+    except SupabaseError as e:
         print(f"  ✗ Connection error: {e}")
         return False
 
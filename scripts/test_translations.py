@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes de paridade de translations.py.
+
+  - translate_fedex_status contra a busca linear original sobre os casos de
+    benchmarks/bench_status_translation.py (corpus fedex_statuses.txt)
+  - STATUS_TRANSLATIONS igual, e na mesma ordem, às tabelas do TS
+    (supabase/functions/_shared/translations.ts e src/lib/utils.ts)
+  - doctests do módulo
+
+Uso:
+    python -m unittest scripts/test_translations.py
+"""
+
+import doctest
+import re
+import sys
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPTS_DIR.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.insert(0, str(SCRIPTS_DIR / "benchmarks"))
+
+import translations  # noqa: E402
+from bench_status_translation import CORPUS_FILE, legacy_translate, load_corpus, parity_cases  # noqa: E402
+from translations import STATUS_TRANSLATIONS, translate_fedex_status  # noqa: E402
+
+TS_TABLES = (
+    REPO_ROOT / "supabase" / "functions" / "_shared" / "translations.ts",
+    REPO_ROOT / "src" / "lib" / "utils.ts",
+)
+
+_TS_TABLE = re.compile(r"STATUS_TRANSLATIONS: Record<string, string> = \{(.*?)\n\};", re.S)
+_TS_ENTRY = re.compile(r"^\s*'((?:[^'\\]|\\.)*)'\s*:\s*'((?:[^'\\]|\\.)*)',?\s*$", re.M)
+
+
+def load_ts_table(path: Path) -> list:
+    """Pares (chave, valor) do literal STATUS_TRANSLATIONS de um arquivo TS, em ordem"""
+    match = _TS_TABLE.search(path.read_text(encoding="utf-8"))
+    if not match:
+        raise AssertionError(f"STATUS_TRANSLATIONS não encontrado em {path}")
+    return [(key.replace("\\'", "'"), value.replace("\\'", "'"))
+            for key, value in _TS_ENTRY.findall(match.group(1))]
+
+
+class TranslateParityTest(unittest.TestCase):
+    def test_matches_linear_scan(self):
+        cases = parity_cases(load_corpus(CORPUS_FILE))
+        diverged = [(case, legacy_translate(case), translate_fedex_status(case)) for case in cases
+                    if legacy_translate(case) != translate_fedex_status(case)]
+        self.assertEqual(diverged, [])
+
+    def test_repeated_calls_hit_the_same_result(self):
+        for case in load_corpus(CORPUS_FILE):
+            self.assertEqual(translate_fedex_status(case), translate_fedex_status(case))
+            self.assertEqual(translate_fedex_status(case), legacy_translate(case))
+
+
+class TsTableParityTest(unittest.TestCase):
+    def test_tables_match_python(self):
+        expected = list(STATUS_TRANSLATIONS.items())
+        for path in TS_TABLES:
+            with self.subTest(path=str(path.relative_to(REPO_ROOT))):
+                self.assertEqual(load_ts_table(path), expected)
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(translations))
+    return tests
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agenda adaptativa de consultas de tracking (fila de prioridade persistente)
+
+O workflow "3 - FedEx Scraper" reconsulta todas as SOs pendentes a cada 4h,
+tenha a SO saído ontem ou esteja parada ha duas semanas em desembaraço. Aqui
+cada SO tem o seu próximo horário de consulta, calculado a partir do estágio
+lógico (map_to_logical_stage, o mesmo do update-tracking), de quando entrou
+nele e do SLA do estágio (STAGE_SLAS de src/lib/statusNormalizer.ts):
+
+  - recém-chegada no estágio (menos de 40% do SLA): espera até a janela
+    em que a mudança fica provável (no máximo 12h)
+  - na janela (40% a 150% do SLA): a cada 3h
+  - parada além da janela: recua exponencialmente (dobra a cada meio SLA)
+    até 24h
+  - Entregue: uma vez por semana; erro da FedEx/update-tracking: em 6h
+
+A fila fica num heap em memória (heapq) com cópia em SQLite
+(.tracking_schedule.sqlite); o fedex_tracking_worker.py --schedule consulta
+só as SOs vencidas. Assim o número de chamadas por dia acompanha a atividade
+real em vez do tamanho da fila.
+
+Uso:
+    python tracking_scheduler.py                   # Resumo da fila por estágio
+    python tracking_scheduler.py next --limit 20   # Próximas SOs a consultar
+    python tracking_scheduler.py so 23205545       # Agenda de uma SO
+"""
+
+import argparse
+import heapq
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from translations import (STAGE_CLEARANCE, STAGE_DELIVERED, STAGE_IN_TRANSIT, STAGE_PRODUCTION,
+                          STAGE_WAREHOUSE, map_to_logical_stage)
+
+DEFAULT_PATH = Path(__file__).parent / '.tracking_schedule.sqlite'
+
+HOUR = 3600
+ACTIVE_INTERVAL = 3 * HOUR       # SOs na janela em que a mudança de estágio é provável
+MAX_INTERVAL = 12 * HOUR         # espera máxima antes da janela
+STALE_INTERVAL = 24 * HOUR       # SOs paradas além da janela
+DELIVERED_INTERVAL = 7 * 24 * HOUR
+ERROR_INTERVAL = 6 * HOUR
+LEGACY_INTERVAL = 4 * HOUR       # Schedule Trigger do workflow
+
+# Janela de mudança provável, em frações do SLA do estágio
+WINDOW_START = 0.4
+WINDOW_END = 1.5
+
+# SLA por estágio em dias úteis (STAGE_SLAS); desconhecido = como trânsito
+STAGE_SLA_BUSINESS_DAYS = {
+    STAGE_PRODUCTION: 5,
+    STAGE_WAREHOUSE: 2,
+    STAGE_CLEARANCE: 2,
+    STAGE_IN_TRANSIT: 3,
+}
+DEFAULT_SLA_BUSINESS_DAYS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedule (
+    sales_order      TEXT PRIMARY KEY,
+    tracking_numbers TEXT,
+    stage            TEXT,
+    status           TEXT,
+    stage_since      REAL NOT NULL,
+    next_poll_at     REAL NOT NULL,
+    last_polled_at   REAL,
+    polls            INTEGER NOT NULL DEFAULT 0,
+    errors           INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS schedule_next_poll ON schedule (next_poll_at);
+"""
+
+_COLUMNS = ('sales_order', 'tracking_numbers', 'stage', 'status', 'stage_since',
+            'next_poll_at', 'last_polled_at', 'polls', 'errors')
+
+
+def sla_seconds(stage: Optional[str]) -> float:
+    """SLA do estágio em segundos corridos (dias úteis x 7/5)"""
+    days = STAGE_SLA_BUSINESS_DAYS.get(stage, DEFAULT_SLA_BUSINESS_DAYS)
+    return days * 7 / 5 * 24 * HOUR
+
+
+def next_poll_delay(stage: Optional[str], stage_since: float, now: float) -> float:
+    """Segundos até a próxima consulta de uma SO no `stage` desde `stage_since`"""
+    if stage == STAGE_DELIVERED:
+        return DELIVERED_INTERVAL
+    sla = sla_seconds(stage)
+    elapsed = now - stage_since
+    if elapsed < WINDOW_START * sla:
+        return min(MAX_INTERVAL, max(ACTIVE_INTERVAL, WINDOW_START * sla - elapsed))
+    if elapsed <= WINDOW_END * sla:
+        return ACTIVE_INTERVAL
+    overdue = elapsed - WINDOW_END * sla
+    return min(STALE_INTERVAL, ACTIVE_INTERVAL * 2 ** min(16.0, 2 * overdue / sla))
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """ISO 8601 (ou epoch) -> epoch; None se vazio ou inválido"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def _fmt(ts: Optional[float]) -> str:
+    return datetime.fromtimestamp(ts).strftime('%d/%m %H:%M') if ts else '-'
+
+
+class TrackingSchedule:
+    """
+    Fila de prioridade das SOs pendentes de tracking, por next_poll_at.
+
+    O heap guarda (next_poll_at, sales_order); entradas cuja data não bate
+    mais com a da SO são descartadas ao sair do heap. Toda alteração vai para
+    a tabela schedule e é confirmada em commit(); sem caminho o banco fica só
+    em memória (simulações e benchmarks).
+    """
+
+    def __init__(self, path: Optional[Path] = DEFAULT_PATH):
+        self.path = Path(path) if path is not None else None
+        self.conn = sqlite3.connect(str(self.path) if self.path is not None else ':memory:')
+        self.conn.executescript(_SCHEMA)
+        self.entries: Dict[str, Dict] = {}
+        for row in self.conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM schedule"):
+            entry = dict(zip(_COLUMNS, row))
+            self.entries[entry['sales_order']] = entry
+        self._heap: List[Tuple[float, str]] = [(e['next_poll_at'], so) for so, e in self.entries.items()]
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def close(self):
+        """Fecha o banco; alterações sem commit() são descartadas (ex.: --dry-run)"""
+        self.conn.close()
+
+    def commit(self):
+        self.conn.commit()
+
+    def _save(self, entry: Dict):
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO schedule ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+            [entry[c] for c in _COLUMNS])
+        heapq.heappush(self._heap, (entry['next_poll_at'], entry['sales_order']))
+
+    def sync(self, rows: Iterable[Dict], now: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Alinha a fila com as SOs pendentes (linhas de v_envios_pendentes_tracking).
+        SOs novas ou com tracking_numbers alterado ficam vencidas já; SOs que
+        saíram da view saem da fila. Retorna (adicionadas, removidas).
+        """
+        now = time.time() if now is None else now
+        pending = {str(r['sales_order']): r for r in rows if r.get('sales_order')}
+        added = 0
+        for so, row in pending.items():
+            entry = self.entries.get(so)
+            if entry is None:
+                entry = {'sales_order': so, 'tracking_numbers': row.get('tracking_numbers'), 'stage': None,
+                         'status': None, 'stage_since': parse_timestamp(row.get('created_at')) or now,
+                         'next_poll_at': now, 'last_polled_at': None, 'polls': 0, 'errors': 0}
+                self.entries[so] = entry
+                self._save(entry)
+                added += 1
+            elif entry['tracking_numbers'] != row.get('tracking_numbers'):
+                entry['tracking_numbers'] = row.get('tracking_numbers')
+                entry['next_poll_at'] = now
+                self._save(entry)
+
+        removed = [so for so in self.entries if so not in pending]
+        for so in removed:
+            del self.entries[so]
+        self.conn.executemany("DELETE FROM schedule WHERE sales_order = ?", [(so,) for so in removed])
+        return added, len(removed)
+
+    def _peek(self) -> Optional[Tuple[float, str]]:
+        while self._heap:
+            due_at, so = self._heap[0]
+            entry = self.entries.get(so)
+            if entry is not None and entry['next_poll_at'] == due_at:
+                return due_at, so
+            heapq.heappop(self._heap)  # SO removida ou reagendada
+        return None
+
+    def next_due_at(self) -> Optional[float]:
+        top = self._peek()
+        return top[0] if top else None
+
+    def due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        SOs vencidas (next_poll_at <= now), mais atrasadas primeiro. Continuam
+        vencidas, no heap e na tabela, até record()/record_error(), então um
+        ciclo interrompido (erro da FedEx ou do Supabase, --dry-run) não perde
+        nenhuma: elas voltam em due() no próximo ciclo do mesmo processo.
+        """
+        now = time.time() if now is None else now
+        due: Dict[str, Tuple[float, str]] = {}
+        while limit is None or len(due) < limit:
+            top = self._peek()
+            if top is None or top[0] > now:
+                break
+            heapq.heappop(self._heap)
+            due.setdefault(top[1], top)  # a mesma SO pode estar duas vezes no heap
+        for top in due.values():
+            heapq.heappush(self._heap, top)
+        return [self.entries[so] for so in due]
+
+    def record(self, sales_order: str, status: str, location: str = '', changed_at=None,
+               now: Optional[float] = None) -> float:
+        """
+        Registra o status consultado e reagenda a SO. `changed_at` (data do
+        último evento da FedEx) vira o início do estágio quando ele muda.
+        Retorna o próximo horário de consulta.
+        """
+        now = time.time() if now is None else now
+        entry = self.entries[sales_order]
+        stage = map_to_logical_stage(status, location)
+        if stage != entry['stage']:
+            changed = parse_timestamp(changed_at)
+            entry['stage_since'] = min(changed, now) if changed else now
+            entry['stage'] = stage
+        entry['status'] = status
+        entry['last_polled_at'] = now
+        entry['polls'] += 1
+        entry['next_poll_at'] = now + next_poll_delay(stage, entry['stage_since'], now)
+        self._save(entry)
+        return entry['next_poll_at']
+
+    def record_error(self, sales_order: str, now: Optional[float] = None) -> float:
+        """Consulta sem resultado (número não encontrado, falha da API): tenta de novo em ERROR_INTERVAL"""
+        now = time.time() if now is None else now
+        entry = self.entries[sales_order]
+        entry['last_polled_at'] = now
+        entry['polls'] += 1
+        entry['errors'] += 1
+        entry['next_poll_at'] = now + ERROR_INTERVAL
+        self._save(entry)
+        return entry['next_poll_at']
+
+    def polls_per_day(self, now: Optional[float] = None) -> float:
+        """Consultas por dia estimadas com os intervalos atuais da fila"""
+        now = time.time() if now is None else now
+        return sum(24 * HOUR / next_poll_delay(e['stage'], e['stage_since'], now) for e in self.entries.values())
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, Dict]:
+        """Por estágio: SOs, vencidas agora e dias médios no estágio"""
+        now = time.time() if now is None else now
+        stages: Dict[str, Dict] = {}
+        for entry in self.entries.values():
+            name = entry['stage'] or ('Sem resultado' if entry['polls'] else 'Nunca consultada')
+            stage = stages.setdefault(name, {'sos': 0, 'due': 0, 'days': 0.0})
+            stage['sos'] += 1
+            stage['due'] += entry['next_poll_at'] <= now
+            stage['days'] += (now - entry['stage_since']) / (24 * HOUR)
+        for stage in stages.values():
+            stage['days'] /= stage['sos']
+        return stages
+
+
+def cmd_summary(schedule: TrackingSchedule, args):
+    now = time.time()
+    print(f"\n{'Estagio':<18} {'SOs':>6} {'Vencidas':>9} {'Dias no estagio':>16}")
+    for stage, s in sorted(schedule.summary(now).items()):
+        print(f"{stage:<18} {s['sos']:>6} {s['due']:>9} {s['days']:>16.1f}")
+    legacy = len(schedule) * 24 * HOUR / LEGACY_INTERVAL
+    print(f"\nConsultas/dia estimadas: {schedule.polls_per_day(now):.0f} "
+          f"(a cada 4h seriam {legacy:.0f})")
+    print(f"Proxima consulta: {_fmt(schedule.next_due_at())}")
+
+
+def cmd_next(schedule: TrackingSchedule, args):
+    entries = sorted(schedule.entries.values(), key=lambda e: e['next_poll_at'])[:args.limit]
+    print(f"\n{'SO':<12} {'Proxima':<12} {'Estagio':<18} {'Desde':<12} {'Consultas':>9}")
+    for e in entries:
+        print(f"{e['sales_order']:<12} {_fmt(e['next_poll_at']):<12} {e['stage'] or '-':<18} "
+              f"{_fmt(e['stage_since']):<12} {e['polls']:>9}")
+
+
+def cmd_so(schedule: TrackingSchedule, args):
+    entry = schedule.entries.get(args.sales_order)
+    if entry is None:
+        print(f"SO {args.sales_order} nao esta na fila")
+        sys.exit(1)
+    for column in _COLUMNS:
+        value = entry[column]
+        if column in ('stage_since', 'next_poll_at', 'last_polled_at'):
+            value = _fmt(value)
+        print(f"  {column:<17} {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agenda adaptativa de consultas de tracking")
+    parser.add_argument('--db', default=str(DEFAULT_PATH), help=f"Banco da fila (padrao: {DEFAULT_PATH.name})")
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('summary', help="Resumo da fila por estagio (padrao)")
+    p_next = sub.add_parser('next', help="Proximas SOs a consultar")
+    p_next.add_argument('--limit', type=int, default=20)
+    p_so = sub.add_parser('so', help="Agenda de uma SO")
+    p_so.add_argument('sales_order')
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"Fila nao encontrada: {args.db} (rode fedex_tracking_worker.py --schedule)")
+        sys.exit(1)
+    schedule = TrackingSchedule(Path(args.db))
+    try:
+        {'next': cmd_next, 'so': cmd_so}.get(args.command, cmd_summary)(schedule, args)
+    finally:
+        schedule.close()
+
+
+if __name__ == '__main__':
+    main()
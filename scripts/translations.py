@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Port de supabase/functions/_shared/translations.ts para os scripts Python.
+
+Mesmas regras das Edge Functions, para que worker e scheduler de tracking
+traduzam e classifiquem os status da FedEx como o update-tracking:
+
+    >>> translate_fedex_status("DEPARTED FEDEX LOCATION - MEMPHIS, TN")
+    'Saiu da Localização FedEx'
+    >>> map_to_logical_stage("Departed FedEx location", "MEMPHIS, TN, US")
+    'Em Trânsito'
+    >>> map_to_logical_stage("In clearance", "CAMPINAS, BR")
+    'Em Desembaraço'
+
+Mudou uma regra ou tradução lá (há uma cópia de translateFedExStatus em
+src/lib/utils.ts), mude aqui também; test_translations.py confere se as
+tabelas são iguais e a paridade com a busca linear original.
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+# Mesma ordem do TS: no match parcial vence a primeira chave contida no status
+STATUS_TRANSLATIONS = {
+    # FedEx statuses
+    "Departed FedEx location": "Saiu da Localização FedEx",
+    "At FedEx destination facility": "Na Instalação FedEx de Destino",
+    "On FedEx vehicle for delivery": "Em Veículo FedEx para Entrega",
+    "In transit": "Em Trânsito",
+    "Delivered": "Entregue",
+    "Shipment exception": "Exceção no Envio",
+    "Held at FedEx location": "Retido na Localização FedEx",
+    "Picked up": "Coletado",
+    "At local FedEx facility": "Na Instalação FedEx Local",
+    "In clearance": "Em Desembaraço",
+    "Customs cleared": "Liberado pela Alfândega",
+    "Left FedEx origin facility": "Saiu da Instalação FedEx de Origem",
+    "Arrived at FedEx location": "Chegou na Localização FedEx",
+    "Shipment information sent": "Informações de Envio Transmitidas",
+    "Package available for clearance": "Pacote Disponível para Desembaraço",
+
+    # Common location translations
+    "MEMPHIS": "Memphis",
+    "MIAMI": "Miami",
+    "INDIANAPOLIS": "Indianápolis",
+    "SAO PAULO": "São Paulo",
+    "RIO DE JANEIRO": "Rio de Janeiro",
+    "GUARULHOS": "Guarulhos",
+}
+
+# Chaves em minúsculas calculadas uma vez. Aqui um laço de `in` (busca em C)
+# sai mais barato que a regex combinada usada no TS; ver
+# benchmarks/bench_status_translation.py
+_PARTIAL_TRANSLATIONS = tuple((key.lower(), value) for key, value in STATUS_TRANSLATIONS.items())
+
+STAGE_PRODUCTION = "Em Produção"
+STAGE_WAREHOUSE = "No Armazém"
+STAGE_CLEARANCE = "Em Desembaraço"
+STAGE_DELIVERED = "Entregue"
+STAGE_IN_TRANSIT = "Em Trânsito"
+STAGE_UPDATED = "Atualizado"  # status não reconhecido (não entra no histórico)
+
+_PRODUCTION_WORDS = ("produção", "producao", "production")
+_WAREHOUSE_WORDS = ("armazém", "armazem", "warehouse")
+_CLEARANCE_WORDS = ("desembaraço", "desembaraco", "clearance", "customs", "alfândega", "alfandega")
+_DELIVERED_WORDS = ("entregue", "delivered")
+_TRANSIT_WORDS = ("departed", "arrived", "in transit", "em trânsito", "left", "saiu", "fedex", "enviado", "shipped")
+
+
+@lru_cache(maxsize=1024)
+def _translate(status: str) -> str:
+    exact = STATUS_TRANSLATIONS.get(status)
+    if exact:
+        return exact
+    status_lower = status.lower()
+    for key, value in _PARTIAL_TRANSLATIONS:
+        if key in status_lower:
+            return value
+    return status
+
+
+def translate_fedex_status(status: Optional[str]) -> Optional[str]:
+    """Status/localização em português (translateFedExStatus), com cache LRU"""
+    if not status:
+        return status
+    return _translate(status)
+
+
+def map_to_logical_stage(status: Optional[str], location: Optional[str] = "") -> str:
+    """Estágio lógico de um status FedEx (mapToLogicalStage)"""
+    status_lower = (status or "").lower()
+    location_lower = (location or "").lower()
+
+    if any(word in status_lower for word in _PRODUCTION_WORDS):
+        return STAGE_PRODUCTION
+    if any(word in status_lower for word in _WAREHOUSE_WORDS) or "miami" in location_lower:
+        return STAGE_WAREHOUSE
+    if any(word in status_lower for word in _CLEARANCE_WORDS):
+        return STAGE_CLEARANCE
+    if any(word in status_lower for word in _DELIVERED_WORDS):
+        return STAGE_DELIVERED
+    if any(word in status_lower for word in _TRANSIT_WORDS):
+        return STAGE_IN_TRANSIT
+    return STAGE_UPDATED
+
+
+def normalize_status_for_db(status: str) -> str:
+    """Estágio lógico, ou o próprio status se não for reconhecido (normalizeStatusForDB)"""
+    mapped = map_to_logical_stage(status, "")
+    return status if mapped == STAGE_UPDATED else mapped
@@ -2,24 +2,50 @@
 # -*- coding: utf-8 -*-
 """
 Validate exported migration data.
-Checks JSON files for integrity and provides statistics.
+Checks snapshot files (NDJSON, gzip NDJSON, Arrow or legacy JSON) for integrity and
+provides statistics.
+
+Every file is streamed (never loaded whole) and checked for:
+  - per-row schema against the OpenAPI definitions (openapi_spec.json):
+    column types and NOT NULL columns
+  - primary key uniqueness, using 64-bit key hashes (8 bytes per row)
+  - FK reference integrity across tables, e.g.
+    carga_sales_orders.numero_carga -> cargas.numero_carga
+
+Files are scanned in parallel processes (--workers).
 """
 
+import argparse
+import hashlib
 import json
+import os
+import re
 import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 # Fix Windows encoding
 if sys.platform == "win32":
-    import os
     os.environ["PYTHONIOENCODING"] = "utf-8"
     if hasattr(sys.stdout, "reconfigure"):
         sys.stdout.reconfigure(encoding="utf-8")
     if hasattr(sys.stderr, "reconfigure"):
         sys.stderr.reconfigure(encoding="utf-8")
 
+try:
+    import numpy as np
+except ImportError:  # optional: falls back to Python sets for the key checks
+    np = None
+
+from migration_scheduler import load_fk_columns
+from migration_snapshot import find_snapshot, iter_snapshot_rows, load_checkpoint
+
 SCRIPT_DIR = Path(__file__).parent.resolve()
-DATA_DIR = SCRIPT_DIR / "migration_data"
+DATA_DIR = Path(os.getenv("MIGRATION_DATA_DIR", SCRIPT_DIR / "migration_data"))
+OPENAPI_SPEC = SCRIPT_DIR / "openapi_spec.json"
+MIGRATIONS_DIR = SCRIPT_DIR.parent / "supabase" / "migrations"
 
 # Tables expected
 TABLES = [
@@ -42,34 +68,224 @@ TABLES = [
     "user_roles",
 ]
 
+PRIMARY_KEY = "id"
+
+# Relationships the app relies on but the schema doesn't enforce with a
+# constraint (joins in the migrations/edge functions). Orphans here are
+# reported as warnings; orphans on real FK constraints fail validation.
+LOGICAL_FOREIGN_KEYS = [
+    ("carga_sales_orders", "carga_id", "cargas", "id"),
+    ("carga_sales_orders", "numero_carga", "cargas", "numero_carga"),
+    ("carga_sales_orders", "so_number", "envios_processados", "sales_order"),
+    ("carga_historico", "carga_id", "cargas", "id"),
+    ("carga_historico", "numero_carga", "cargas", "numero_carga"),
+    ("shipment_history", "sales_order", "envios_processados", "sales_order"),
+]
+
+MAX_SAMPLES = 5
+
+_UUID = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}(:?\d{2})?)?$")
+
+
+def _is_string(v: Any) -> bool:
+    return isinstance(v, str)
+
+
+def _is_uuid(v: Any) -> bool:
+    return isinstance(v, str) and bool(_UUID.match(v))
+
+
+def _is_timestamp(v: Any) -> bool:
+    return isinstance(v, str) and bool(_TIMESTAMP.match(v))
+
+
+def _is_integer(v: Any) -> bool:
+    return isinstance(v, int) and not isinstance(v, bool)
+
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _is_boolean(v: Any) -> bool:
+    return isinstance(v, bool)
+
+
+TYPE_CHECKS = {
+    "uuid": _is_uuid,
+    "text": _is_string,
+    "timestamp with time zone": _is_timestamp,
+    "timestamp without time zone": _is_timestamp,
+    "integer": _is_integer,
+    "bigint": _is_integer,
+    "numeric": _is_number,
+    "boolean": _is_boolean,
+}
+
+
+def key_hash(value: Any) -> int:
+    """64-bit hash of a key value (compact stand-in for the value itself)"""
+    digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+def _unique(hashes: array) -> array:
+    if np is not None:
+        return array("q", np.unique(np.frombuffer(hashes, dtype=np.int64)).tobytes())
+    return array("q", sorted(set(hashes)))
+
 
-def validate_json_file(table: str) -> tuple[bool, int, str]:
+def _duplicates(hashes: array) -> Set[int]:
+    if np is not None:
+        values, counts = np.unique(np.frombuffer(hashes, dtype=np.int64), return_counts=True)
+        return set(values[counts > 1].tolist())
+    seen: Set[int] = set()
+    dups: Set[int] = set()
+    for h in hashes:
+        if h in seen:
+            dups.add(h)
+        seen.add(h)
+    return dups
+
+
+def _missing(children: array, parents: array) -> Tuple[int, Set[int]]:
+    """(child rows whose hash is not among the parents, distinct missing hashes)"""
+    if np is not None:
+        child = np.frombuffer(children, dtype=np.int64)
+        mask = ~np.isin(child, np.frombuffer(parents, dtype=np.int64))
+        return int(mask.sum()), set(np.unique(child[mask]).tolist())
+    parent_set = set(parents)
+    missing = [h for h in children if h not in parent_set]
+    return len(missing), set(missing)
+
+
+def scan_table(
+    table: str,
+    data_dir: str,
+    key_columns: List[str],
+    fk_columns: List[str],
+) -> Dict[str, Any]:
     """
-    Validate a JSON export file.
-    Returns: (is_valid, row_count, error_message)
+    Stream one snapshot and return its counts, schema problems and key hashes.
+
+    key_columns: columns other tables reference (their distinct hashes are returned)
+    fk_columns:  columns that reference other tables (all non-null hashes returned)
     """
-    file_path = DATA_DIR / f"{table}.json"
+    result: Dict[str, Any] = {
+        "table": table, "file": None, "valid": False, "rows": 0, "error": "",
+        "schema_errors": 0, "schema_samples": [], "unknown_columns": [], "missing_columns": [],
+        "duplicate_hashes": set(), "keys": {}, "fks": {},
+    }
+
+    file_path = find_snapshot(Path(data_dir), table)
+    if file_path is None:
+        result["error"] = "File not found"
+        return result
+    result["file"] = str(file_path)
+
+    checkpoint = load_checkpoint(Path(data_dir), table)
+    if checkpoint and not checkpoint.get("complete"):
+        result["rows"] = checkpoint.get("rows", 0)
+        result["error"] = "Export incomplete (run --export-only --resume)"
+        return result
 
-    if not file_path.exists():
-        return False, 0, "File not found"
+    with open(OPENAPI_SPEC, "r", encoding="utf-8") as f:
+        definition = json.load(f).get("definitions", {}).get(table, {})
+    properties = definition.get("properties", {})
+    required = set(definition.get("required", []))
+    checks = {col: TYPE_CHECKS.get(spec.get("format")) for col, spec in properties.items()}
+
+    pk_hashes = array("q")
+    key_hashes = {col: array("q") for col in key_columns}
+    fk_hashes = {col: array("q") for col in fk_columns}
+    unknown: Set[str] = set()
+    seen_columns: Set[str] = set()
+    row_count = 0
 
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        for row in iter_snapshot_rows(file_path):
+            if not isinstance(row, dict):
+                result["error"] = f"Row {row_count + 1} is not an object"
+                result["rows"] = row_count
+                return result
+            row_count += 1
 
-        if not isinstance(data, list):
-            return False, 0, "Not a list"
+            for col, value in row.items():
+                check = checks.get(col, False)
+                if check is False:
+                    unknown.add(col)
+                    continue
+                seen_columns.add(col)
+                if value is None:
+                    if col in required:
+                        problem = f"row {row_count}: {col} is null (NOT NULL)"
+                    else:
+                        continue
+                elif check is None or check(value):
+                    continue
+                else:
+                    problem = f"row {row_count}: {col}={str(value)[:40]!r} is not {properties[col].get('format')}"
+                result["schema_errors"] += 1
+                if len(result["schema_samples"]) < MAX_SAMPLES:
+                    result["schema_samples"].append(problem)
 
-        return True, len(data), ""
+            pk = row.get(PRIMARY_KEY)
+            if pk is not None:
+                pk_hashes.append(key_hash(pk))
+            for col, hashes in key_hashes.items():
+                if row.get(col) is not None:
+                    hashes.append(key_hash(row[col]))
+            for col, hashes in fk_hashes.items():
+                if row.get(col) is not None:
+                    hashes.append(key_hash(row[col]))
 
-    except json.JSONDecodeError as e:
-        return False, 0, f"JSON error: {e}"
+    except ValueError as e:
+        result["error"] = f"JSON error: {e}"
+        result["rows"] = row_count
+        return result
 
     except Exception as e:
-        return False, 0, f"Error: {e}"
+        result["error"] = f"Error: {e}"
+        result["rows"] = row_count
+        return result
+
+    result["valid"] = True
+    result["rows"] = row_count
+    result["unknown_columns"] = sorted(unknown)
+    if row_count:
+        result["missing_columns"] = sorted(set(properties) - seen_columns - required)
+    result["duplicate_hashes"] = _duplicates(pk_hashes)
+    result["keys"] = {col: _unique(h) for col, h in key_hashes.items()}
+    result["fks"] = {col: h for col, h in fk_hashes.items() if len(h)}
+    return result
+
+
+def sample_values(file_path: str, column: str, hashes: Set[int], limit: int = MAX_SAMPLES) -> List[str]:
+    """Second pass over a file to recover the values behind a few problem hashes"""
+    found: List[str] = []
+    for row in iter_snapshot_rows(Path(file_path)):
+        value = row.get(column)
+        if value is not None and key_hash(value) in hashes and str(value) not in found:
+            found.append(str(value))
+            if len(found) >= limit:
+                break
+    return found
 
 
 def main():
+    global DATA_DIR
+
+    parser = argparse.ArgumentParser(description="Validate exported migration data")
+    parser.add_argument("--data-dir", help=f"Snapshot directory (default: {DATA_DIR})")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Files validated in parallel (default: min(4, CPUs))")
+    parser.add_argument("--skip-fk", action="store_true", help="Skip FK reference checks")
+    args = parser.parse_args()
+
+    if args.data_dir:
+        DATA_DIR = Path(args.data_dir)
+
     print("=" * 60)
     print("MIGRATION DATA VALIDATION")
     print("=" * 60)
@@ -80,6 +296,29 @@ def main():
         print("   Run migration export first.")
         sys.exit(1)
 
+    # (table, column, ref_table, ref_column, enforced)
+    foreign_keys: List[Tuple[str, str, str, str, bool]] = []
+    if not args.skip_fk:
+        enforced = load_fk_columns(TABLES, MIGRATIONS_DIR)
+        foreign_keys = [fk + (True,) for fk in enforced]
+        foreign_keys += [fk + (False,) for fk in LOGICAL_FOREIGN_KEYS if fk not in enforced]
+
+    key_columns: Dict[str, List[str]] = {t: [] for t in TABLES}
+    fk_columns: Dict[str, List[str]] = {t: [] for t in TABLES}
+    for table, column, ref_table, ref_column, _ in foreign_keys:
+        if ref_column not in key_columns[ref_table]:
+            key_columns[ref_table].append(ref_column)
+        if column not in fk_columns[table]:
+            fk_columns[table].append(column)
+
+    jobs = [(t, str(DATA_DIR), key_columns[t], fk_columns[t]) for t in TABLES]
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            scans = list(pool.map(scan_table, *zip(*jobs)))
+    else:
+        scans = [scan_table(*job) for job in jobs]
+    by_table = {s["table"]: s for s in scans}
+
     total_rows = 0
     valid_tables = 0
     missing_tables = 0
@@ -87,14 +326,12 @@ def main():
 
     results = []
 
-    for table in TABLES:
-        is_valid, row_count, error = validate_json_file(table)
-
-        if is_valid:
+    for scan in scans:
+        if scan["valid"]:
             status = "✓"
             valid_tables += 1
-            total_rows += row_count
-        elif error == "File not found":
+            total_rows += scan["rows"]
+        elif scan["error"] == "File not found":
             status = "⚠"
             missing_tables += 1
         else:
@@ -102,10 +339,10 @@ def main():
             invalid_tables += 1
 
         results.append({
-            "table": table,
+            "table": scan["table"],
             "status": status,
-            "rows": row_count,
-            "error": error,
+            "rows": scan["rows"],
+            "error": scan["error"],
         })
 
     # Print results
@@ -119,17 +356,65 @@ def main():
     print("-" * 60)
     print(f"{'TOTAL':<30} {'':<8} {total_rows:>10,}")
 
+    # Integrity checks
+    problems = 0
+    warnings = 0
+
+    print("\n" + "=" * 60)
+    print("INTEGRITY")
+    print("=" * 60)
+
+    for scan in scans:
+        if not scan["valid"]:
+            continue
+        table = scan["table"]
+        if scan["schema_errors"]:
+            problems += 1
+            print(f"✗ {table}: {scan['schema_errors']:,} schema error(s)")
+            for sample in scan["schema_samples"]:
+                print(f"    - {sample}")
+        if scan["duplicate_hashes"]:
+            problems += 1
+            dups = sample_values(scan["file"], PRIMARY_KEY, scan["duplicate_hashes"])
+            print(f"✗ {table}: {len(scan['duplicate_hashes']):,} duplicated {PRIMARY_KEY} value(s): {', '.join(dups)}")
+        if scan["unknown_columns"]:
+            warnings += 1
+            print(f"⚠ {table}: columns not in openapi_spec.json: {', '.join(scan['unknown_columns'])}")
+        if scan["missing_columns"]:
+            warnings += 1
+            print(f"⚠ {table}: spec columns absent from every row: {', '.join(scan['missing_columns'])}")
+
+    for table, column, ref_table, ref_column, is_enforced in foreign_keys:
+        child, parent = by_table[table], by_table[ref_table]
+        if not (child["valid"] and parent["valid"]) or column not in child["fks"]:
+            continue
+        orphan_rows, orphan_hashes = _missing(child["fks"][column], parent["keys"][ref_column])
+        if not orphan_rows:
+            continue
+        samples = sample_values(child["file"], column, orphan_hashes)
+        label = f"{table}.{column} -> {ref_table}.{ref_column}"
+        if is_enforced:
+            problems += 1
+            print(f"✗ {label}: {orphan_rows:,} row(s) reference missing keys: {', '.join(samples)}")
+        else:
+            warnings += 1
+            print(f"⚠ {label}: {orphan_rows:,} row(s) without a match (no FK constraint): {', '.join(samples)}")
+
+    if not problems and not warnings:
+        print("✓ Schema, primary keys and references OK")
+
     print("\n" + "=" * 60)
     print("SUMMARY")
     print("=" * 60)
     print(f"Valid tables:    {valid_tables:>3} / {len(TABLES)}")
     print(f"Missing tables:  {missing_tables:>3} / {len(TABLES)}")
     print(f"Invalid tables:  {invalid_tables:>3} / {len(TABLES)}")
+    print(f"Integrity:       {problems:>3} problem(s), {warnings} warning(s)")
     print(f"Total rows:      {total_rows:>10,}")
     print("=" * 60)
 
-    if invalid_tables > 0:
-        print("\n✗ Some files are invalid. Check errors above.")
+    if invalid_tables > 0 or problems > 0:
+        print("\n✗ Validation failed. Check errors above.")
         sys.exit(1)
     elif valid_tables == 0:
         print("\n✗ No valid data found. Run export first.")
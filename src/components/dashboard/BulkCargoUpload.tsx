@@ -46,6 +46,9 @@ interface ProcessingResult {
   sos_updated: number;
 }
 
+// Cargas per bulk-update-cargas call (one transaction each)
+const PROCESS_BATCH_SIZE = 50;
+
 interface BulkCargoUploadProps {
   isOpen: boolean;
   onClose: () => void;
@@ -316,13 +319,13 @@ const BulkCargoUpload: FC<BulkCargoUploadProps> = ({ isOpen, onClose, onSuccess
 
     const results: ProcessingResult[] = [];
 
-    for (let i = 0; i < validRows.length; i++) {
-      const { row } = validRows[i];
-      
+    for (let start = 0; start < validRows.length; start += PROCESS_BATCH_SIZE) {
+      const batch = validRows.slice(start, start + PROCESS_BATCH_SIZE).map(v => v.row);
+
       try {
         const response = await supabase.functions.invoke('bulk-update-cargas', {
           body: {
-            cargas: [{
+            cargas: batch.map(row => ({
               numero_carga: String(row.numero_carga).trim(),
               data_armazem: parseDate(row.data_armazem),
               data_embarque: parseDate(row.data_embarque),
@@ -330,7 +333,7 @@ const BulkCargoUpload: FC<BulkCargoUploadProps> = ({ isOpen, onClose, onSuccess
               data_desembaraco: parseDate(row.data_desembaraco),
               data_entrega: parseDate(row.data_entrega),
               status: row.status?.trim() || null,
-            }]
+            }))
           }
         });
 
@@ -339,22 +342,26 @@ const BulkCargoUpload: FC<BulkCargoUploadProps> = ({ isOpen, onClose, onSuccess
         }
 
         const data = response.data;
-        results.push({
-          success: data.results?.[0]?.success ?? true,
-          numero_carga: String(row.numero_carga),
-          message: data.results?.[0]?.message || 'Atualizado com sucesso',
-          sos_updated: data.results?.[0]?.sos_updated || 0,
+        batch.forEach((row, i) => {
+          results.push({
+            success: data.results?.[i]?.success ?? true,
+            numero_carga: String(row.numero_carga),
+            message: data.results?.[i]?.message || 'Atualizado com sucesso',
+            sos_updated: data.results?.[i]?.sos_updated || 0,
+          });
         });
       } catch (error: any) {
-        results.push({
-          success: false,
-          numero_carga: String(row.numero_carga),
-          message: error.message || 'Erro ao processar',
-          sos_updated: 0,
-        });
+        for (const row of batch) {
+          results.push({
+            success: false,
+            numero_carga: String(row.numero_carga),
+            message: error.message || 'Erro ao processar',
+            sos_updated: 0,
+          });
+        }
       }
 
-      setProcessingProgress(Math.round(((i + 1) / validRows.length) * 100));
+      setProcessingProgress(Math.round((results.length / validRows.length) * 100));
       setProcessingResults([...results]);
     }
 
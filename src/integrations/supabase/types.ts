@@ -626,7 +626,13 @@ export type Database = {
       [_ in never]: never
     }
     Functions: {
+      apply_tracking_updates: {
+        Args: { envios: Json; historico: Json }
+        Returns: Json
+      }
       backfill_shipment_history: { Args: never; Returns: undefined }
+      bulk_cargas_data_valida: { Args: { valor: string }; Returns: boolean }
+      bulk_update_cargas: { Args: { payload: Json }; Returns: Json }
       cleanup_old_auth_attempts: { Args: never; Returns: undefined }
       has_role: {
         Args: {
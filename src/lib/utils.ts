@@ -33,21 +33,56 @@ const STATUS_TRANSLATIONS: Record<string, string> = {
   'GUARULHOS': 'Guarulhos',
 };
 
+// Matcher compilado uma vez por módulo, com a mesma semântica da busca
+// linear: match exato primeiro; senão, a primeira chave (na ordem de
+// STATUS_TRANSLATIONS) contida no status em minúsculas. A regex combinada
+// acha a chave mais à esquerda no status; só as chaves anteriores a ela na
+// ordem ainda podem vencer e são conferidas com includes().
+const EXACT_TRANSLATIONS = new Map(Object.entries(STATUS_TRANSLATIONS));
+const PARTIAL_KEYS = Object.keys(STATUS_TRANSLATIONS).map((key) => key.toLowerCase());
+const PARTIAL_VALUES = Object.values(STATUS_TRANSLATIONS);
+const PARTIAL_INDEX = new Map<string, number>();
+PARTIAL_KEYS.forEach((key, index) => {
+  if (!PARTIAL_INDEX.has(key)) PARTIAL_INDEX.set(key, index);
+});
+const PARTIAL_PATTERN = new RegExp(
+  PARTIAL_KEYS.map((key) => key.replace(/[.*+?^${}()|[\]\\]/g, '\\$&')).join('|'),
+);
+
+// Cache dos status recentes: LRU aproximado em duas gerações. Um acerto é só
+// um get(); quando a geração atual enche, ela vira a anterior e os status
+// ainda em uso voltam para a atual no próximo acesso. Mais barato no V8 que
+// reordenar um único Map (delete + set) a cada acerto.
+const TRANSLATION_CACHE_SIZE = 500;
+let recentTranslations = new Map<string, string>();
+let olderTranslations = new Map<string, string>();
+
+function matchTranslation(status: string): string {
+  const exact = EXACT_TRANSLATIONS.get(status);
+  if (exact) return exact;
+
+  const statusLower = status.toLowerCase();
+  const match = PARTIAL_PATTERN.exec(statusLower);
+  if (!match) return status;
+
+  const first = PARTIAL_INDEX.get(match[0])!;
+  for (let i = 0; i < first; i++) {
+    if (statusLower.includes(PARTIAL_KEYS[i])) return PARTIAL_VALUES[i];
+  }
+  return PARTIAL_VALUES[first];
+}
+
 export function translateFedExStatus(status: string): string {
   if (!status) return status;
-  
-  // Try exact match first
-  if (STATUS_TRANSLATIONS[status]) {
-    return STATUS_TRANSLATIONS[status];
-  }
-  
-  // Try partial match (case insensitive)
-  const statusLower = status.toLowerCase();
-  for (const [key, value] of Object.entries(STATUS_TRANSLATIONS)) {
-    if (statusLower.includes(key.toLowerCase())) {
-      return value;
-    }
+
+  let translated = recentTranslations.get(status);
+  if (translated !== undefined) return translated;
+
+  translated = olderTranslations.get(status) ?? matchTranslation(status);
+  if (recentTranslations.size >= TRANSLATION_CACHE_SIZE) {
+    olderTranslations = recentTranslations;
+    recentTranslations = new Map();
   }
-  
-  return status;
+  recentTranslations.set(status, translated);
+  return translated;
 }
@@ -12,39 +12,164 @@ const RATE_LIMITS: RateLimitConfig[] = [
   { maxAttempts: 10, windowMinutes: 60, blockDurationMinutes: 1440 }, // 24h
 ];
 
-export async function checkRateLimit(
-  req: Request,
-  supabase: any,
-  endpoint: string
-): Promise<{ blocked: boolean; blockedUntil?: string; response?: Response }> {
-  const corsHeaders = {
-    'Access-Control-Allow-Origin': '*',
-    'Access-Control-Allow-Headers': 'authorization, x-client-info, apikey, content-type',
-  };
+// Do limite mais severo para o mais leve (sem mutar RATE_LIMITS a cada chamada)
+const RATE_LIMITS_DESC = [...RATE_LIMITS].sort((a, b) => b.maxAttempts - a.maxAttempts);
+
+const FAILURE_WINDOW_MINUTES = 60;
+
+// 'memory' (padrão): horários das falhas recentes guardados no isolate e
+// decisões de bloqueio em cache por RATE_LIMIT_CACHE_TTL_SECONDS; só falhas e
+// bloqueios são gravados em auth_attempts. 'db': consulta e grava
+// auth_attempts a cada chamada (comportamento anterior).
+const RATE_LIMIT_MODE = Deno.env.get('RATE_LIMIT_MODE')?.toLowerCase() === 'db' ? 'db' : 'memory';
+
+// Um bloqueio criado em outro isolate pode levar até esse tempo para valer aqui
+const BLOCK_CACHE_TTL_MS = Number(Deno.env.get('RATE_LIMIT_CACHE_TTL_SECONDS') ?? '30') * 1000;
+
+const FAILURE_WINDOW_MS = FAILURE_WINDOW_MINUTES * 60 * 1000;
 
-  const clientIP =
+// Falhas guardadas por chave: a partir do maior limite o bloqueio já é o mais severo
+const MAX_TRACKED_FAILURES = Math.max(...RATE_LIMITS.map((limit) => limit.maxAttempts));
+
+// Limite de chaves em memória por isolate
+const MAX_TRACKED_KEYS = 10000;
+
+interface BlockDecision {
+  blockedUntil: string | null;
+  expiresAt: number;
+}
+
+// attempted_at (ms) das falhas na janela, da mais antiga para a mais recente
+const recentFailures = new Map<string, number[]>();
+const blockCache = new Map<string, BlockDecision>();
+
+const corsHeaders = {
+  'Access-Control-Allow-Origin': '*',
+  'Access-Control-Allow-Headers': 'authorization, x-client-info, apikey, content-type',
+};
+
+function getClientIP(req: Request): string {
+  return (
     req.headers.get('x-forwarded-for')?.split(',')[0]?.trim() ||
     req.headers.get('x-real-ip') ||
-    'unknown';
+    'unknown'
+  );
+}
+
+// Descarta entradas vencidas (e, se ainda cheio, as mais antigas)
+function evict<V>(map: Map<string, V>, isStale: (value: V) => boolean): void {
+  if (map.size < MAX_TRACKED_KEYS) return;
+  for (const [key, value] of map) {
+    if (isStale(value)) map.delete(key);
+  }
+  for (const key of map.keys()) {
+    if (map.size < MAX_TRACKED_KEYS) break;
+    map.delete(key);
+  }
+}
+
+function pruneFailures(times: number[], now: number): number[] {
+  const windowStart = now - FAILURE_WINDOW_MS;
+  let first = 0;
+  while (first < times.length && times[first] < windowStart) first++;
+  return first ? times.slice(first) : times;
+}
 
-  // Verificar se IP está bloqueado
-  const { data: blocked } = await supabase
+function cacheBlockDecision(clientIP: string, blockedUntil: string | null, now: number): void {
+  evict(blockCache, (decision) => decision.expiresAt <= now);
+  blockCache.set(clientIP, { blockedUntil, expiresAt: now + BLOCK_CACHE_TTL_MS });
+}
+
+async function countRecentFailures(supabase: any, clientIP: string, endpoint: string): Promise<number> {
+  const windowStart = new Date(Date.now() - FAILURE_WINDOW_MINUTES * 60 * 1000);
+  const { data: failures } = await supabase
     .from('auth_attempts')
-    .select('blocked_until')
+    .select('id')
     .eq('ip_address', clientIP)
-    .gt('blocked_until', new Date().toISOString())
-    .order('blocked_until', { ascending: false })
-    .limit(1)
-    .maybeSingle();
+    .eq('endpoint', endpoint)
+    .eq('success', false)
+    .gte('attempted_at', windowStart.toISOString());
+
+  return failures?.length || 0;
+}
 
-  if (blocked?.blocked_until) {
+async function fetchRecentFailureTimes(supabase: any, clientIP: string, endpoint: string): Promise<number[]> {
+  const windowStart = new Date(Date.now() - FAILURE_WINDOW_MS);
+  const { data: failures } = await supabase
+    .from('auth_attempts')
+    .select('attempted_at')
+    .eq('ip_address', clientIP)
+    .eq('endpoint', endpoint)
+    .eq('success', false)
+    .gte('attempted_at', windowStart.toISOString())
+    .order('attempted_at', { ascending: true });
+
+  return (failures || []).map((failure: any) => Date.parse(failure.attempted_at)).slice(-MAX_TRACKED_FAILURES);
+}
+
+// Falhas na janela, incluindo a atual. Na primeira falha da chave neste
+// isolate os horários vêm de auth_attempts; depois não lê o banco. Cada falha
+// conta pela janela inteira, como na contagem do modo db.
+async function countFailureInMemory(supabase: any, clientIP: string, endpoint: string): Promise<number> {
+  const key = `${clientIP}|${endpoint}`;
+  let times = recentFailures.get(key);
+
+  if (!times) {
+    const previous = await fetchRecentFailureTimes(supabase, clientIP, endpoint);
+    times = recentFailures.get(key);
+    if (!times) {
+      const now = Date.now();
+      evict(recentFailures, (t) => pruneFailures(t, now).length === 0);
+      times = previous;
+    }
+  }
+
+  const now = Date.now();
+  times = pruneFailures(times, now);
+  times.push(now);
+  if (times.length > MAX_TRACKED_FAILURES) times.shift();
+  recentFailures.set(key, times);
+  return times.length;
+}
+
+export async function checkRateLimit(
+  req: Request,
+  supabase: any,
+  endpoint: string
+): Promise<{ blocked: boolean; blockedUntil?: string; response?: Response }> {
+  const clientIP = getClientIP(req);
+  const now = Date.now();
+
+  let blockedUntil: string | null;
+  const cached = RATE_LIMIT_MODE === 'memory' ? blockCache.get(clientIP) : undefined;
+
+  if (cached && cached.expiresAt > now) {
+    blockedUntil = cached.blockedUntil;
+  } else {
+    // Verificar se IP está bloqueado
+    const { data: blocked } = await supabase
+      .from('auth_attempts')
+      .select('blocked_until')
+      .eq('ip_address', clientIP)
+      .gt('blocked_until', new Date(now).toISOString())
+      .order('blocked_until', { ascending: false })
+      .limit(1)
+      .maybeSingle();
+
+    blockedUntil = blocked?.blocked_until ?? null;
+    if (RATE_LIMIT_MODE === 'memory') {
+      cacheBlockDecision(clientIP, blockedUntil, now);
+    }
+  }
+
+  if (blockedUntil && Date.parse(blockedUntil) > now) {
     return {
       blocked: true,
-      blockedUntil: blocked.blocked_until,
+      blockedUntil,
       response: new Response(
         JSON.stringify({
           error: 'Too many failed attempts. Try again later.',
-          blocked_until: blocked.blocked_until,
+          blocked_until: blockedUntil,
         }),
         {
           status: 429,
@@ -62,27 +187,17 @@ export async function recordFailedAttempt(
   req: Request,
   endpoint: string
 ): Promise<Date | null> {
-  const clientIP =
-    req.headers.get('x-forwarded-for')?.split(',')[0]?.trim() ||
-    req.headers.get('x-real-ip') ||
-    'unknown';
+  const clientIP = getClientIP(req);
 
   // Contar falhas recentes
-  const windowStart = new Date(Date.now() - 60 * 60 * 1000); // Últimas 1h
-  const { data: failures } = await supabase
-    .from('auth_attempts')
-    .select('id')
-    .eq('ip_address', clientIP)
-    .eq('endpoint', endpoint)
-    .eq('success', false)
-    .gte('attempted_at', windowStart.toISOString());
-
-  const failureCount = (failures?.length || 0) + 1; // +1 para incluir a tentativa atual
+  const failureCount = RATE_LIMIT_MODE === 'memory'
+    ? await countFailureInMemory(supabase, clientIP, endpoint)
+    : (await countRecentFailures(supabase, clientIP, endpoint)) + 1; // +1 para incluir a tentativa atual
 
   let blockedUntil: Date | null = null;
 
   // Determinar duração do bloqueio baseado no número de falhas
-  for (const limit of RATE_LIMITS.reverse()) {
+  for (const limit of RATE_LIMITS_DESC) {
     if (failureCount >= limit.maxAttempts) {
       blockedUntil = new Date(Date.now() + limit.blockDurationMinutes * 60 * 1000);
       break;
@@ -97,6 +212,10 @@ export async function recordFailedAttempt(
     blocked_until: blockedUntil?.toISOString() || null,
   });
 
+  if (RATE_LIMIT_MODE === 'memory' && blockedUntil) {
+    cacheBlockDecision(clientIP, blockedUntil.toISOString(), Date.now());
+  }
+
   return blockedUntil;
 }
 
@@ -105,14 +224,12 @@ export async function recordSuccessfulAttempt(
   req: Request,
   endpoint: string
 ): Promise<void> {
-  const clientIP =
-    req.headers.get('x-forwarded-for')?.split(',')[0]?.trim() ||
-    req.headers.get('x-real-ip') ||
-    'unknown';
+  // No modo memory sucessos não são persistidos (uma linha por chamada autenticada)
+  if (RATE_LIMIT_MODE === 'memory') return;
 
   // Registrar tentativa bem-sucedida
   await supabase.from('auth_attempts').insert({
-    ip_address: clientIP,
+    ip_address: getClientIP(req),
     endpoint: endpoint,
     success: true,
     blocked_until: null,
@@ -1,4 +1,4 @@
-import { createClient } from 'https://esm.sh/@supabase/supabase-js@2';
+import { createClient, SupabaseClient } from 'https://esm.sh/@supabase/supabase-js@2';
 
 const corsHeaders = {
   'Access-Control-Allow-Origin': '*',
@@ -78,238 +78,269 @@ function getShipmentStatus(dateType: string): string {
   }
 }
 
-Deno.serve(async (req) => {
-  // Handle CORS preflight
-  if (req.method === 'OPTIONS') {
-    return new Response(null, { headers: corsHeaders });
-  }
+// Set-based path: the whole payload in a single transaction
+// (public.bulk_update_cargas, migration 20261017120000)
+async function processWithRpc(supabase: SupabaseClient, cargas: CargoUpdate[]): Promise<UpdateResult[] | null> {
+  const { data, error } = await supabase.rpc('bulk_update_cargas', { payload: cargas });
 
-  try {
-    const supabaseUrl = Deno.env.get('SUPABASE_URL')!;
-    const supabaseServiceKey = Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')!;
-    const supabase = createClient(supabaseUrl, supabaseServiceKey);
+  if (error) {
+    // PGRST202: function not found (migration not applied yet)
+    if (error.code === 'PGRST202') {
+      console.warn('⚠️ bulk_update_cargas não encontrada, usando o loop por carga');
+      return null;
+    }
+    throw new Error(`Erro na atualização em massa: ${error.message}`);
+  }
 
-    const { cargas } = await req.json() as { cargas: CargoUpdate[] };
+  return (data as { results: UpdateResult[] }).results;
+}
 
-    if (!cargas || !Array.isArray(cargas) || cargas.length === 0) {
-      return new Response(
-        JSON.stringify({ error: 'Array de cargas é obrigatório' }),
-        { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-      );
+// Legacy path: one round trip per query, carga by carga (kept as fallback
+// for databases without the bulk_update_cargas migration and for comparison)
+async function processWithLoop(supabase: SupabaseClient, cargas: CargoUpdate[]): Promise<UpdateResult[]> {
+  const results: UpdateResult[] = [];
+
+  for (const carga of cargas) {
+    const numeroCarga = String(carga.numero_carga).trim();
+    
+    if (!numeroCarga) {
+      results.push({
+        success: false,
+        numero_carga: numeroCarga,
+        message: 'numero_carga é obrigatório',
+        sos_updated: 0,
+      });
+      continue;
     }
 
-    console.log(`📦 Processando ${cargas.length} cargas...`);
-
-    const results: UpdateResult[] = [];
+    try {
+      // 1. Check if cargo exists
+      const { data: existingCarga, error: fetchError } = await supabase
+        .from('cargas')
+        .select('*')
+        .eq('numero_carga', numeroCarga)
+        .single();
 
-    for (const carga of cargas) {
-      const numeroCarga = String(carga.numero_carga).trim();
-      
-      if (!numeroCarga) {
+      if (fetchError || !existingCarga) {
         results.push({
           success: false,
           numero_carga: numeroCarga,
-          message: 'numero_carga é obrigatório',
+          message: `Carga ${numeroCarga} não encontrada`,
           sos_updated: 0,
         });
         continue;
       }
 
-      try {
-        // 1. Check if cargo exists
-        const { data: existingCarga, error: fetchError } = await supabase
-          .from('cargas')
-          .select('*')
-          .eq('numero_carga', numeroCarga)
-          .single();
+      // 2. Prepare update data - only update fields that are provided
+      const updateData: Record<string, any> = {
+        updated_at: new Date().toISOString(),
+      };
 
-        if (fetchError || !existingCarga) {
-          results.push({
-            success: false,
-            numero_carga: numeroCarga,
-            message: `Carga ${numeroCarga} não encontrada`,
-            sos_updated: 0,
-          });
-          continue;
-        }
+      // Track which dates are being updated for history
+      const updatedDates: { type: string; date: string }[] = [];
 
-        // 2. Prepare update data - only update fields that are provided
-        const updateData: Record<string, any> = {
-          updated_at: new Date().toISOString(),
-        };
+      if (carga.data_armazem !== undefined && carga.data_armazem !== null) {
+        updateData.data_armazem = carga.data_armazem;
+        updatedDates.push({ type: 'data_armazem', date: carga.data_armazem });
+      }
 
-        // Track which dates are being updated for history
-        const updatedDates: { type: string; date: string }[] = [];
+      if (carga.data_embarque !== undefined && carga.data_embarque !== null) {
+        updateData.data_embarque = carga.data_embarque;
+        updatedDates.push({ type: 'data_embarque', date: carga.data_embarque });
+      }
 
-        if (carga.data_armazem !== undefined && carga.data_armazem !== null) {
-          updateData.data_armazem = carga.data_armazem;
-          updatedDates.push({ type: 'data_armazem', date: carga.data_armazem });
-        }
+      if (carga.data_chegada !== undefined && carga.data_chegada !== null) {
+        updateData.data_chegada_prevista = carga.data_chegada;
+        updatedDates.push({ type: 'data_chegada', date: carga.data_chegada });
+      }
 
-        if (carga.data_embarque !== undefined && carga.data_embarque !== null) {
-          updateData.data_embarque = carga.data_embarque;
-          updatedDates.push({ type: 'data_embarque', date: carga.data_embarque });
-        }
+      if (carga.data_desembaraco !== undefined && carga.data_desembaraco !== null) {
+        updateData.data_autorizacao = carga.data_desembaraco;
+        updatedDates.push({ type: 'data_desembaraco', date: carga.data_desembaraco });
+      }
 
-        if (carga.data_chegada !== undefined && carga.data_chegada !== null) {
-          updateData.data_chegada_prevista = carga.data_chegada;
-          updatedDates.push({ type: 'data_chegada', date: carga.data_chegada });
-        }
+      if (carga.data_entrega !== undefined && carga.data_entrega !== null) {
+        updateData.data_entrega = carga.data_entrega;
+        updatedDates.push({ type: 'data_entrega', date: carga.data_entrega });
+      }
 
-        if (carga.data_desembaraco !== undefined && carga.data_desembaraco !== null) {
-          updateData.data_autorizacao = carga.data_desembaraco;
-          updatedDates.push({ type: 'data_desembaraco', date: carga.data_desembaraco });
-        }
+      // Infer status from dates if not explicitly provided
+      const { status, ultima_localizacao } = carga.status 
+        ? { status: carga.status, ultima_localizacao: inferStatusFromDates(carga).ultima_localizacao }
+        : inferStatusFromDates(carga);
+      
+      updateData.status = status;
+      updateData.ultima_localizacao = ultima_localizacao;
 
-        if (carga.data_entrega !== undefined && carga.data_entrega !== null) {
-          updateData.data_entrega = carga.data_entrega;
-          updatedDates.push({ type: 'data_entrega', date: carga.data_entrega });
-        }
+      console.log(`🔄 Atualizando carga ${numeroCarga}:`, updateData);
+
+      // 3. Update cargas table
+      const { error: updateError } = await supabase
+        .from('cargas')
+        .update(updateData)
+        .eq('numero_carga', numeroCarga);
+
+      if (updateError) {
+        throw new Error(`Erro ao atualizar carga: ${updateError.message}`);
+      }
 
-        // Infer status from dates if not explicitly provided
-        const { status, ultima_localizacao } = carga.status 
-          ? { status: carga.status, ultima_localizacao: inferStatusFromDates(carga).ultima_localizacao }
-          : inferStatusFromDates(carga);
+      // 4. Insert events into carga_historico for each date
+      for (const { type, date } of updatedDates) {
+        // Check if event already exists for this date type
+        const eventName = getEventName(type);
         
-        updateData.status = status;
-        updateData.ultima_localizacao = ultima_localizacao;
+        // Delete existing event of same type (to replace with new date)
+        await supabase
+          .from('carga_historico')
+          .delete()
+          .eq('numero_carga', numeroCarga)
+          .eq('evento', eventName);
+
+        // Insert new event
+        const { error: histError } = await supabase
+          .from('carga_historico')
+          .insert({
+            numero_carga: numeroCarga,
+            evento: eventName,
+            data_evento: date,
+            localizacao: getEventLocation(type),
+            descricao: `Atualizado via importação em massa`,
+          });
+
+        if (histError) {
+          console.error(`⚠️ Erro ao inserir histórico para ${numeroCarga}:`, histError);
+        }
+      }
+
+      // 5. Get linked SOs
+      const { data: linkedSOs, error: soError } = await supabase
+        .from('carga_sales_orders')
+        .select('so_number')
+        .eq('numero_carga', numeroCarga);
 
-        console.log(`🔄 Atualizando carga ${numeroCarga}:`, updateData);
+      if (soError) {
+        console.error(`⚠️ Erro ao buscar SOs vinculadas:`, soError);
+      }
 
-        // 3. Update cargas table
-        const { error: updateError } = await supabase
-          .from('cargas')
-          .update(updateData)
-          .eq('numero_carga', numeroCarga);
+      const soNumbers = linkedSOs?.map(s => s.so_number) || [];
+      let sosUpdated = 0;
+
+      if (soNumbers.length > 0) {
+        // 6. Update envios_processados for linked SOs
+        const envioUpdate: Record<string, any> = {
+          status_atual: status,
+          status: status,
+          status_cliente: status,
+          ultima_localizacao: ultima_localizacao,
+          data_ultima_atualizacao: new Date().toISOString(),
+        };
 
-        if (updateError) {
-          throw new Error(`Erro ao atualizar carga: ${updateError.message}`);
+        if (status === 'Entregue') {
+          envioUpdate.is_delivered = true;
         }
 
-        // 4. Insert events into carga_historico for each date
-        for (const { type, date } of updatedDates) {
-          // Check if event already exists for this date type
-          const eventName = getEventName(type);
-          
-          // Delete existing event of same type (to replace with new date)
-          await supabase
-            .from('carga_historico')
-            .delete()
-            .eq('numero_carga', numeroCarga)
-            .eq('evento', eventName);
-
-          // Insert new event
-          const { error: histError } = await supabase
-            .from('carga_historico')
-            .insert({
-              numero_carga: numeroCarga,
-              evento: eventName,
-              data_evento: date,
-              localizacao: getEventLocation(type),
-              descricao: `Atualizado via importação em massa`,
-            });
-
-          if (histError) {
-            console.error(`⚠️ Erro ao inserir histórico para ${numeroCarga}:`, histError);
-          }
+        if (carga.data_embarque) {
+          envioUpdate.data_envio = carga.data_embarque;
         }
 
-        // 5. Get linked SOs
-        const { data: linkedSOs, error: soError } = await supabase
-          .from('carga_sales_orders')
-          .select('so_number')
-          .eq('numero_carga', numeroCarga);
+        const { error: envioError, count } = await supabase
+          .from('envios_processados')
+          .update(envioUpdate)
+          .in('sales_order', soNumbers);
 
-        if (soError) {
-          console.error(`⚠️ Erro ao buscar SOs vinculadas:`, soError);
+        if (envioError) {
+          console.error(`⚠️ Erro ao atualizar envios:`, envioError);
+        } else {
+          sosUpdated = soNumbers.length;
         }
 
-        const soNumbers = linkedSOs?.map(s => s.so_number) || [];
-        let sosUpdated = 0;
-
-        if (soNumbers.length > 0) {
-          // 6. Update envios_processados for linked SOs
-          const envioUpdate: Record<string, any> = {
-            status_atual: status,
-            status: status,
-            status_cliente: status,
-            ultima_localizacao: ultima_localizacao,
-            data_ultima_atualizacao: new Date().toISOString(),
-          };
-
-          if (status === 'Entregue') {
-            envioUpdate.is_delivered = true;
+        // 7. Insert shipment_history for each SO and each date
+        for (const soNumber of soNumbers) {
+          for (const { type, date } of updatedDates) {
+            const shipmentStatus = getShipmentStatus(type);
+            
+            // Delete existing event of same status for this SO
+            await supabase
+              .from('shipment_history')
+              .delete()
+              .eq('sales_order', soNumber)
+              .eq('status', shipmentStatus);
+
+            // Insert new event
+            const { error: shipHistError } = await supabase
+              .from('shipment_history')
+              .insert({
+                sales_order: soNumber,
+                status: shipmentStatus,
+                location: getEventLocation(type),
+                timestamp: date,
+                description: `Importação em massa - Carga ${numeroCarga}`,
+              });
+
+            if (shipHistError) {
+              console.error(`⚠️ Erro ao inserir shipment_history para ${soNumber}:`, shipHistError);
+            }
           }
+        }
+      }
 
-          if (carga.data_embarque) {
-            envioUpdate.data_envio = carga.data_embarque;
-          }
+      results.push({
+        success: true,
+        numero_carga: numeroCarga,
+        message: `Atualizado com sucesso`,
+        sos_updated: sosUpdated,
+      });
+
+      console.log(`✅ Carga ${numeroCarga} processada: ${sosUpdated} SOs atualizadas`);
+
+    } catch (error: any) {
+      console.error(`❌ Erro ao processar carga ${numeroCarga}:`, error);
+      results.push({
+        success: false,
+        numero_carga: numeroCarga,
+        message: error.message || 'Erro desconhecido',
+        sos_updated: 0,
+      });
+    }
+  }
 
-          const { error: envioError, count } = await supabase
-            .from('envios_processados')
-            .update(envioUpdate)
-            .in('sales_order', soNumbers);
+  return results;
+}
 
-          if (envioError) {
-            console.error(`⚠️ Erro ao atualizar envios:`, envioError);
-          } else {
-            sosUpdated = soNumbers.length;
-          }
+Deno.serve(async (req) => {
+  // Handle CORS preflight
+  if (req.method === 'OPTIONS') {
+    return new Response(null, { headers: corsHeaders });
+  }
 
-          // 7. Insert shipment_history for each SO and each date
-          for (const soNumber of soNumbers) {
-            for (const { type, date } of updatedDates) {
-              const shipmentStatus = getShipmentStatus(type);
-              
-              // Delete existing event of same status for this SO
-              await supabase
-                .from('shipment_history')
-                .delete()
-                .eq('sales_order', soNumber)
-                .eq('status', shipmentStatus);
-
-              // Insert new event
-              const { error: shipHistError } = await supabase
-                .from('shipment_history')
-                .insert({
-                  sales_order: soNumber,
-                  status: shipmentStatus,
-                  location: getEventLocation(type),
-                  timestamp: date,
-                  description: `Importação em massa - Carga ${numeroCarga}`,
-                });
-
-              if (shipHistError) {
-                console.error(`⚠️ Erro ao inserir shipment_history para ${soNumber}:`, shipHistError);
-              }
-            }
-          }
-        }
+  try {
+    const supabaseUrl = Deno.env.get('SUPABASE_URL')!;
+    const supabaseServiceKey = Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')!;
+    const supabase = createClient(supabaseUrl, supabaseServiceKey);
 
-        results.push({
-          success: true,
-          numero_carga: numeroCarga,
-          message: `Atualizado com sucesso`,
-          sos_updated: sosUpdated,
-        });
+    // mode: 'loop' forces the legacy per-carga path (load tests / comparison)
+    const { cargas, mode } = await req.json() as { cargas: CargoUpdate[]; mode?: 'rpc' | 'loop' };
+
+    if (!cargas || !Array.isArray(cargas) || cargas.length === 0) {
+      return new Response(
+        JSON.stringify({ error: 'Array de cargas é obrigatório' }),
+        { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+      );
+    }
 
-        console.log(`✅ Carga ${numeroCarga} processada: ${sosUpdated} SOs atualizadas`);
+    console.log(`📦 Processando ${cargas.length} cargas...`);
 
-      } catch (error: any) {
-        console.error(`❌ Erro ao processar carga ${numeroCarga}:`, error);
-        results.push({
-          success: false,
-          numero_carga: numeroCarga,
-          message: error.message || 'Erro desconhecido',
-          sos_updated: 0,
-        });
-      }
+    let usedMode: 'rpc' | 'loop' = 'rpc';
+    let results = mode === 'loop' ? null : await processWithRpc(supabase, cargas);
+    if (!results) {
+      usedMode = 'loop';
+      results = await processWithLoop(supabase, cargas);
     }
 
     const successCount = results.filter(r => r.success).length;
     const totalSOs = results.reduce((sum, r) => sum + r.sos_updated, 0);
 
-    console.log(`📊 Processamento concluído: ${successCount}/${results.length} cargas, ${totalSOs} SOs`);
+    console.log(`📊 Processamento concluído (${usedMode}): ${successCount}/${results.length} cargas, ${totalSOs} SOs`);
 
     return new Response(
       JSON.stringify({
@@ -317,6 +348,7 @@ Deno.serve(async (req) => {
         processed: results.length,
         successful: successCount,
         total_sos_updated: totalSOs,
+        mode: usedMode,
         results,
       }),
       { status: 200, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
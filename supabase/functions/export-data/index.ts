@@ -26,6 +26,23 @@ const ALLOWED_TABLES = [
   'user_roles',
 ];
 
+// Colunas aceitas como watermark no modo delta
+const WATERMARK_COLUMNS = ['updated_at', 'created_at', 'attempted_at'];
+
+// Paginação por cursor: até MAX_LIMIT linhas por chamada, ordenadas por id
+const MAX_LIMIT = 5000;
+
+// JSON da resposta, comprimido com gzip quando pedido e aceito pelo cliente
+function jsonResponse(req: Request, body: unknown, gzip: boolean): Response {
+  const payload = JSON.stringify(body);
+  const headers: Record<string, string> = { ...corsHeaders, 'Content-Type': 'application/json' };
+  if (gzip && (req.headers.get('accept-encoding') ?? '').includes('gzip')) {
+    const stream = new Blob([payload]).stream().pipeThrough(new CompressionStream('gzip'));
+    return new Response(stream, { status: 200, headers: { ...headers, 'Content-Encoding': 'gzip' } });
+  }
+  return new Response(payload, { status: 200, headers });
+}
+
 Deno.serve(async (req) => {
   if (req.method === 'OPTIONS') {
     return new Response(null, { headers: corsHeaders });
@@ -36,7 +53,15 @@ Deno.serve(async (req) => {
     const supabaseServiceKey = Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')!;
     const supabase = createClient(supabaseUrl, supabaseServiceKey);
 
-    const { table } = await req.json() as { table: string };
+    const { table, since, since_column, after_id, until_id, limit, gzip } = await req.json() as {
+      table: string;
+      since?: string;
+      since_column?: string;
+      after_id?: string | number;   // cursor: ids > after_id
+      until_id?: string | number;   // fim da faixa (inclusive), para exportar faixas em paralelo
+      limit?: number;
+      gzip?: boolean;
+    };
 
     if (!table || typeof table !== 'string') {
       return new Response(
@@ -56,27 +81,71 @@ Deno.serve(async (req) => {
       );
     }
 
-    console.log(`📊 Exportando dados da tabela: ${table}`);
+    // Delta: só linhas com since_column >= since (colunas de watermark permitidas)
+    if (since !== undefined) {
+      if (!since_column || !WATERMARK_COLUMNS.includes(since_column) || isNaN(Date.parse(since))) {
+        return new Response(
+          JSON.stringify({
+            error: '"since" exige uma data ISO 8601 e "since_column" válido',
+            allowed_columns: WATERMARK_COLUMNS,
+          }),
+          { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+        );
+      }
+    }
+
+    const paged = limit !== undefined || after_id !== undefined || until_id !== undefined;
+    if (limit !== undefined && (!Number.isInteger(limit) || limit < 1 || limit > MAX_LIMIT)) {
+      return new Response(
+        JSON.stringify({ error: `"limit" deve ser um inteiro entre 1 e ${MAX_LIMIT}` }),
+        { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+      );
+    }
+    const pageSize = limit ?? MAX_LIMIT;
+
+    console.log(`📊 Exportando dados da tabela: ${table}${since ? ` (desde ${since})` : ''}` +
+      (paged ? ` (após ${after_id ?? 'início'}, ${pageSize} linhas)` : ''));
+
+    // Instante antes da consulta: vira o watermark do próximo delta
+    const exportedAt = new Date().toISOString();
 
-    const { data, error } = await supabase
+    let query = supabase
       .from(table)
       .select('*');
 
+    if (since !== undefined) {
+      query = query.gte(since_column!, new Date(since).toISOString());
+    }
+
+    // Sem parâmetros de página: tabela inteira numa resposta (comportamento antigo)
+    if (paged) {
+      if (after_id !== undefined && after_id !== null) query = query.gt('id', after_id);
+      if (until_id !== undefined && until_id !== null) query = query.lte('id', until_id);
+      query = query.order('id', { ascending: true }).limit(pageSize);
+    }
+
+    const { data, error } = await query;
+
     if (error) {
       console.error(`❌ Erro ao consultar tabela ${table}:`, error.message);
       throw new Error(`Erro ao consultar tabela: ${error.message}`);
     }
 
-    console.log(`✅ Exportados ${data?.length || 0} registros de ${table}`);
+    const rows = data || [];
+    console.log(`✅ Exportados ${rows.length} registros de ${table}`);
 
-    return new Response(
-      JSON.stringify({ 
-        table,
-        count: data?.length || 0,
-        data: data || [] 
-      }),
-      { status: 200, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-    );
+    // Cursor da próxima página. Não dá para concluir "acabou" por uma página
+    // menor que o limit: o max-rows do PostgREST pode cortar antes. O cliente
+    // para quando uma página volta vazia (next_after_id null).
+    const nextAfterId = paged && rows.length > 0 ? rows[rows.length - 1].id : null;
+
+    return jsonResponse(req, {
+      table,
+      count: rows.length,
+      exported_at: exportedAt,
+      next_after_id: nextAfterId,
+      data: rows,
+    }, gzip === true);
 
   } catch (error: any) {
     console.error('❌ Erro:', error);
@@ -15,7 +15,10 @@ Deno.serve(async (req) => {
     const supabaseServiceKey = Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')!;
     const supabase = createClient(supabaseUrl, supabaseServiceKey);
 
-    const { sales_orders } = await req.json() as { sales_orders: string[] };
+    const { sales_orders, updated_since } = await req.json() as {
+      sales_orders: string[];
+      updated_since?: string;
+    };
 
     if (!sales_orders || !Array.isArray(sales_orders) || sales_orders.length === 0) {
       return new Response(
@@ -32,17 +35,36 @@ Deno.serve(async (req) => {
       );
     }
 
-    const { data, error } = await supabase
+    if (updated_since !== undefined && isNaN(Date.parse(updated_since))) {
+      return new Response(
+        JSON.stringify({ error: 'updated_since deve ser uma data ISO 8601' }),
+        { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+      );
+    }
+
+    // Instante da consulta: o cliente usa como updated_since na próxima revalidação
+    const syncedAt = new Date().toISOString();
+
+    let query = supabase
       .from('envios_processados')
       .select('id, sales_order, data_envio, status_atual, is_delivered, is_at_warehouse, tracking_numbers, data_ultima_atualizacao')
       .in('sales_order', sales_orders);
 
+    // Revalidação incremental: só SOs alteradas depois de updated_since.
+    // updated_at cobre updates que não mexem em data_ultima_atualizacao (ex.: update-envio-data).
+    if (updated_since) {
+      const since = new Date(updated_since).toISOString();
+      query = query.or(`data_ultima_atualizacao.gt.${since},updated_at.gt.${since}`);
+    }
+
+    const { data, error } = await query;
+
     if (error) {
       throw new Error(`Erro ao consultar envios: ${error.message}`);
     }
 
     return new Response(
-      JSON.stringify({ data: data || [] }),
+      JSON.stringify({ data: data || [], synced_at: syncedAt }),
       { status: 200, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
     );
 
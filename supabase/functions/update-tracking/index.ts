@@ -14,6 +14,219 @@ const sanitizeInput = (input: string, maxLength = 1000): string => {
   return input.trim().slice(0, maxLength).replace(/[<>'"&]/g, '');
 };
 
+// Máximo de SOs por chamada no modo em lote
+const MAX_BATCH_SIZE = 500;
+
+interface HistoryEntry {
+  status: string;
+  location: string;
+  tracking_number: string;
+  description: string;
+}
+
+interface BatchResult {
+  sales_order: string;
+  success: boolean;
+  operation?: 'insert' | 'update';
+  error?: string;
+}
+
+// Campos de status/tracking atualizados numa SO existente (dados comerciais preservados)
+function buildUpdateData(payload: any): Record<string, any> {
+  const updateData: any = {
+    data_ultima_atualizacao: new Date().toISOString()
+  };
+
+  // Only update status fields
+  if (payload.status) updateData.status = translateFedExStatus(payload.status);
+  if (payload.status_atual) updateData.status_atual = translateFedExStatus(payload.status_atual);
+  if (payload.status_cliente) updateData.status_cliente = translateFedExStatus(payload.status_cliente);
+  if (payload.ultima_localizacao) updateData.ultima_localizacao = translateFedExStatus(payload.ultima_localizacao);
+
+  // Update tracking info if provided
+  if (payload.tracking_numbers) {
+    updateData.tracking_numbers = sanitizeInput(payload.tracking_numbers, 500);
+  }
+  if (payload.carrier) updateData.carrier = payload.carrier;
+  if (payload.ship_to) updateData.ship_to = payload.ship_to;
+  if (payload.data_envio) updateData.data_envio = payload.data_envio;
+
+  // Update delivery flags based on status
+  if (payload.status_atual) {
+    const translatedStatus = translateFedExStatus(payload.status_atual);
+    updateData.is_at_warehouse = translatedStatus.toLowerCase().includes('armazém');
+    updateData.is_delivered = translatedStatus.toLowerCase().includes('entregue');
+  }
+
+  return updateData;
+}
+
+// Registro completo de uma SO nova
+function buildInsertData(salesOrder: string, payload: any): Record<string, any> {
+  return {
+    sales_order: salesOrder,
+    erp_order: payload.erp_order || null,
+    web_order: payload.web_order || null,
+    cliente: payload.cliente || 'Cliente não especificado',
+    produtos: payload.produtos || 'Produtos não especificados',
+    valor_total: payload.valor_total || 0,
+    tracking_numbers: payload.tracking_numbers ? sanitizeInput(payload.tracking_numbers, 500) : null,
+    data_envio: payload.data_envio,
+    status: translateFedExStatus(payload.status || 'Em Trânsito'),
+    status_atual: translateFedExStatus(payload.status_atual || 'Em Trânsito'),
+    status_cliente: translateFedExStatus(payload.status_cliente || payload.status_atual || 'Em Trânsito'),
+    ultima_localizacao: translateFedExStatus(payload.ultima_localizacao || 'Em Trânsito'),
+    carrier: payload.carrier || 'FedEx',
+    ship_to: payload.ship_to || null,
+    data_ultima_atualizacao: new Date().toISOString()
+  };
+}
+
+// Evento de shipment_history do payload (null se não há estágio relevante)
+function buildHistoryEntry(payload: any): HistoryEntry | null {
+  if (!payload.tracking_numbers || !payload.status_atual) return null;
+
+  // Map status to logical stage
+  const logicalStage = mapToLogicalStage(
+    payload.status_atual,
+    payload.ultima_localizacao || ''
+  );
+
+  // Only insert if it's a meaningful stage (not "Atualizado")
+  if (!logicalStage || logicalStage === 'Atualizado') return null;
+
+  return {
+    status: logicalStage,
+    location: translateFedExStatus(payload.ultima_localizacao || ''),
+    tracking_number: sanitizeInput(payload.tracking_numbers, 500),
+    description: JSON.stringify({
+      carrier: payload.carrier,
+      original_status: payload.status_atual,
+      fonte: 'Update via n8n'
+    }),
+  };
+}
+
+// Insere o evento só se o estágio mudou em relação ao último registrado
+async function insertHistoryIfChanged(supabase: any, salesOrder: string, entry: HistoryEntry): Promise<boolean> {
+  // Check last recorded stage to avoid duplicate entries
+  const { data: lastHistory } = await supabase
+    .from('shipment_history')
+    .select('status')
+    .eq('sales_order', salesOrder)
+    .order('timestamp', { ascending: false })
+    .limit(1)
+    .maybeSingle();
+
+  // Only insert if stage changed
+  if (!lastHistory || lastHistory.status !== entry.status) {
+    await supabase
+      .from('shipment_history')
+      .insert({
+        sales_order: salesOrder,
+        ...entry,
+        timestamp: new Date().toISOString(),
+        created_at: new Date().toISOString()
+      });
+
+    console.log('📝 Mudança de estágio detectada:', lastHistory?.status || 'inicial', '->', entry.status);
+    return true;
+  }
+
+  console.log('⏭️ Mesmo estágio, histórico não duplicado:', entry.status);
+  return false;
+}
+
+// Modo em lote: uma leitura .in() para saber o que existe, um insert com as
+// SOs novas e a RPC apply_tracking_updates para os updates + histórico
+async function processBatch(supabase: any, updates: any[]) {
+  const results: BatchResult[] = [];
+  const bySalesOrder = new Map<string, any>();
+
+  for (const item of updates) {
+    const salesOrder = sanitizeInput(item?.sales_order, 100);
+    if (!salesOrder) {
+      results.push({ sales_order: String(item?.sales_order ?? ''), success: false, error: 'sales_order é obrigatório' });
+      continue;
+    }
+    if (item.data_envio && isNaN(Date.parse(item.data_envio))) {
+      results.push({ sales_order: salesOrder, success: false, error: 'data_envio inválida' });
+      continue;
+    }
+    // A mesma SO repetida no lote: vale a última
+    bySalesOrder.delete(salesOrder);
+    bySalesOrder.set(salesOrder, item);
+  }
+
+  const salesOrders = [...bySalesOrder.keys()];
+  let inserted = 0, updated = 0, historyInserted = 0;
+
+  if (salesOrders.length > 0) {
+    const { data: existingRows, error: fetchError } = await supabase
+      .from('envios_processados')
+      .select('sales_order')
+      .in('sales_order', salesOrders);
+
+    if (fetchError) throw fetchError;
+
+    const existing = new Set((existingRows || []).map((r: any) => r.sales_order));
+    const inserts: Record<string, any>[] = [];
+    const envios: Record<string, any>[] = [];
+    const historico: Record<string, any>[] = [];
+
+    for (const [salesOrder, item] of bySalesOrder) {
+      if (existing.has(salesOrder)) {
+        envios.push({ sales_order: salesOrder, ...buildUpdateData(item) });
+      } else {
+        inserts.push(buildInsertData(salesOrder, item));
+      }
+      const entry = buildHistoryEntry(item);
+      if (entry) historico.push({ sales_order: salesOrder, ...entry });
+      results.push({ sales_order: salesOrder, success: true, operation: existing.has(salesOrder) ? 'update' : 'insert' });
+    }
+
+    if (inserts.length > 0) {
+      const { error: insertError } = await supabase.from('envios_processados').insert(inserts);
+      if (insertError) throw insertError;
+      inserted = inserts.length;
+    }
+
+    const { data: applied, error: rpcError } = await supabase
+      .rpc('apply_tracking_updates', { envios, historico });
+
+    if (rpcError?.code === 'PGRST202') {
+      // Migração ainda não aplicada: um update e uma checagem de histórico por SO
+      console.warn('⚠️ apply_tracking_updates não encontrada, aplicando SO a SO');
+      for (const { sales_order, ...updateData } of envios) {
+        const { error } = await supabase.from('envios_processados').update(updateData).eq('sales_order', sales_order);
+        if (error) throw error;
+      }
+      for (const { sales_order, ...entry } of historico) {
+        if (await insertHistoryIfChanged(supabase, sales_order, entry as HistoryEntry)) historyInserted++;
+      }
+      updated = envios.length;
+    } else if (rpcError) {
+      throw rpcError;
+    } else {
+      updated = applied?.updated ?? envios.length;
+      historyInserted = applied?.history_inserted ?? 0;
+    }
+  }
+
+  const errors = results.filter(r => !r.success).length;
+  console.log(`📦 Lote processado: ${inserted} criadas, ${updated} atualizadas, ${errors} com erro`);
+
+  return {
+    success: true,
+    processed: results.length,
+    inserted,
+    updated,
+    history_inserted: historyInserted,
+    errors,
+    results,
+  };
+}
+
 Deno.serve(async (req) => {
   if (req.method === 'OPTIONS') {
     return new Response(null, { headers: corsHeaders });
@@ -48,6 +261,22 @@ Deno.serve(async (req) => {
     await recordSuccessfulAttempt(supabase, req, '/functions/update-tracking');
 
     const payload = await req.json();
+
+    // Modo em lote: { updates: [...] } (ou um array) com várias SOs numa chamada
+    const updates = Array.isArray(payload) ? payload : payload?.updates;
+    if (Array.isArray(updates)) {
+      if (updates.length === 0 || updates.length > MAX_BATCH_SIZE) {
+        return new Response(
+          JSON.stringify({ error: `updates deve ter entre 1 e ${MAX_BATCH_SIZE} itens` }),
+          { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+        );
+      }
+      return new Response(
+        JSON.stringify(await processBatch(supabase, updates)),
+        { status: 200, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+      );
+    }
+
     const salesOrder = sanitizeInput(payload.sales_order, 100);
     
     if (!salesOrder) {
@@ -85,30 +314,7 @@ Deno.serve(async (req) => {
         }
       });
 
-      const updateData: any = {
-        data_ultima_atualizacao: new Date().toISOString()
-      };
-
-      // Only update status fields
-      if (payload.status) updateData.status = translateFedExStatus(payload.status);
-      if (payload.status_atual) updateData.status_atual = translateFedExStatus(payload.status_atual);
-      if (payload.status_cliente) updateData.status_cliente = translateFedExStatus(payload.status_cliente);
-      if (payload.ultima_localizacao) updateData.ultima_localizacao = translateFedExStatus(payload.ultima_localizacao);
-      
-      // Update tracking info if provided
-      if (payload.tracking_numbers) {
-        updateData.tracking_numbers = sanitizeInput(payload.tracking_numbers, 500);
-      }
-      if (payload.carrier) updateData.carrier = payload.carrier;
-      if (payload.ship_to) updateData.ship_to = payload.ship_to;
-      if (payload.data_envio) updateData.data_envio = payload.data_envio;
-
-      // Update delivery flags based on status
-      if (payload.status_atual) {
-        const translatedStatus = translateFedExStatus(payload.status_atual);
-        updateData.is_at_warehouse = translatedStatus.toLowerCase().includes('armazém');
-        updateData.is_delivered = translatedStatus.toLowerCase().includes('entregue');
-      }
+      const updateData = buildUpdateData(payload);
 
       const result = await supabase
         .from('envios_processados')
@@ -125,23 +331,7 @@ Deno.serve(async (req) => {
       
       const result = await supabase
         .from('envios_processados')
-        .insert({
-          sales_order: salesOrder,
-          erp_order: payload.erp_order || null,
-          web_order: payload.web_order || null,
-          cliente: payload.cliente || 'Cliente não especificado',
-          produtos: payload.produtos || 'Produtos não especificados',
-          valor_total: payload.valor_total || 0,
-          tracking_numbers: payload.tracking_numbers ? sanitizeInput(payload.tracking_numbers, 500) : null,
-          data_envio: payload.data_envio,
-          status: translateFedExStatus(payload.status || 'Em Trânsito'),
-          status_atual: translateFedExStatus(payload.status_atual || 'Em Trânsito'),
-          status_cliente: translateFedExStatus(payload.status_cliente || payload.status_atual || 'Em Trânsito'),
-          ultima_localizacao: translateFedExStatus(payload.ultima_localizacao || 'Em Trânsito'),
-          carrier: payload.carrier || 'FedEx',
-          ship_to: payload.ship_to || null,
-          data_ultima_atualizacao: new Date().toISOString()
-        })
+        .insert(buildInsertData(salesOrder, payload))
         .select();
 
       data = result.data;
@@ -162,45 +352,9 @@ Deno.serve(async (req) => {
 
     // INSERT no histórico com mapeamento para estágio lógico
     if (payload.tracking_numbers && payload.status_atual) {
-      // Map status to logical stage
-      const logicalStage = mapToLogicalStage(
-        payload.status_atual, 
-        payload.ultima_localizacao || ''
-      );
-      
-      // Only insert if it's a meaningful stage (not "Atualizado")
-      if (logicalStage && logicalStage !== 'Atualizado') {
-        // Check last recorded stage to avoid duplicate entries
-        const { data: lastHistory } = await supabase
-          .from('shipment_history')
-          .select('status')
-          .eq('sales_order', salesOrder)
-          .order('timestamp', { ascending: false })
-          .limit(1)
-          .maybeSingle();
-        
-        // Only insert if stage changed
-        if (!lastHistory || lastHistory.status !== logicalStage) {
-          await supabase
-            .from('shipment_history')
-            .insert({
-              sales_order: salesOrder,
-              status: logicalStage,
-              location: translateFedExStatus(payload.ultima_localizacao || ''),
-              tracking_number: sanitizeInput(payload.tracking_numbers, 500),
-              description: JSON.stringify({
-                carrier: payload.carrier,
-                original_status: payload.status_atual,
-                fonte: 'Update via n8n'
-              }),
-              timestamp: new Date().toISOString(),
-              created_at: new Date().toISOString()
-            });
-          
-          console.log('📝 Mudança de estágio detectada:', lastHistory?.status || 'inicial', '->', logicalStage);
-        } else {
-          console.log('⏭️ Mesmo estágio, histórico não duplicado:', logicalStage);
-        }
+      const entry = buildHistoryEntry(payload);
+      if (entry) {
+        await insertHistoryIfChanged(supabase, salesOrder, entry);
       } else {
         console.log('⏭️ Status "Atualizado" ignorado - não é um gargalo crítico');
       }
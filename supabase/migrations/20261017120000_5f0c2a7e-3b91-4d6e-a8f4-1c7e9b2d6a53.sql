@@ -0,0 +1,225 @@
+-- Atualização em massa de cargas (bulk-update-cargas) em uma única transação.
+--
+-- Recebe o mesmo array de cargas da Edge Function e faz, com comandos set-based:
+--   1. UPDATE em cargas (datas, status e ultima_localizacao)
+--   2. substituição dos eventos de carga_historico por (numero_carga, evento)
+--   3. propagação de status/localização/data_envio para envios_processados
+--      das SOs vinculadas (carga_sales_orders)
+--   4. substituição dos eventos de shipment_history por (sales_order, status)
+--
+-- O resultado é idêntico ao do loop anterior da Edge Function, inclusive
+-- quando a mesma carga (ou SO) aparece mais de uma vez no payload: vale a
+-- última linha para status e a última data não nula para cada tipo de data.
+
+-- Busca de eventos por carga+evento (DELETE antes do INSERT)
+CREATE INDEX IF NOT EXISTS idx_carga_historico_numero_evento
+  ON public.carga_historico(numero_carga, evento);
+
+CREATE INDEX IF NOT EXISTS idx_shipment_history_sales_order_status
+  ON public.shipment_history(sales_order, status);
+
+-- true se o texto é uma data/hora aceita pelo Postgres (ou NULL)
+CREATE OR REPLACE FUNCTION public.bulk_cargas_data_valida(valor text)
+RETURNS boolean
+LANGUAGE plpgsql
+STABLE
+SET search_path = public, pg_temp
+AS $function$
+BEGIN
+  IF valor IS NOT NULL THEN
+    PERFORM valor::timestamptz;
+  END IF;
+  RETURN true;
+EXCEPTION WHEN others THEN
+  RETURN false;
+END;
+$function$;
+
+CREATE OR REPLACE FUNCTION public.bulk_update_cargas(payload jsonb)
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $function$
+DECLARE
+  agora timestamptz := now();
+  resultado jsonb;
+BEGIN
+  IF jsonb_typeof(payload) IS DISTINCT FROM 'array' OR jsonb_array_length(payload) = 0 THEN
+    RAISE EXCEPTION 'Array de cargas é obrigatório' USING ERRCODE = '22023';
+  END IF;
+
+  DROP TABLE IF EXISTS pg_temp.bulk_linhas, pg_temp.bulk_eventos, pg_temp.bulk_historico_sos;
+
+  -- Uma linha por item do payload, na ordem recebida
+  CREATE TEMP TABLE bulk_linhas ON COMMIT DROP AS
+  SELECT e.ord,
+         coalesce(btrim(e.item->>'numero_carga'), '') AS numero_carga,
+         nullif(e.item->>'data_armazem', '') AS data_armazem,
+         nullif(e.item->>'data_embarque', '') AS data_embarque,
+         nullif(e.item->>'data_chegada', '') AS data_chegada,
+         nullif(e.item->>'data_desembaraco', '') AS data_desembaraco,
+         nullif(e.item->>'data_entrega', '') AS data_entrega,
+         nullif(e.item->>'status', '') AS status,
+         NULL::text AS ultima_localizacao,
+         NULL::text AS erro
+  FROM jsonb_array_elements(payload) WITH ORDINALITY AS e(item, ord);
+
+  UPDATE bulk_linhas SET erro = 'numero_carga é obrigatório' WHERE numero_carga = '';
+
+  UPDATE bulk_linhas b
+  SET erro = format('Carga %s não encontrada', b.numero_carga)
+  WHERE b.erro IS NULL
+    AND NOT EXISTS (SELECT 1 FROM cargas c WHERE c.numero_carga = b.numero_carga);
+
+  UPDATE bulk_linhas
+  SET erro = format('Data inválida para a carga %s', numero_carga)
+  WHERE erro IS NULL
+    AND NOT (bulk_cargas_data_valida(data_armazem) AND bulk_cargas_data_valida(data_embarque)
+             AND bulk_cargas_data_valida(data_chegada) AND bulk_cargas_data_valida(data_desembaraco)
+             AND bulk_cargas_data_valida(data_entrega));
+
+  -- Status/localização inferidos pela data mais avançada da linha
+  UPDATE bulk_linhas
+  SET ultima_localizacao = CASE
+        WHEN data_entrega IS NOT NULL THEN 'Destino Final'
+        WHEN data_desembaraco IS NOT NULL THEN 'Brasil - Liberado'
+        WHEN data_chegada IS NOT NULL THEN 'Alfândega Brasil'
+        WHEN data_embarque IS NOT NULL THEN 'Em Voo'
+        WHEN data_armazem IS NOT NULL THEN 'Miami - Armazém FedEx'
+        ELSE 'Fornecedor'
+      END,
+      status = coalesce(status, CASE
+        WHEN data_entrega IS NOT NULL THEN 'Entregue'
+        WHEN data_desembaraco IS NOT NULL THEN 'Liberado'
+        WHEN data_chegada IS NOT NULL THEN 'Em Desembaraço'
+        WHEN data_embarque IS NOT NULL THEN 'Em Trânsito'
+        WHEN data_armazem IS NOT NULL THEN 'No Armazém'
+        ELSE 'Em Consolidação'
+      END)
+  WHERE erro IS NULL;
+
+  -- Uma linha por carga e tipo de data informado (a última do payload)
+  CREATE TEMP TABLE bulk_eventos ON COMMIT DROP AS
+  SELECT DISTINCT ON (b.numero_carga, t.tipo)
+         b.numero_carga, b.ord, t.tipo, t.data, t.evento, t.localizacao, t.status_envio
+  FROM bulk_linhas b
+  CROSS JOIN LATERAL (VALUES
+    ('data_armazem', b.data_armazem, 'Chegada no Armazém', 'Miami - Armazém FedEx', 'No Armazém'),
+    ('data_embarque', b.data_embarque, 'Embarque Confirmado', 'Aeroporto de Origem', 'Em Trânsito'),
+    ('data_chegada', b.data_chegada, 'Chegada no Brasil', 'Aeroporto Brasil', 'Em Desembaraço'),
+    ('data_desembaraco', b.data_desembaraco, 'Desembaraço Concluído', 'Alfândega Brasil', 'Liberado'),
+    ('data_entrega', b.data_entrega, 'Entrega Realizada', 'Destino Final', 'Entregue')
+  ) AS t(tipo, data, evento, localizacao, status_envio)
+  WHERE b.erro IS NULL AND t.data IS NOT NULL
+  ORDER BY b.numero_carga, t.tipo, b.ord DESC;
+
+  -- 1. cargas: datas informadas + status da última linha de cada carga
+  UPDATE cargas c
+  SET data_armazem = coalesce(d.data_armazem::timestamptz, c.data_armazem),
+      data_embarque = coalesce(d.data_embarque::timestamptz, c.data_embarque),
+      data_chegada_prevista = coalesce(d.data_chegada::timestamptz, c.data_chegada_prevista),
+      data_autorizacao = coalesce(d.data_desembaraco::timestamp, c.data_autorizacao),
+      data_entrega = coalesce(d.data_entrega::timestamptz, c.data_entrega),
+      status = u.status,
+      ultima_localizacao = u.ultima_localizacao,
+      updated_at = agora
+  FROM (
+    SELECT DISTINCT ON (numero_carga) numero_carga, status, ultima_localizacao
+    FROM bulk_linhas
+    WHERE erro IS NULL
+    ORDER BY numero_carga, ord DESC
+  ) u
+  LEFT JOIN (
+    SELECT numero_carga,
+           max(data) FILTER (WHERE tipo = 'data_armazem') AS data_armazem,
+           max(data) FILTER (WHERE tipo = 'data_embarque') AS data_embarque,
+           max(data) FILTER (WHERE tipo = 'data_chegada') AS data_chegada,
+           max(data) FILTER (WHERE tipo = 'data_desembaraco') AS data_desembaraco,
+           max(data) FILTER (WHERE tipo = 'data_entrega') AS data_entrega
+    FROM bulk_eventos
+    GROUP BY numero_carga
+  ) d ON d.numero_carga = u.numero_carga
+  WHERE c.numero_carga = u.numero_carga;
+
+  -- 2. carga_historico: substitui o evento de cada tipo de data
+  DELETE FROM carga_historico h
+  USING bulk_eventos e
+  WHERE h.numero_carga = e.numero_carga AND h.evento = e.evento;
+
+  INSERT INTO carga_historico (numero_carga, evento, data_evento, localizacao, descricao)
+  SELECT numero_carga, evento, data::timestamptz, localizacao, 'Atualizado via importação em massa'
+  FROM bulk_eventos;
+
+  -- 3. envios_processados das SOs vinculadas (vale a última carga do payload)
+  UPDATE envios_processados e
+  SET status_atual = s.status,
+      status = s.status,
+      status_cliente = s.status,
+      ultima_localizacao = s.ultima_localizacao,
+      data_ultima_atualizacao = agora,
+      is_delivered = CASE WHEN s.entregue THEN true ELSE e.is_delivered END,
+      data_envio = coalesce(s.data_envio::timestamptz, e.data_envio)
+  FROM (
+    SELECT l.so_number,
+           (array_agg(b.status ORDER BY b.ord DESC))[1] AS status,
+           (array_agg(b.ultima_localizacao ORDER BY b.ord DESC))[1] AS ultima_localizacao,
+           (array_agg(b.data_embarque ORDER BY b.ord DESC)
+              FILTER (WHERE b.data_embarque IS NOT NULL))[1] AS data_envio,
+           bool_or(b.status = 'Entregue') AS entregue
+    FROM bulk_linhas b
+    JOIN carga_sales_orders l ON l.numero_carga = b.numero_carga
+    WHERE b.erro IS NULL
+    GROUP BY l.so_number
+  ) s
+  WHERE e.sales_order = s.so_number;
+
+  -- 4. shipment_history: substitui o evento de cada status por SO
+  CREATE TEMP TABLE bulk_historico_sos ON COMMIT DROP AS
+  SELECT DISTINCT ON (l.so_number, e.status_envio)
+         l.so_number, e.status_envio, e.localizacao, e.data, e.numero_carga
+  FROM bulk_eventos e
+  JOIN carga_sales_orders l ON l.numero_carga = e.numero_carga
+  ORDER BY l.so_number, e.status_envio, e.ord DESC;
+
+  DELETE FROM shipment_history h
+  USING bulk_historico_sos s
+  WHERE h.sales_order = s.so_number AND h.status = s.status_envio;
+
+  INSERT INTO shipment_history (sales_order, status, location, "timestamp", description)
+  SELECT so_number, status_envio, localizacao, data::timestamptz, 'Importação em massa - Carga ' || numero_carga
+  FROM bulk_historico_sos;
+
+  DROP TABLE bulk_historico_sos;
+
+  -- Resultado no mesmo formato da Edge Function (uma entrada por item, em ordem)
+  SELECT jsonb_build_object(
+           'success', true,
+           'processed', count(*),
+           'successful', count(*) FILTER (WHERE r.erro IS NULL),
+           'total_sos_updated', coalesce(sum(r.sos_updated), 0),
+           'results', jsonb_agg(jsonb_build_object(
+             'success', r.erro IS NULL,
+             'numero_carga', r.numero_carga,
+             'message', coalesce(r.erro, 'Atualizado com sucesso'),
+             'sos_updated', r.sos_updated
+           ) ORDER BY r.ord)
+         )
+  INTO resultado
+  FROM (
+    SELECT b.ord, b.numero_carga, b.erro,
+           CASE WHEN b.erro IS NULL
+                THEN (SELECT count(*) FROM carga_sales_orders l WHERE l.numero_carga = b.numero_carga)
+                ELSE 0 END AS sos_updated
+    FROM bulk_linhas b
+  ) r;
+
+  DROP TABLE bulk_linhas, bulk_eventos;
+
+  RETURN resultado;
+END;
+$function$;
+
+-- Só a Edge Function (service_role) pode chamar
+REVOKE EXECUTE ON FUNCTION public.bulk_update_cargas(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.bulk_update_cargas(jsonb) TO service_role;
@@ -0,0 +1,81 @@
+-- Modo em lote do update-tracking: aplica os updates de várias SOs e os
+-- eventos de shipment_history numa única chamada (uma transação).
+--
+-- envios: [{sales_order, data_ultima_atualizacao, status, status_atual,
+--           status_cliente, ultima_localizacao, tracking_numbers, carrier,
+--           ship_to, data_envio, is_at_warehouse, is_delivered}]
+--   campos ausentes/null preservam o valor atual (como no update SO a SO)
+-- historico: [{sales_order, status, location, tracking_number, description}]
+--   só entra se o estágio for diferente do último registrado para a SO
+
+-- Último evento por SO (LATERAL ... ORDER BY timestamp DESC LIMIT 1)
+CREATE INDEX IF NOT EXISTS idx_shipment_history_sales_order_timestamp
+  ON public.shipment_history(sales_order, "timestamp" DESC);
+
+CREATE OR REPLACE FUNCTION public.apply_tracking_updates(envios jsonb, historico jsonb)
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $function$
+DECLARE
+  atualizados integer := 0;
+  eventos integer := 0;
+BEGIN
+  UPDATE envios_processados e
+  SET data_ultima_atualizacao = coalesce(u.data_ultima_atualizacao, now()),
+      status = coalesce(u.status, e.status),
+      status_atual = coalesce(u.status_atual, e.status_atual),
+      status_cliente = coalesce(u.status_cliente, e.status_cliente),
+      ultima_localizacao = coalesce(u.ultima_localizacao, e.ultima_localizacao),
+      tracking_numbers = coalesce(u.tracking_numbers, e.tracking_numbers),
+      carrier = coalesce(u.carrier, e.carrier),
+      ship_to = coalesce(u.ship_to, e.ship_to),
+      data_envio = coalesce(u.data_envio, e.data_envio),
+      is_at_warehouse = coalesce(u.is_at_warehouse, e.is_at_warehouse),
+      is_delivered = coalesce(u.is_delivered, e.is_delivered)
+  FROM jsonb_to_recordset(coalesce(envios, '[]'::jsonb)) AS u(
+    sales_order text,
+    data_ultima_atualizacao timestamptz,
+    status text,
+    status_atual text,
+    status_cliente text,
+    ultima_localizacao text,
+    tracking_numbers text,
+    carrier text,
+    ship_to text,
+    data_envio timestamptz,
+    is_at_warehouse boolean,
+    is_delivered boolean
+  )
+  WHERE e.sales_order = u.sales_order;
+
+  GET DIAGNOSTICS atualizados = ROW_COUNT;
+
+  INSERT INTO shipment_history (sales_order, status, location, tracking_number, description, "timestamp", created_at)
+  SELECT h.sales_order, h.status, h.location, h.tracking_number, h.description, now(), now()
+  FROM jsonb_to_recordset(coalesce(historico, '[]'::jsonb)) AS h(
+    sales_order text,
+    status text,
+    location text,
+    tracking_number text,
+    description text
+  )
+  LEFT JOIN LATERAL (
+    SELECT sh.status
+    FROM shipment_history sh
+    WHERE sh.sales_order = h.sales_order
+    ORDER BY sh."timestamp" DESC
+    LIMIT 1
+  ) ultimo ON true
+  WHERE ultimo.status IS DISTINCT FROM h.status;
+
+  GET DIAGNOSTICS eventos = ROW_COUNT;
+
+  RETURN jsonb_build_object('updated', atualizados, 'history_inserted', eventos);
+END;
+$function$;
+
+-- Só a Edge Function (service_role) pode chamar
+REVOKE EXECUTE ON FUNCTION public.apply_tracking_updates(jsonb, jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.apply_tracking_updates(jsonb, jsonb) TO service_role;